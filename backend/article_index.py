@@ -0,0 +1,218 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from search_index import (SEARCH_SCHEMA, finish_search, index_article, indexed_ids, run_search, search_filters,
+                          unindex_article)
+
+# Number of characters of the article kept in the index for list previews
+PREVIEW_CHARS = 200
+
+SUMMARY_FIELDS = (
+    "id", "topic", "score", "status", "evaluation", "iteration", "max_iteration",
+    "created_at", "size", "needs_human_feedback", "preview",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS article_index (
+    id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    score INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT '',
+    evaluation TEXT NOT NULL DEFAULT '',
+    iteration INTEGER NOT NULL DEFAULT 0,
+    max_iteration INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT '',
+    size INTEGER NOT NULL DEFAULT 0,
+    mtime REAL NOT NULL DEFAULT 0,
+    needs_human_feedback INTEGER NOT NULL DEFAULT 0,
+    preview TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_article_index_created ON article_index (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_article_index_status ON article_index (status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_article_index_score ON article_index (score, created_at DESC, id DESC);
+"""
+
+
+def encode_cursor(created_at: str, article_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at}|{article_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Split a pagination cursor into (created_at, id). Raises ValueError if malformed."""
+    try:
+        created_at, article_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return created_at, article_id
+
+
+def page_filters(cursor: Optional[str] = None, status: Optional[str] = None, min_score: Optional[int] = None,
+                 max_score: Optional[int] = None) -> Tuple[str, List[Any]]:
+    """Build the WHERE clause for a newest-first keyset page over (created_at, id)"""
+    clauses = []
+    params: List[Any] = []
+    if cursor:
+        created_at, article_id = decode_cursor(cursor)
+        clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+        params.extend([created_at, created_at, article_id])
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    if min_score is not None:
+        clauses.append("score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        clauses.append("score <= ?")
+        params.append(max_score)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def finish_page(rows: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim the look-ahead row from a page query and compute the next cursor"""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    for row in rows:
+        row["needs_human_feedback"] = bool(row["needs_human_feedback"])
+    return rows, next_cursor
+
+
+def needs_review(article: Dict[str, Any]) -> bool:
+    """The list view's flag: paused for feedback, or below 7 without approval.
+
+    Only summaries carry this; the record's own needs_human_feedback is whether the run is paused.
+    """
+    return bool(
+        article.get("needs_human_feedback")
+        or ((article.get("score") or 0) < 7 and article.get("evaluation") != "approved")
+    )
+
+
+def summarize_article(article: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the index row for a full article record"""
+    return {
+        "id": article["id"],
+        "topic": article.get("topic", ""),
+        "score": article.get("score", 0) or 0,
+        "status": article.get("status", ""),
+        "evaluation": article.get("evaluation", ""),
+        "iteration": article.get("iteration", 0),
+        "max_iteration": article.get("max_iteration", 0),
+        "created_at": article.get("created_at", ""),
+        "needs_human_feedback": needs_review(article),
+        "preview": (article.get("final_article") or "")[:PREVIEW_CHARS],
+    }
+
+
+class ArticleIndex:
+    """Persistent metadata index over the article corpus, backed by SQLite.
+
+    The list view reads summaries from here so its cost depends on the page
+    size, not on how many (or how large) the stored articles are.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+            self._conn.executescript(SEARCH_SCHEMA)
+            self._conn.commit()
+
+    def upsert(self, article: Dict[str, Any], size: int = 0, mtime: float = 0.0):
+        with self._lock:
+            self._write_row(article, size, mtime)
+            self._conn.commit()
+
+    def _write_row(self, article: Dict[str, Any], size: int, mtime: float):
+        row = summarize_article(article)
+        row["size"] = size
+        row["mtime"] = mtime
+        row["needs_human_feedback"] = int(row["needs_human_feedback"])
+        columns = ", ".join(row)
+        placeholders = ", ".join(f":{key}" for key in row)
+        self._conn.execute(f"INSERT OR REPLACE INTO article_index ({columns}) VALUES ({placeholders})", row)
+        index_article(self._conn, article)
+
+    def remove(self, article_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM article_index WHERE id = ?", (article_id,))
+            unindex_article(self._conn, article_id)
+            self._conn.commit()
+
+    def rebuild(self, articles_dir: str) -> Dict[str, int]:
+        """Bring the index in line with the JSON files on disk.
+
+        Only files whose size or mtime changed since they were indexed are
+        parsed again; entries for files that no longer exist are dropped.
+        """
+        with self._lock:
+            known = {
+                row["id"]: (row["size"], row["mtime"])
+                for row in self._conn.execute("SELECT id, size, mtime FROM article_index")
+            }
+            # Indexes created before full-text search existed have no search rows yet
+            searchable = indexed_ids(self._conn)
+
+        seen = set()
+        updated = 0
+        for entry in os.scandir(articles_dir):
+            if not entry.name.endswith(".json") or not entry.is_file():
+                continue
+            article_id = entry.name[:-len(".json")]
+            stat = entry.stat()
+            if known.get(article_id) == (stat.st_size, stat.st_mtime) and article_id in searchable:
+                seen.add(article_id)
+                continue
+            try:
+                with open(entry.path, "r") as f:
+                    article = json.load(f)
+                article.setdefault("id", article_id)
+            except Exception as e:
+                print(f"Error indexing article file {entry.name}: {str(e)}")
+                continue
+            with self._lock:
+                self._write_row(article, stat.st_size, stat.st_mtime)
+            seen.add(article_id)
+            updated += 1
+
+        stale = [article_id for article_id in known if article_id not in seen]
+        with self._lock:
+            self._conn.executemany("DELETE FROM article_index WHERE id = ?", [(article_id,) for article_id in stale])
+            for article_id in stale:
+                unindex_article(self._conn, article_id)
+            self._conn.commit()
+        return {"indexed": len(seen), "updated": updated, "removed": len(stale)}
+
+    def query(self, limit: int = 50, cursor: Optional[str] = None, status: Optional[str] = None,
+              min_score: Optional[int] = None, max_score: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return one page of summaries (newest first) and the cursor for the next page"""
+        where, params = page_filters(cursor, status, min_score, max_score)
+        sql = (
+            f"SELECT {', '.join(SUMMARY_FIELDS)} FROM article_index {where} "
+            "ORDER BY created_at DESC, id DESC LIMIT ?"
+        )
+        with self._lock:
+            rows = [dict(row) for row in self._conn.execute(sql, params + [limit + 1])]
+        return finish_page(rows, limit)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, status: Optional[str] = None,
+               min_score: Optional[int] = None, max_score: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Rank summaries by relevance to an FTS5 MATCH expression; returns one page and the next offset"""
+        where, params = search_filters(status, min_score, max_score, table="article_index")
+        columns = [f"article_index.{field} AS {field}" for field in SUMMARY_FIELDS]
+        with self._lock:
+            rows = run_search(self._conn, "article_index", columns, query, where, params, limit, offset)
+        return finish_search(rows, limit, offset)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,144 @@
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List
+
+from sections import unwrap_article
+
+# Hard requirements from the evaluator prompt that can be checked without a model
+MIN_WORDS = 3500
+MIN_SOURCES = 15
+MIN_SECTIONS = 8
+MIN_QUOTES = 1
+# Score deductions for each failed requirement (same values as the evaluator prompt)
+GATE_DEDUCTIONS = {"words": 2, "sources": 3, "quotes": 2, "sections": 1}
+# Drafts failing any hard requirement are capped at this score
+GATE_MAX_SCORE = 5
+
+# Set to "false" to always send drafts to the LLM evaluator
+PRE_EVALUATION_GATE = os.getenv("PRE_EVALUATION_GATE", "true").lower() != "false"
+
+KEYWORD_COUNT = 20
+
+HEADING = re.compile(r"^(#{1,6})\s+\S")
+FENCE = re.compile(r"^\s*(```|~~~)")
+LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+\S")
+LINK = re.compile(r"\[[^\]]+\]\((https?://[^)\s]+)[^)]*\)")
+BARE_URL = re.compile(r"(?<![(<])\bhttps?://[^\s)>\]]+")
+FOOTNOTE = re.compile(r"\[\^?(\d{1,3})\]")
+# Sources named in prose: "(Source: HubSpot, 2024)", "(Gartner, 2023)", "According to **McKinsey**"
+PAREN_CITATION = re.compile(r"\((?:Sources?:\s*)?([A-Z][^()\n]{1,60}?),?\s+(?:19|20)\d{2}\)")
+NAMED_SOURCE = re.compile(
+    r"(?i:according to|study by|report (?:by|from)|survey by|data from|research (?:by|from))\s+"
+    r"(?i:the\s+|a\s+)?(?:\d{4}\s+\w+\s+(?i:by|from)\s+(?i:the\s+)?)?\**([A-Z][\w&.'-]*(?:\s+[A-Z&][\w&.'-]*){0,5})"
+)
+QUOTED = re.compile(r"[\"“]([^\"”\n]{40,})[\"”]")
+WORD = re.compile(r"[A-Za-z][A-Za-z'-]+")
+# Whitespace-separated tokens that contain a letter or digit (skips "##", "-", "|")
+WORD_TOKEN = re.compile(r"\S*\w\S*")
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below between
+both but by can could did do does doing down during each even every few for from further had has have having he
+her here hers herself him himself his how however i if in into is it its itself just like may me might more most
+much must my myself new no nor not now of off on once one only or other our ours ourselves out over own per same
+she should so some such than that the their theirs them themselves then there these they this those through to too
+under until up upon us use used using very via was we well were what when where which while who whom why will with
+within without would you your yours yourself yourselves
+""".split())
+
+
+def compute_metrics(markdown: str) -> Dict[str, Any]:
+    """Count the mechanical features of an article in a single pass over its lines"""
+    _, body, _ = unwrap_article(markdown or "")
+    words = 0
+    headings = {"h1": 0, "h2": 0, "h3": 0}
+    list_items = 0
+    blockquotes = 0
+    code_blocks = 0
+    urls = set()
+    footnotes = set()
+    named_sources = set()
+    quotes = 0
+    terms: Counter = Counter()
+    in_fence = False
+
+    for line in body.splitlines():
+        if FENCE.match(line):
+            in_fence = not in_fence
+            code_blocks += in_fence
+            continue
+        if in_fence:
+            continue
+        heading = HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            if level <= 3:
+                headings[f"h{level}"] += 1
+        elif LIST_ITEM.match(line):
+            list_items += 1
+        elif line.lstrip().startswith(">"):
+            blockquotes += 1
+        urls.update(LINK.findall(line))
+        urls.update(url.rstrip(".,;:") for url in BARE_URL.findall(line))
+        footnotes.update(FOOTNOTE.findall(line))
+        named_sources.update(name.strip("* ").lower() for name in PAREN_CITATION.findall(line))
+        named_sources.update(name.strip("* ").lower() for name in NAMED_SOURCE.findall(line))
+        quotes += len(QUOTED.findall(line))
+        tokens = WORD.findall(LINK.sub(" ", line))
+        words += len(WORD_TOKEN.findall(line))
+        terms.update(token.lower() for token in tokens if token.lower() not in STOPWORDS and len(token) > 2)
+
+    return {
+        "words": words,
+        "headings": headings,
+        "sections": headings["h2"],
+        "list_items": list_items,
+        "links": len(urls),
+        "citations": len(footnotes),
+        "named_sources": len(named_sources),
+        "sources": max(len(urls | named_sources), len(footnotes)),
+        "quotes": quotes + blockquotes,
+        "code_blocks": code_blocks,
+        "keywords": [term for term, _ in terms.most_common(KEYWORD_COUNT)],
+    }
+
+
+def gate_failures(metrics: Dict[str, Any]) -> Dict[str, str]:
+    """Hard requirements the draft misses, mapped to feedback on how to fix them"""
+    failures = {}
+    if metrics["words"] < MIN_WORDS:
+        failures["words"] = (f"The article has {metrics['words']} words; the hard minimum is {MIN_WORDS}. "
+                             f"Expand it by at least {MIN_WORDS - metrics['words']} words of substantive depth, not padding.")
+    if metrics["sources"] < MIN_SOURCES:
+        failures["sources"] = (f"Only {metrics['sources']} distinct sources are cited; at least {MIN_SOURCES} credible, "
+                               f"recent (2020-2024) sources are required. Cite them inline and list them in a references section.")
+    if metrics["quotes"] < MIN_QUOTES:
+        failures["quotes"] = "There are no expert quotes. Add attributed quotes from recognized authorities."
+    if metrics["sections"] < MIN_SECTIONS:
+        failures["sections"] = (f"The article has {metrics['sections']} H2 sections; it needs at least {MIN_SECTIONS} "
+                                f"major sections with clear H2/H3 headings.")
+    return failures
+
+
+def gate_score(failures: Dict[str, str]) -> int:
+    return max(1, min(GATE_MAX_SCORE, 10 - sum(GATE_DEDUCTIONS[name] for name in failures)))
+
+
+def gate_feedback(failures: Dict[str, str]) -> str:
+    lines = ["Automatic check: the draft misses hard requirements, so it was not sent to the editor."]
+    lines += [f"- {message}" for message in failures.values()]
+    return "\n".join(lines)
+
+
+def format_metrics(metrics: Dict[str, Any]) -> str:
+    """Metrics as a prompt block, so the evaluator doesn't have to re-count them"""
+    headings = metrics["headings"]
+    lines: List[str] = [
+        f"- Words: {metrics['words']}",
+        f"- Headings: {headings['h2']} H2, {headings['h3']} H3",
+        f"- Distinct sources (links, named citations or numbered references): {metrics['sources']}",
+        f"- Quotes: {metrics['quotes']}",
+        f"- List items: {metrics['list_items']}",
+        f"- Most frequent keywords: {', '.join(metrics['keywords'])}",
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,347 @@
+"""Generate articles and re-score the stored corpus without going through the HTTP API.
+
+Usage (from the backend directory):
+    python batch_cli.py generate topics.jsonl --concurrency 8 --max-iterations 3
+    python batch_cli.py rescore --concurrency 16 --evaluate-mode sharded
+
+generate reads topics from a JSONL file (one topic string or {"topic": ...,
+<option>: ...} object per line, with the options of POST /generate-article)
+or a CSV file with a topic column (other columns are options). Runs use the
+compiled workflow, the durable checkpointer and the article store of the
+API, so their articles show up in the app like any other.
+
+rescore re-runs only the evaluate step on stored articles, e.g. after a
+rubric change. The article text is left alone; the score, evaluation,
+feedback and metrics are replaced.
+
+Both commands log finished work to a progress file (<input>.progress.jsonl
+and rescore.progress.jsonl by default). Running the same command again skips
+what is done and resumes interrupted generation runs from their last
+checkpoint; --restart ignores the log.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Records re-scored by default: finished runs (paused and failed runs are left to the API)
+RESCORE_STATUSES = ("completed", "needs_improvement")
+
+
+class Progress:
+    """Append-only JSONL log of finished work, keyed so a later run can skip it"""
+
+    def __init__(self, path: str, restart: bool = False):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if restart and os.path.exists(path):
+            os.remove(path)
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # The last line of an interrupted write
+                        continue
+                    self.entries[entry["key"]] = entry
+        self._file = open(path, "a")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def record(self, key: str, **fields: Any):
+        entry = {"key": key, **fields, "at": datetime.now().isoformat()}
+        self.entries[key] = entry
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def read_topics(path: str) -> Iterator[Tuple[int, Any, Optional[str]]]:
+    """(line number, {"topic": ..., options...}, None) for every topic in a JSONL or CSV file.
+
+    A line that isn't valid JSON comes out as (line number, None, error) so it can be logged as invalid.
+    """
+    with open(path, "r", newline="") as f:
+        if path.endswith(".csv"):
+            # Line 1 is the header; empty cells fall back to the defaults
+            for number, row in enumerate(csv.DictReader(f), 2):
+                yield number, {key: value for key, value in row.items() if key and value not in (None, "")}, None
+            return
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, None, f"not valid JSON: {str(e)}"
+                continue
+            yield number, {"topic": item} if isinstance(item, str) else item, None
+
+
+async def run_pool(items: AsyncIterator[Any], handle: Callable[[Any], Awaitable[None]], concurrency: int):
+    """Feed items to `concurrency` workers; the bounded queue keeps huge inputs out of memory"""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def produce():
+        async for item in items:
+            await queue.put(item)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            await handle(item)
+
+    await asyncio.gather(produce(), *[work() for _ in range(concurrency)])
+
+
+async def generate(args) -> Dict[str, int]:
+    import main
+    from checkpoints import thread_config
+    from jobs import Job
+
+    defaults = {key: value for key, value in {
+        "max_iterations": args.max_iterations,
+        "generate_mode": args.generate_mode,
+        "optimize_mode": args.optimize_mode,
+        "evaluate_mode": args.evaluate_mode,
+        "routing_policy": args.routing_policy,
+        "use_cache": False if args.no_cache else None,
+    }.items() if value is not None}
+    batch_id = f"cli-{os.path.splitext(os.path.basename(args.input))[0]}"
+    progress = Progress(args.progress or f"{args.input}.progress.jsonl", args.restart)
+    counts = {"completed": 0, "paused": 0, "failed": 0, "skipped": 0}
+
+    async def topics():
+        for number, item, error in read_topics(args.input):
+            entry = progress.get(f"line:{number}")
+            if entry is not None and entry["status"] in ("completed", "paused", "invalid"):
+                counts["skipped"] += 1
+                continue
+            yield number, item, error, entry
+
+    async def handle(work):
+        number, item, error, entry = work
+        key = f"line:{number}"
+        try:
+            if error is not None:
+                raise ValueError(error)
+            if not isinstance(item, dict):
+                raise ValueError(f"expected a topic string or object, got {type(item).__name__}")
+            item = dict(item)
+            priority = int(item.pop("priority", 0) or 0)
+            request = main.ArticleRequest(**{**defaults, **item})
+            topic = request.topic.strip()
+            if not topic:
+                raise ValueError("topic is empty")
+        except (TypeError, ValueError) as e:
+            print(f"Line {number}: invalid topic: {str(e)}")
+            progress.record(key, status="invalid", error=str(e))
+            counts["failed"] += 1
+            return
+        # A run interrupted earlier keeps its article id, so its checkpoint can be picked up
+        article_id = entry["article_id"] if entry and entry.get("article_id") else str(uuid.uuid4())
+        job = Job("generate", params=main.generation_params(topic, request), article_id=article_id,
+                  batch_id=batch_id, priority=priority)
+        progress.record(key, status="started", topic=topic, article_id=article_id)
+        try:
+            snapshot = await main.workflow.aget_state(thread_config(article_id))
+            if snapshot.next and "human_review" not in snapshot.next:
+                result = await main.run_resume_job(job)
+            else:
+                result = await main.run_generation_job(job)
+        except Exception as e:
+            print(f"Line {number}: {topic!r} failed: {str(e)}")
+            progress.record(key, status="failed", topic=topic, article_id=article_id, error=str(e))
+            counts["failed"] += 1
+            return
+        status = "paused" if result.get("needs_human_feedback") else "completed"
+        progress.record(key, status=status, topic=topic, article_id=article_id, score=result.get("score"))
+        counts[status] += 1
+        print(f"Line {number}: {topic!r} {status} (score {result.get('score')}, {result.get('stop_reason')})")
+
+    await main.start_store()
+    await main.start_workflow()
+    try:
+        await run_pool(topics(), handle, args.concurrency)
+    finally:
+        progress.close()
+        await main.shutdown_jobs()
+    return counts
+
+
+async def rescore(args) -> Dict[str, Any]:
+    import main
+    from checkpoints import is_awaiting_feedback
+    from revisions import expand_history
+    from routing import resolve_policy
+    from telemetry import RunRecorder, current_run
+    from workflow import evaluate_article
+
+    statuses = set(args.status.split(",")) if args.status else set(RESCORE_STATUSES)
+    progress = Progress(args.progress or "rescore.progress.jsonl", args.restart)
+    routing = resolve_policy(args.routing_policy) if args.routing_policy else None
+    counts: Dict[str, Any] = {"rescored": 0, "changed_status": 0, "skipped": 0, "paused": 0, "no_text": 0,
+                              "failed": 0, "cost_usd": 0.0, "previous_score": 0.0, "score": 0.0}
+
+    async def articles():
+        cursor = None
+        seen = 0
+        while True:
+            summaries, cursor = await main.store.list_summaries(limit=500, cursor=cursor)
+            for summary in summaries:
+                if summary.get("status") not in statuses or progress.get(summary["id"]) is not None:
+                    counts["skipped"] += 1
+                    continue
+                if args.limit and seen >= args.limit:
+                    return
+                seen += 1
+                yield summary["id"]
+            if cursor is None:
+                return
+
+    async def handle(article_id: str):
+        record = await main.store.get(article_id)
+        if record is None:
+            # Deleted since it was listed
+            counts["skipped"] += 1
+            return
+        if not record.get("final_article"):
+            counts["no_text"] += 1
+            return
+        # The checkpointer knows whether the run is paused; the run resumes from its own state, not this record
+        if await is_awaiting_feedback(main.workflow, article_id):
+            counts["paused"] += 1
+            return
+        # The stored text is the revision the run returned (its best, not necessarily its last);
+        # the history up to it numbers the re-scored revision like the run did
+        history = expand_history(record.get("article_revisions"))
+        revision = record.get("returned_revision") or len(history)
+        state = {
+            "topic": record["topic"],
+            "article": record["final_article"],
+            "article_history": history[:revision] or [record["final_article"]],
+            "iteration": record.get("iteration", 1),
+            "max_iteration": record.get("max_iteration", 1),
+            "optimize_mode": record.get("optimize_mode", "full"),
+            "evaluate_mode": args.evaluate_mode or record.get("evaluate_mode", "single"),
+            "routing": routing or record.get("routing") or resolve_policy(),
+            "use_cache": not args.no_cache,
+            "batch_id": "cli-rescore",
+        }
+        recorder = RunRecorder()
+        token = current_run.set(recorder)
+        try:
+            update = await evaluate_article(state)
+        except Exception as e:
+            print(f"{article_id}: re-scoring failed: {str(e)}")
+            progress.record(article_id, status="failed", error=str(e))
+            counts["failed"] += 1
+            return
+        finally:
+            current_run.reset(token)
+        previous = {"score": record.get("score"), "status": record.get("status")}
+        record.update({
+            "evaluation": update["evaluation"],
+            "score": update["score"],
+            "feedback": update["feedback"],
+            "human_feedback_requested": update["human_feedback_requested"],
+            "feedback_history": record.get("feedback_history", []) + update["feedback_history"],
+            "metrics": update["metrics"],
+            "evaluate_mode": state["evaluate_mode"],
+            "dimension_scores": update.get("dimension_scores"),
+            "revision_models": record.get("revision_models", []) + update["revision_models"],
+            # The run's scores and stop decision belong to the old rubric; start over from this evaluation
+            # (stop_reason None: a run would keep optimizing this text)
+            "score_history": update["score_history"],
+            "stop_reason": update["stop_reason"],
+            "returned_revision": update["best"]["revision"],
+            "status": "completed" if update["evaluation"] == "approved" else "needs_improvement",
+            "rescored_at": datetime.now().isoformat(),
+        })
+        await main.save_article_to_file(record)
+        cost = recorder.to_dict()["cost_usd"]
+        progress.record(article_id, status="rescored", previous_score=previous["score"], score=record["score"], cost_usd=cost)
+        counts["rescored"] += 1
+        counts["changed_status"] += record["status"] != previous["status"]
+        counts["cost_usd"] += cost
+        counts["previous_score"] += previous["score"] or 0
+        counts["score"] += record["score"]
+        print(f"{article_id}: {previous['score']} -> {record['score']} ({record['status']})")
+
+    await main.start_store()
+    await main.start_workflow()
+    try:
+        await run_pool(articles(), handle, args.concurrency)
+    finally:
+        progress.close()
+        await main.shutdown_jobs()
+    counts["cost_usd"] = round(counts["cost_usd"], 4)
+    for key in ("previous_score", "score"):
+        # Mean over the re-scored articles
+        counts[key] = round(counts[key] / counts["rescored"], 2) if counts["rescored"] else None
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate articles or re-score stored ones without the HTTP API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser("generate", help="Run the workflow for every topic of a JSONL or CSV file")
+    generate_parser.add_argument("input", help="JSONL (topic strings or objects) or CSV file with a topic column")
+    generate_parser.add_argument("--max-iterations", type=int)
+    generate_parser.add_argument("--generate-mode", choices=["single", "sectioned"])
+    generate_parser.add_argument("--optimize-mode", choices=["full", "incremental"])
+
+    rescore_parser = commands.add_parser("rescore", help="Re-run only the evaluate step on stored articles")
+    rescore_parser.add_argument("--status", help=f"Comma-separated statuses to re-score (default: {','.join(RESCORE_STATUSES)})")
+    rescore_parser.add_argument("--limit", type=int, default=0, help="Re-score at most this many articles (0 = all)")
+
+    for command in (generate_parser, rescore_parser):
+        command.add_argument("--concurrency", type=int, default=4, help="Runs (or evaluations) at the same time")
+        command.add_argument("--evaluate-mode", choices=["single", "sharded"])
+        command.add_argument("--routing-policy", choices=["fixed", "tiered"])
+        command.add_argument("--no-cache", action="store_true", help="Skip cached model responses")
+        command.add_argument("--storage", choices=["file", "sqlite"], help="Article storage backend (default: ARTICLE_STORAGE)")
+        command.add_argument("--progress", help="Progress log to write and resume from")
+        command.add_argument("--restart", action="store_true", help="Ignore the progress log and start over")
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    load_dotenv()
+    # The storage and model settings are read when main is imported
+    if args.storage:
+        os.environ["ARTICLE_STORAGE"] = args.storage
+
+    started = time.monotonic()
+    if args.command == "generate":
+        counts = asyncio.run(generate(args))
+        print(f"Generated {counts['completed']} articles ({counts['paused']} paused for review, "
+              f"{counts['failed']} failed, {counts['skipped']} skipped) in {time.monotonic() - started:.1f}s")
+    else:
+        counts = asyncio.run(rescore(args))
+        print(f"Re-scored {counts['rescored']} articles (mean score {counts['previous_score']} -> {counts['score']}, "
+              f"{counts['changed_status']} changed status, "
+              f"{counts['failed']} failed, {counts['paused']} paused for review, {counts['no_text']} without text, "
+              f"{counts['skipped']} skipped, ${counts['cost_usd']}) "
+              f"in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
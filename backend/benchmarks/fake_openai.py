@@ -0,0 +1,246 @@
+"""Local stand-in for the OpenAI chat completions API, for offline benchmarks.
+
+Serves POST /v1/chat/completions (streaming and non-streaming) with
+synthetic Markdown articles, and answers json_schema response formats with
+objects generated from the schema (so ArticleEvaluation/ArticleOutline
+parse). Latency, token rate and error injection are configurable:
+
+    python -m benchmarks.fake_openai --port 8900 --tokens-per-second 400 --ttft-ms 300 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+HEADING_INSTRUCTION = re.compile(r"Start with exactly this heading line: (.+)")
+
+
+@dataclass
+class FakeConfig:
+    # Decode speed; 0 returns every response at once
+    tokens_per_second: float = 2000.0
+    # Time to first token: lognormal around the median, with this sigma
+    ttft_ms: float = 50.0
+    ttft_sigma: float = 0.5
+    # Fraction of requests answered with an HTTP error (429 or 500)
+    error_rate: float = 0.0
+    # Shape of generated articles
+    article_words: int = 3600
+    sections: int = 9
+    # Score returned by structured evaluations
+    score: int = 8
+    seed: Optional[int] = None
+
+
+class FakeOpenAI:
+    """The fake API: an ASGI app plus request/error counters"""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.stats = {"requests": 0, "streamed": 0, "structured": 0, "errors_injected": 0, "completion_tokens": 0}
+        self.app = FastAPI(title="Fake OpenAI")
+        self.app.post("/v1/chat/completions")(self.chat_completions)
+        self.app.post("/chat/completions")(self.chat_completions)
+        self.app.get("/stats")(self.get_stats)
+
+    async def get_stats(self):
+        return {"config": asdict(self.config), **self.stats}
+
+    # Content -------------------------------------------------------------
+
+    def article(self, words: int, sections: int) -> str:
+        per_section = max(words // sections, 20)
+        parts = ["# Benchmark Article\n"]
+        for number in range(1, sections + 1):
+            parts.append(self.section(f"## Section {number}", per_section, number))
+        return "\n".join(parts)
+
+    def section(self, heading: str, words: int, number: int = 1) -> str:
+        filler = " ".join(self.random.choice(LOREM) for _ in range(max(words - 30, 10)))
+        return (
+            f"{heading}\n\n{filler} (Source: Institute {number}, 2024) and (Lab {number}, 2023).\n\n"
+            f"> \"Benchmarks only matter when they are repeatable and cheap to run,\" says Expert {number}.\n\n"
+            f"- First takeaway\n- Second takeaway\n"
+        )
+
+    def from_schema(self, schema: Dict[str, Any], defs: Dict[str, Any], name: str = "") -> Any:
+        if "$ref" in schema:
+            return self.from_schema(defs[schema["$ref"].split("/")[-1]], defs, name)
+        if "anyOf" in schema:
+            options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+            return self.from_schema(options[0], defs, name) if options else None
+        if "enum" in schema:
+            return "needs_improvement" if "needs_improvement" in schema["enum"] else schema["enum"][0]
+        kind = schema.get("type")
+        if kind == "object":
+            return {key: self.from_schema(value, defs, key) for key, value in schema.get("properties", {}).items()}
+        if kind == "array":
+            count = self.config.sections if name == "sections" else 2
+            return [self.from_schema(schema.get("items", {}), defs, name) for _ in range(count)]
+        if kind == "integer":
+            return self.config.score if name == "score" else 1
+        if kind == "number":
+            return float(self.config.score if name == "score" else 1)
+        if kind == "boolean":
+            return False
+        if name == "heading":
+            return f"Section {self.random.randint(1, self.config.sections)}"
+        return " ".join(self.random.choice(LOREM) for _ in range(12))
+
+    def respond(self, body: Dict[str, Any]) -> str:
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            self.stats["structured"] += 1
+            schema = response_format["json_schema"]["schema"]
+            return json.dumps(self.from_schema(schema, schema.get("$defs", {})))
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        match = HEADING_INSTRUCTION.search(prompt)
+        if match:
+            # Section writers and incremental rewrites ask for one section
+            return self.section(match.group(1).strip(), max(self.config.article_words // self.config.sections, 20))
+        return self.article(self.config.article_words, self.config.sections)
+
+    # HTTP ----------------------------------------------------------------
+
+    async def chat_completions(self, request: Request):
+        body = await request.json()
+        self.stats["requests"] += 1
+        config = self.config
+        await asyncio.sleep(self.random.lognormvariate(0, config.ttft_sigma) * config.ttft_ms / 1000)
+        if config.error_rate and self.random.random() < config.error_rate:
+            self.stats["errors_injected"] += 1
+            status = self.random.choice((429, 500))
+            return JSONResponse(status_code=status, content={"error": {
+                "message": "Injected failure", "type": "rate_limit_error" if status == 429 else "server_error",
+            }})
+
+        content = self.respond(body)
+        tokens = content.split(" ")
+        prompt_tokens = sum(len(str(message.get("content", ""))) for message in body.get("messages", [])) // 4
+        self.stats["completion_tokens"] += len(tokens)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens), "total_tokens": prompt_tokens + len(tokens)}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "fake")
+
+        if not body.get("stream"):
+            await self.decode_delay(len(tokens))
+            return {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            }
+
+        self.stats["streamed"] += 1
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+        return StreamingResponse(self.stream(completion_id, model, tokens, usage, include_usage),
+                                 media_type="text/event-stream")
+
+    async def decode_delay(self, tokens: int):
+        if self.config.tokens_per_second > 0:
+            await asyncio.sleep(tokens / self.config.tokens_per_second)
+
+    async def stream(self, completion_id: str, model: str, tokens: List[str], usage: Dict[str, int], include_usage: bool):
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, usage_block=None):
+            payload = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [] if usage_block else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if usage_block:
+                payload["usage"] = usage_block
+            return f"data: {json.dumps(payload)}\n\n"
+
+        yield chunk({"role": "assistant", "content": ""})
+        # Send words in small groups; pacing follows the configured token rate
+        group = 8
+        for start in range(0, len(tokens), group):
+            words = tokens[start:start + group]
+            text = " ".join(words) + (" " if start + group < len(tokens) else "")
+            await self.decode_delay(len(words))
+            yield chunk({"content": text})
+        yield chunk({}, finish_reason="stop")
+        if include_usage:
+            yield chunk({}, usage_block=usage)
+        yield "data: [DONE]\n\n"
+
+
+LOREM = (
+    "research data analysis teams platform latency throughput customers growth insight strategy framework "
+    "evidence model workflow quality results industry adoption practice impact market benchmark scale"
+).split()
+
+
+class FakeServer:
+    """Runs the fake API in a child process, so it doesn't compete with the benchmark for the GIL"""
+
+    def __init__(self, config: FakeConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self.host = host
+        self.port = port or free_port(host)
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self, timeout: float = 30.0) -> "FakeServer":
+        command = [sys.executable, "-m", "benchmarks.fake_openai", "--host", self.host, "--port", str(self.port)]
+        for field, value in asdict(self.config).items():
+            if value is not None:
+                command += [f"--{field.replace('_', '-')}", str(value)]
+        self.process = subprocess.Popen(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("Fake OpenAI server exited during startup")
+            try:
+                self.stats()
+                return self
+            except httpx.HTTPError:
+                time.sleep(0.05)
+        self.stop()
+        raise RuntimeError("Fake OpenAI server did not start in time")
+
+    def stats(self) -> Dict[str, Any]:
+        return httpx.get(f"http://{self.host}:{self.port}/stats", timeout=5).json()
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+
+
+def free_port(host: str) -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible server for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    for field, value in asdict(FakeConfig()).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value) if value is not None else int, default=value)
+    args = parser.parse_args()
+    config = FakeConfig(**{field: getattr(args, field) for field in asdict(FakeConfig())})
+    uvicorn.run(FakeOpenAI(config).app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+"""Offline benchmarks for the workflow and the API, against the fake OpenAI server.
+
+Run from the backend directory:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --compare results.json --max-regression 0.2
+
+Scenarios:
+    graph     workflow runs straight through the compiled graph (runs/sec, per-node overhead)
+    generate  POST /generate-article under concurrency, polling /jobs/{id} until done
+    list      GET /articles pages over a seeded corpus
+    markdown  GET /articles/{id}/markdown over the seeded corpus
+
+Everything runs in one temporary directory, so no articles, caches or
+checkpoints of a real installation are touched. Results are printed (or
+written with --output) as JSON; --compare exits with status 1 when a
+throughput or latency figure regressed by more than --max-regression.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fake_openai import FakeConfig, FakeOpenAI, FakeServer  # noqa: E402
+
+SCENARIOS = ("graph", "generate", "list", "markdown")
+# Graph node -> model role whose calls happen inside it
+NODE_ROLES = {"generate": "generator", "outline": "generator", "write_section": "generator",
+              "evaluate": "evaluator", "optimize": "optimizer"}
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 6)
+
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99),
+            "mean": round(statistics.fmean(ordered), 6), "max": round(ordered[-1], 6)}
+
+
+async def run_concurrently(count: int, concurrency: int, call: Callable[[int], Awaitable[Any]]) -> Dict[str, Any]:
+    """Run call(0..count-1) with bounded concurrency; returns latency stats and throughput"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(index: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call(index)
+            except Exception as e:
+                errors += 1
+                print(f"Benchmark call failed: {str(e)}", file=sys.stderr)
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(index) for index in range(count)])
+    elapsed = time.perf_counter() - started
+    return {
+        "count": count,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 4),
+        "per_second": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "latency_seconds": percentiles(latencies),
+    }
+
+
+async def bench_graph(args, main) -> Dict[str, Any]:
+    from telemetry import RunRecorder, current_run
+    from workflow import compile_workflow
+
+    graph = compile_workflow()
+    recorders: List[RunRecorder] = []
+
+    async def run(index: int):
+        recorder = RunRecorder()
+        token = current_run.set(recorder)
+        try:
+            await graph.ainvoke({
+                "topic": f"Benchmark topic {index}",
+                "iteration": 1,
+                "max_iteration": args.max_iterations,
+                "generate_mode": args.generate_mode,
+                "optimize_mode": args.optimize_mode,
+                "use_cache": False,
+                "human_feedback": "",
+                "human_feedback_history": [],
+            })
+        finally:
+            current_run.reset(token)
+        recorders.append(recorder)
+
+    result = await run_concurrently(args.runs, args.concurrency, run)
+    result["runs_per_second"] = result.pop("per_second")
+
+    nodes: Dict[str, Dict[str, float]] = {}
+    for recorder in recorders:
+        breakdown = recorder.to_dict()
+        for node, values in breakdown["nodes"].items():
+            entry = nodes.setdefault(node, {"calls": 0, "seconds": 0.0})
+            entry["calls"] += values["calls"]
+            entry["seconds"] += values["seconds"]
+        for role, values in breakdown["llm"].items():
+            nodes.setdefault(f"llm:{role}", {"calls": 0, "seconds": 0.0})
+            nodes[f"llm:{role}"]["calls"] += values["calls"]
+            nodes[f"llm:{role}"]["seconds"] += values["seconds"]
+    summary = {}
+    for node, values in nodes.items():
+        if node.startswith("llm:"):
+            continue
+        role_time = nodes.get(f"llm:{NODE_ROLES.get(node, '')}", {"seconds": 0.0, "calls": 0})
+        # Role time is shared by the nodes using that role, so split it by the node's share of calls
+        role_calls = sum(v["calls"] for n, v in nodes.items() if NODE_ROLES.get(n) == NODE_ROLES.get(node)) or 1
+        llm_seconds = role_time["seconds"] * values["calls"] / role_calls if node in NODE_ROLES else 0.0
+        summary[node] = {
+            "calls": values["calls"],
+            "mean_seconds": round(values["seconds"] / values["calls"], 6),
+            "mean_overhead_seconds": round(max(values["seconds"] - llm_seconds, 0.0) / values["calls"], 6),
+        }
+    result["nodes"] = summary
+    return result
+
+
+async def bench_generate(args, main, client) -> Dict[str, Any]:
+    async def run(index: int):
+        response = await client.post("/generate-article", json={
+            "topic": f"API benchmark topic {index}",
+            "max_iterations": args.max_iterations,
+            "generate_mode": args.generate_mode,
+            "optimize_mode": args.optimize_mode,
+            "use_cache": False,
+        })
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+        while True:
+            job = (await client.get(f"/jobs/{job_id}")).json()
+            if job["status"] in ("completed", "failed", "cancelled"):
+                if job["status"] != "completed":
+                    raise RuntimeError(f"job {job_id} {job['status']}: {job.get('error')}")
+                return
+            await asyncio.sleep(args.poll_interval)
+
+    result = await run_concurrently(args.runs, args.api_concurrency, run)
+    result["runs_per_second"] = result.pop("per_second")
+    return result
+
+
+async def seed_corpus(args, main, fake: FakeOpenAI) -> List[str]:
+    """Store synthetic article records directly, bypassing the workflow"""
+    ids: List[str] = []
+    rng = random.Random(args.seed)
+    pending = []
+    for index in range(args.corpus):
+        article_id = f"bench-{index:06d}"
+        text = fake.article(args.corpus_words, fake.config.sections)
+        record = main.build_article_record(article_id, {
+            "topic": f"Corpus topic {index}",
+            "article": text,
+            "evaluation": rng.choice(("approved", "needs_improvement")),
+            "feedback": "Benchmark feedback",
+            "score": rng.randint(3, 10),
+            "iteration": 1,
+            "max_iteration": 1,
+            "article_history": [text],
+            "feedback_history": ["Benchmark feedback"],
+        })
+        pending.append(main.store.save(record))
+        ids.append(article_id)
+        if len(pending) >= 100:
+            await asyncio.gather(*pending)
+            pending = []
+    await asyncio.gather(*pending)
+    return ids
+
+
+async def bench_list(args, main, client) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+
+    async def run(index: int):
+        params: Dict[str, Any] = {"limit": 50}
+        choice = index % 3
+        if choice == 1:
+            params["status"] = "completed"
+        elif choice == 2:
+            params["min_score"] = rng.randint(3, 9)
+        response = await client.get("/articles", params=params)
+        response.raise_for_status()
+        cursor = response.json().get("next_cursor")
+        if cursor and index % 2:
+            # Follow one page of the cursor too
+            (await client.get("/articles", params={**params, "cursor": cursor})).raise_for_status()
+
+    return await run_concurrently(args.requests, args.api_concurrency, run)
+
+
+async def bench_markdown(args, main, client, ids: List[str]) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+
+    async def run(index: int):
+        response = await client.get(f"/articles/{rng.choice(ids)}/markdown")
+        response.raise_for_status()
+
+    return await run_concurrently(args.requests, args.api_concurrency, run)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+async def run_benchmarks(args, fake_server: FakeServer) -> Dict[str, Any]:
+    import httpx
+    import main
+
+    results: Dict[str, Any] = {}
+    await main.start_store()
+    await main.start_workflow()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            if "graph" in args.scenarios:
+                print("Running graph benchmark...", file=sys.stderr)
+                results["graph"] = await bench_graph(args, main)
+            if "generate" in args.scenarios:
+                print("Running /generate-article benchmark...", file=sys.stderr)
+                results["generate"] = await bench_generate(args, main, client)
+            if "list" in args.scenarios or "markdown" in args.scenarios:
+                print(f"Seeding {args.corpus} articles...", file=sys.stderr)
+                started = time.perf_counter()
+                ids = await seed_corpus(args, main, FakeOpenAI(fake_server.config))
+                results["seed"] = {"count": len(ids), "elapsed_seconds": round(time.perf_counter() - started, 4)}
+                if "list" in args.scenarios:
+                    print("Running /articles benchmark...", file=sys.stderr)
+                    results["list"] = await bench_list(args, main, client)
+                if "markdown" in args.scenarios:
+                    print("Running /articles/{id}/markdown benchmark...", file=sys.stderr)
+                    results["markdown"] = await bench_markdown(args, main, client, ids)
+    finally:
+        await main.shutdown_jobs()
+    return results
+
+
+# Metrics compared by --compare: (path, higher_is_better)
+COMPARED_METRICS = (
+    (("graph", "runs_per_second"), True),
+    (("graph", "latency_seconds", "p50"), False),
+    (("graph", "latency_seconds", "p95"), False),
+    (("generate", "runs_per_second"), True),
+    (("generate", "latency_seconds", "p50"), False),
+    (("generate", "latency_seconds", "p95"), False),
+    (("list", "per_second"), True),
+    (("list", "latency_seconds", "p50"), False),
+    (("list", "latency_seconds", "p95"), False),
+    (("markdown", "per_second"), True),
+    (("markdown", "latency_seconds", "p50"), False),
+    (("markdown", "latency_seconds", "p95"), False),
+)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: float) -> Dict[str, Any]:
+    """Relative change of each compared metric; a regression is a change for the worse beyond max_regression"""
+    changes = {}
+    regressions = []
+    for path, higher_is_better in COMPARED_METRICS:
+        old, new = baseline.get("results", {}), current.get("results", {})
+        for key in path:
+            old = old.get(key) if isinstance(old, dict) else None
+            new = new.get(key) if isinstance(new, dict) else None
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        name = ".".join(path)
+        changes[name] = round(change, 4)
+        worse = -change if higher_is_better else change
+        if worse > max_regression:
+            regressions.append(name)
+    return {"baseline_commit": baseline.get("meta", {}).get("git_commit"), "changes": changes,
+            "max_regression": max_regression, "regressions": regressions}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline throughput/latency benchmarks against a fake OpenAI server")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--runs", type=int, default=20, help="Workflow runs for the graph/generate scenarios")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent graph runs")
+    parser.add_argument("--api-concurrency", type=int, default=16, help="Concurrent API clients")
+    parser.add_argument("--requests", type=int, default=500, help="Requests for the list/markdown scenarios")
+    parser.add_argument("--max-iterations", type=int, default=2)
+    parser.add_argument("--generate-mode", choices=("single", "sectioned"), default="single")
+    parser.add_argument("--optimize-mode", choices=("full", "incremental"), default="full")
+    parser.add_argument("--corpus", type=int, default=2000, help="Articles seeded for the list/markdown scenarios")
+    parser.add_argument("--corpus-words", type=int, default=1500)
+    parser.add_argument("--storage", choices=("file", "sqlite"), default="file")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--ttft-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--article-words", type=int, default=3600)
+    parser.add_argument("--score", type=int, default=8, help="Score returned by the fake evaluator")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results to this file instead of stdout")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    fake_config = FakeConfig(tokens_per_second=args.tokens_per_second, ttft_ms=args.ttft_ms,
+                             error_rate=args.error_rate, article_words=args.article_words,
+                             score=args.score, seed=args.seed)
+    fake_server = FakeServer(fake_config).start()
+    workdir = tempfile.mkdtemp(prefix="article-bench-")
+    previous_dir = os.getcwd()
+    # The app reads these at import time, so they are set before importing it
+    os.environ.update({
+        "OPENAI_API_BASE": fake_server.base_url,
+        "OPENAI_API_KEY": "sk-benchmark",
+        "ARTICLE_STORAGE": args.storage,
+        "LLM_CACHE_SIZE": "0",
+        "LLM_CACHE_PATH": "",
+        "OPENAI_RPM_LIMIT": "0",
+        "OPENAI_TPM_LIMIT": "0",
+    })
+    for name in ("ARTICLE_DB_PATH", "ARTICLE_INDEX_PATH", "CHECKPOINT_DB_PATH"):
+        os.environ.pop(name, None)
+    os.chdir(workdir)
+    try:
+        started = time.perf_counter()
+        results = asyncio.run(run_benchmarks(args, fake_server))
+        report = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(),
+                "git_commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "elapsed_seconds": round(time.perf_counter() - started, 3),
+                "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            },
+            "fake_server": fake_server.stats(),
+            "results": results,
+        }
+    finally:
+        os.chdir(previous_dir)
+        fake_server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as f:
+            report["comparison"] = compare(json.load(f), report, args.max_regression)
+        exit_code = 1 if report["comparison"]["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"Benchmark results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
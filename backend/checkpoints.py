@@ -0,0 +1,30 @@
+import os
+from typing import Any, Dict
+
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+# SQLite database holding LangGraph checkpoints. Every uvicorn worker on the host
+# opens the same file, so a paused run can be resumed from any of them.
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", os.path.join("articles", "checkpoints.sqlite3"))
+
+
+async def open_checkpointer(path: str = CHECKPOINT_DB_PATH) -> AsyncSqliteSaver:
+    """Open the durable checkpointer used to pause and resume workflow runs"""
+    conn = await aiosqlite.connect(path)
+    await conn.execute("PRAGMA journal_mode=WAL")
+    await conn.execute("PRAGMA busy_timeout=5000")
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    return saver
+
+
+def thread_config(article_id: str) -> Dict[str, Any]:
+    """Workflow config that ties a run to the checkpoint thread of an article"""
+    return {"configurable": {"thread_id": article_id}}
+
+
+async def is_awaiting_feedback(workflow, article_id: str) -> bool:
+    """Whether the article's run is paused at the human review interrupt"""
+    snapshot = await workflow.aget_state(thread_config(article_id))
+    return "human_review" in snapshot.next
@@ -0,0 +1,105 @@
+import gzip
+import os
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is offered without it
+    brotli = None
+
+# Bodies smaller than this are sent as is
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/markdown", "text/plain", "text/html", "text/css",
+                      "application/javascript")
+
+
+def supported_encodings() -> List[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best supported content coding from an Accept-Encoding header (brotli preferred on ties)"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip().lower()] = quality
+    candidates = [
+        (weights.get(coding, weights.get("*", 0.0)), -index, coding)
+        for index, coding in enumerate(supported_encodings())
+    ]
+    quality, _, coding = max(candidates)
+    return coding if quality > 0 else None
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """Compresses complete JSON/text responses with brotli or gzip, as the client accepts.
+
+    Unlike Starlette's GZipMiddleware, streamed bodies (Server-Sent Events,
+    ZIP exports, file downloads) pass through untouched so events are not
+    held back in the compressor.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        started = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, started
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or started:
+                await send(message)
+                return
+            started = True
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "").split(";")[0].strip()
+            if (message.get("more_body", False) or len(body) < self.minimum_size
+                    or "content-encoding" in headers or content_type not in COMPRESSIBLE_TYPES):
+                await send(start)
+                await send(message)
+                return
+            body = compress(body, coding)
+            headers["Content-Encoding"] = coding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # The encoded bytes differ from the identity representation
+                headers["ETag"] = f"W/{etag}"
+            await send(start)
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
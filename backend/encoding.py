@@ -0,0 +1,28 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+except ImportError:  # orjson is optional; the standard library encoder is used without it
+    orjson = None
+    ORJSONResponse = None
+
+# Response class for the API: orjson when installed (several times faster on large
+# article bodies), otherwise Starlette's compact standard-library encoder
+FastJSONResponse = ORJSONResponse or JSONResponse
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import aiofiles
+
+# Bump when render_markdown changes, so cached artifacts and client ETags are replaced
+EXPORT_FORMAT_VERSION = 1
+EXPORT_FORMATS = ("markdown", "json")
+
+
+def render_markdown(article: Dict[str, Any]) -> str:
+    """The downloadable Markdown document for an article record"""
+    markdown_content = f"""# {article['topic']}
+
+{article['final_article']}
+
+---
+*Generated on: {article['created_at']}*
+*Iterations: {article['iteration']}/{article['max_iteration']}*
+*Status: {article['evaluation']}*
+*Quality Score: {article.get('score', 'N/A')}/10*
+"""
+
+    # Add human feedback if available
+    if article.get('human_feedback_history'):
+        markdown_content += f"\n## Human Feedback History\n\n"
+        for i, feedback in enumerate(article['human_feedback_history'], 1):
+            markdown_content += f"### Iteration {i} Human Feedback\n\n{feedback}\n\n"
+    return markdown_content
+
+
+def download_filename(article: Dict[str, Any]) -> str:
+    return f"{article['topic'].replace(' ', '_')}.md"
+
+
+def make_etag(article_id: str, version: str) -> str:
+    digest = hashlib.sha256(f"{EXPORT_FORMAT_VERSION}:{article_id}:{version}".encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches the current ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+
+class MarkdownExportCache:
+    """Markdown exports rendered once per article version and kept on disk.
+
+    Artifacts are stored as `<id>/<etag>.md`; the version token comes from the
+    article store and changes on every save, so an updated article gets a new
+    artifact (the old one is removed) while repeated downloads of an unchanged
+    article are served from the existing file without touching the record.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # article id -> (etag, download filename) of the artifact on disk
+        self._entries: Dict[str, Tuple[str, str]] = {}
+        # One render at a time per article; kept for the article's lifetime, so every caller shares the same lock
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.stats = {"hits": 0, "renders": 0}
+
+    def path_for(self, article_id: str, etag: str) -> str:
+        return os.path.join(self.directory, article_id, f"{etag.strip(chr(34))}.md")
+
+    def cached(self, article_id: str, etag: str) -> Optional[Tuple[str, str]]:
+        """(path, filename) of the artifact for this ETag if it is already rendered"""
+        entry = self._entries.get(article_id)
+        if entry is None or entry[0] != etag:
+            return None
+        path = self.path_for(article_id, etag)
+        if not os.path.exists(path):
+            return None
+        self.stats["hits"] += 1
+        return path, entry[1]
+
+    async def artifact(self, article_id: str, etag: str, article: Dict[str, Any]) -> Tuple[str, str]:
+        """Return (path, filename) for the article's export, rendering it if this version has none"""
+        cached = self.cached(article_id, etag)
+        if cached is not None:
+            return cached
+        async with self._locks.setdefault(article_id, asyncio.Lock()):
+            path = self.path_for(article_id, etag)
+            filename = download_filename(article)
+            # After a restart the artifact may already be on disk; only the filename was missing
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+                os.close(fd)
+                try:
+                    async with aiofiles.open(tmp_path, 'w') as f:
+                        await f.write(render_markdown(article))
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+                self.stats["renders"] += 1
+            else:
+                self.stats["hits"] += 1
+            previous = self._entries.get(article_id)
+            self._entries[article_id] = (etag, filename)
+            # The previous version's artifact stays until the next update: a request that looked it up
+            # just before this render may still be about to serve it
+            keep = {path} | ({self.path_for(article_id, previous[0])} if previous else set())
+            self._remove_stale(article_id, keep)
+        return path, filename
+
+    async def read(self, article_id: str, etag: str, article: Dict[str, Any]) -> str:
+        path, _ = await self.artifact(article_id, etag, article)
+        async with aiofiles.open(path, 'r') as f:
+            return await f.read()
+
+    def invalidate(self, article_id: str):
+        """Drop every artifact of an article (e.g. when it is deleted)"""
+        self._entries.pop(article_id, None)
+        lock = self._locks.get(article_id)
+        if lock is not None and not lock.locked():
+            self._locks.pop(article_id)
+        shutil.rmtree(os.path.join(self.directory, article_id), ignore_errors=True)
+
+    def _remove_stale(self, article_id: str, keep: Set[str]):
+        for entry in os.scandir(os.path.join(self.directory, article_id)):
+            if entry.path not in keep and not entry.name.endswith(".tmp"):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"artifacts": len(self._entries), **self.stats}
+
+
+class _ZipSink:
+    """Write-only file object that hands over what zipfile has written so far"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def stream_zip(
+    article_ids: Iterable[str],
+    load: Callable[[str], Awaitable[Optional[Tuple[Dict[str, Any], str]]]],
+    markdown: Callable[[str, str, Dict[str, Any]], Awaitable[str]],
+    view: Callable[[Dict[str, Any]], Dict[str, Any]],
+    formats: Iterable[str] = ("markdown",),
+) -> AsyncIterator[bytes]:
+    """Yield a ZIP archive of articles piece by piece.
+
+    Only one article is held in memory at a time: each entry is compressed
+    and its bytes are yielded before the next record is loaded. `load`
+    returns (record, etag) or None for a missing article; a manifest.json
+    listing the exported and missing ids closes the archive.
+    """
+    formats = [fmt for fmt in EXPORT_FORMATS if fmt in set(formats)]
+    sink = _ZipSink()
+    manifest: Dict[str, Any] = {"exported_at": datetime.now().isoformat(), "articles": [], "missing": []}
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for article_id in article_ids:
+            loaded = await load(article_id)
+            if loaded is None:
+                manifest["missing"].append(article_id)
+                continue
+            article, etag = loaded
+            files = []
+            if "markdown" in formats:
+                files.append((f"{article_id}.md", await markdown(article_id, etag, article)))
+            if "json" in formats:
+                files.append((f"{article_id}.json", json.dumps(view(article), indent=2)))
+            for name, content in files:
+                archive.writestr(name, content)
+            manifest["articles"].append({
+                "id": article_id,
+                "topic": article.get("topic"),
+                "status": article.get("status"),
+                "score": article.get("score"),
+                "files": [name for name, _ in files],
+            })
+            yield sink.drain()
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    yield sink.drain()
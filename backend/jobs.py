@@ -0,0 +1,301 @@
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from scheduler import INTERACTIVE_LANE, FairQueue
+
+# Maximum number of workflow runs executing at the same time in this process
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "24"))
+# How long finished jobs are kept around for status queries (seconds)
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+
+class Job:
+    """A single unit of background work tracked by the JobManager"""
+
+    def __init__(self, kind: str, params: Optional[Dict[str, Any]] = None, article_id: Optional[str] = None,
+                 batch_id: Optional[str] = None, priority: int = 0):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.params = params or {}
+        self.article_id = article_id
+        # Jobs of a batch share a scheduling lane; everything else is interactive
+        self.batch_id = batch_id
+        self.priority = priority
+        self.status = JOB_QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.finished_monotonic: Optional[float] = None
+        # Identical requests attached to this job (see JobManager.attach); cancelling needs all of them to let go
+        self.requesters = 1
+        self.coalesce_key: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        # Progress events that late subscribers can replay (token events are live-only)
+        self.events: List[Dict[str, Any]] = []
+        self._subscribers: List[asyncio.Queue] = []
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def lane(self) -> str:
+        return self.batch_id or INTERACTIVE_LANE
+
+    async def wait(self) -> Any:
+        """Wait for the job to finish without cancelling it if the caller goes away"""
+        if self.task is not None:
+            try:
+                await asyncio.shield(self.task)
+            except asyncio.CancelledError:
+                if not self.task.cancelled():
+                    raise
+        return self.result
+
+    def publish(self, event: str, data: Optional[Dict[str, Any]] = None, replay: bool = True):
+        """Send a progress event to every subscriber of this job"""
+        message = {"event": event, "data": data or {}}
+        if replay:
+            self.events.append(message)
+        for queue in self._subscribers:
+            queue.put_nowait(message)
+
+    async def subscribe(self, heartbeat: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield past and live progress events until the job finishes.
+
+        If heartbeat is set, a "ping" event is yielded whenever nothing happened
+        for that many seconds so proxies keep the connection open.
+        """
+        backlog = list(self.events)
+        if self.done:
+            for message in backlog:
+                yield message
+            return
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        try:
+            for message in backlog:
+                yield message
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield {"event": "ping", "data": {}}
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            self._subscribers.remove(queue)
+
+    def _finish(self, status: str):
+        self.status = status
+        self.finished_at = datetime.now().isoformat()
+        self.finished_monotonic = time.monotonic()
+        self.publish("done", {"status": status, "article_id": self.article_id, "error": self.error})
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "article_id": self.article_id,
+            "batch_id": self.batch_id,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "requesters": self.requesters,
+            "result": self.result,
+        }
+
+
+class JobManager:
+    """Runs coroutines as background jobs with a bounded level of concurrency.
+
+    Free slots go to interactive jobs first, then to batches in turn (see FairQueue).
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_JOBS, retention_seconds: int = JOB_RETENTION_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.retention_seconds = retention_seconds
+        self.jobs: Dict[str, Job] = {}
+        self._running = 0
+        self._waiting = FairQueue()
+        # coalesce key -> unfinished job started for it
+        self._in_flight: Dict[str, Job] = {}
+        # Idempotency-Key -> (coalesce key of the request it was first sent with, job id)
+        self._idempotency_keys: Dict[str, Tuple[str, str]] = {}
+
+    def submit(self, kind: str, runner: Callable[[Job], Awaitable[Any]],
+               params: Optional[Dict[str, Any]] = None, article_id: Optional[str] = None,
+               batch_id: Optional[str] = None, priority: int = 0, coalesce_key: Optional[str] = None,
+               idempotency_key: Optional[str] = None) -> Job:
+        """Register a job and schedule it on the running event loop.
+
+        A `coalesce_key` lets identical requests that arrive while the job is
+        unfinished attach to it instead of starting their own (see attach).
+        """
+        self._prune()
+        job = Job(kind, params=params, article_id=article_id, batch_id=batch_id, priority=priority)
+        self.jobs[job.id] = job
+        if coalesce_key is not None:
+            job.coalesce_key = coalesce_key
+            self._in_flight[coalesce_key] = job
+            if idempotency_key is not None:
+                self._idempotency_keys[idempotency_key] = (coalesce_key, job.id)
+        job.task = asyncio.create_task(self._run(job, runner))
+        job.task.add_done_callback(lambda task: self._on_task_done(job, task))
+        return job
+
+    def attach(self, coalesce_key: str, idempotency_key: Optional[str] = None) -> Optional[Job]:
+        """The existing job an identical request should share, if any (singleflight).
+
+        A repeated Idempotency-Key gets the job it was first sent with for as
+        long as that job is retained, finished or not; otherwise the request
+        joins an unfinished job with the same coalesce key. Raises ValueError
+        if the Idempotency-Key was first sent with a different request.
+        """
+        self._prune()
+        if idempotency_key is not None:
+            entry = self._idempotency_keys.get(idempotency_key)
+            if entry is not None:
+                if entry[0] != coalesce_key:
+                    raise ValueError("Idempotency-Key was already used for a different request")
+                job = self.jobs.get(entry[1])
+                if job is not None:
+                    return job
+        job = self._in_flight.get(coalesce_key)
+        if job is None or job.done:
+            return None
+        job.requesters += 1
+        if idempotency_key is not None:
+            self._idempotency_keys[idempotency_key] = (coalesce_key, job.id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def list(self, status: Optional[str] = None) -> List[Job]:
+        self._prune()
+        jobs = [job for job in self.jobs.values() if status is None or job.status == status]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def batch(self, batch_id: str) -> List[Job]:
+        """Jobs of a batch in submission order"""
+        return sorted((job for job in self.jobs.values() if job.batch_id == batch_id), key=lambda job: job.created_at)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. Returns False if it already finished."""
+        job = self.jobs.get(job_id)
+        if job is None or job.done or job.task is None:
+            return False
+        if job.requesters > 1:
+            # Other identical requests still wait for this run; only this one lets go
+            job.requesters -= 1
+            return True
+        job.task.cancel()
+        return True
+
+    @property
+    def active_count(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == JOB_RUNNING)
+
+    def waiting_lanes(self) -> Dict[str, int]:
+        """Jobs waiting for a slot, per scheduling lane"""
+        return self._waiting.lane_sizes()
+
+    @property
+    def queued_count(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == JOB_QUEUED)
+
+    async def shutdown(self):
+        """Cancel every unfinished job and wait for them to unwind"""
+        tasks = [job.task for job in self.jobs.values() if job.task is not None and not job.done]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _acquire_slot(self, job: Job):
+        if self._running < self.max_concurrency and not len(self._waiting):
+            self._running += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.push(job.lane, job.priority, future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before the cancellation
+                self._release_slot()
+            else:
+                self._waiting.remove(future)
+            raise
+
+    def _release_slot(self):
+        while len(self._waiting):
+            future = self._waiting.pop()
+            if not future.done():
+                # Hand the slot straight to the next waiter
+                future.set_result(None)
+                return
+        self._running -= 1
+
+    async def _run(self, job: Job, runner: Callable[[Job], Awaitable[Any]]):
+        try:
+            await self._acquire_slot(job)
+            try:
+                job.status = JOB_RUNNING
+                job.started_at = datetime.now().isoformat()
+                job.publish("status", {"status": JOB_RUNNING})
+                job.result = await runner(job)
+            finally:
+                self._release_slot()
+            job._finish(JOB_COMPLETED)
+        except asyncio.CancelledError:
+            job._finish(JOB_CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            print(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job._finish(JOB_FAILED)
+
+    def _on_task_done(self, job: Job, task: asyncio.Task):
+        if job.coalesce_key is not None and self._in_flight.get(job.coalesce_key) is job:
+            del self._in_flight[job.coalesce_key]
+        # A job cancelled before it was scheduled never enters _run
+        if task.cancelled() and not job.done:
+            job._finish(JOB_CANCELLED)
+
+    def _prune(self):
+        """Forget finished jobs older than the retention window"""
+        cutoff = time.monotonic() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished_monotonic is not None and job.finished_monotonic < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+        if expired:
+            expired_ids = set(expired)
+            self._idempotency_keys = {
+                key: entry for key, entry in self._idempotency_keys.items() if entry[1] not in expired_ids
+            }
@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+
+# In-memory LRU tier (number of responses); 0 disables caching entirely
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+# Optional SQLite tier shared across restarts and workers (unset = memory only)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_DISK_ENTRIES = int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "5000"))
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at);
+"""
+
+
+def model_identity(model) -> Dict[str, Any]:
+    """The settings of a chat model that change its output"""
+    return {
+        "model": getattr(model, "model_name", None) or type(model).__name__,
+        "temperature": getattr(model, "temperature", None),
+    }
+
+
+def cache_key(model, messages: Sequence[Any], schema: Optional[type] = None) -> str:
+    """Content address of a model call: model settings, output schema and the prompt messages"""
+    payload = {
+        **model_identity(model),
+        "schema": schema.__name__ if schema is not None else None,
+        "messages": [[message.type, message.content] for message in messages],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Two-tier response cache: an LRU dict in front of an optional SQLite table.
+
+    Disk entries expire after `ttl` seconds and the least recently used ones are
+    evicted once the table holds more than `max_disk_entries` rows.
+    """
+
+    def __init__(self, max_entries: int = LLM_CACHE_SIZE, path: str = LLM_CACHE_PATH,
+                 ttl: float = LLM_CACHE_TTL_SECONDS, max_disk_entries: int = LLM_CACHE_MAX_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0}
+        self._lock = threading.Lock()
+        self._conn = None
+        if path and max_entries > 0:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._lock:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.executescript(CACHE_SCHEMA)
+                self._conn.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _remember(self, key: str, value: str):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return value
+        if self._conn is not None:
+            value = await asyncio.to_thread(self._disk_get, key)
+            if value is not None:
+                self._remember(key, value)
+                self.stats["disk_hits"] += 1
+                return value
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, key: str, value: str):
+        self._remember(key, value)
+        if self._conn is not None:
+            await asyncio.to_thread(self._disk_put, key, value)
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def _disk_put(self, key: str, value: str):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+            # Size bound: drop the least recently used rows beyond the limit
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+
+    def disk_entries(self) -> int:
+        if self._conn is None:
+            return 0
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def clear(self):
+        self._memory.clear()
+        if self._conn is not None:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM llm_cache")
+
+    def to_dict(self) -> Dict[str, Any]:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": self.disk_entries(),
+            "enabled": self.enabled,
+        }
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
@@ -1,13 +1,15 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-import aiofiles
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import asyncio
+import hashlib
 import os
 import json
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Optional, Set, Union
+from pydantic import BaseModel, Field
 import uuid
 from dotenv import load_dotenv
 
@@ -15,9 +17,28 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import the workflow from the notebook
-from workflow import workflow
+from workflow import compile_workflow, llm_cache
+from models import models
+from telemetry import JOBS_ACTIVE, JOBS_COALESCED, JOBS_QUEUED, LLM_CALLS_WAITING, RunRecorder, current_run, record_run_end, span
+from langgraph.types import Command
+from checkpoints import is_awaiting_feedback, open_checkpointer, thread_config
+from revisions import compact_history, expand_history, get_revision, revision_count
+from jobs import Job, JobManager, JOB_COMPLETED
+from streaming import SSE_HEARTBEAT_SECONDS, sse_stream, stream_workflow
+from storage import create_store
+from search_index import build_match_query
+from article_index import summarize_article
+from similarity import (REUSE_MIN_SCORE, SIMILAR_TOPIC_REUSE, SIMILARITY_RETURN_THRESHOLD,
+                        SIMILARITY_SEED_THRESHOLD, SimilarityIndex)
+from stopping import default_budget
+from resilience import resilience
+from providers import provider_pool
+from routing import ModelTier, RoutingStep, resolve_policy
+from exports import MarkdownExportCache, etag_matches, make_etag, stream_zip
+from encoding import FastJSONResponse
+from compression import CompressionMiddleware
 
-app = FastAPI(title="Article Generation API", version="1.0.0")
+app = FastAPI(title="Article Generation API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # CORS middleware for React frontend
 app.add_middleware(
@@ -28,14 +49,71 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# brotli/gzip for large JSON and text bodies (streams are left alone)
+app.add_middleware(CompressionMiddleware)
+
 # Create articles directory if it doesn't exist
 ARTICLES_DIR = "articles"
 os.makedirs(ARTICLES_DIR, exist_ok=True)
 
+# Article persistence (JSON files or SQLite, see ARTICLE_STORAGE)
+store = create_store(ARTICLES_DIR)
+
+# Markdown downloads, rendered once per article version
+markdown_exports = MarkdownExportCache(os.path.join(ARTICLES_DIR, "exports"))
+
+# Topics (and titles) of stored articles, for reusing them on near-duplicate requests
+similarity = SimilarityIndex()
+
+# Largest number of topics accepted in one batch
+MAX_BATCH_TOPICS = 500
+# Largest number of article ids accepted in one bulk export
+MAX_EXPORT_ARTICLES = 5000
+
+# Server-wide early stopping and budget settings (see stopping.py)
+STOPPING_DEFAULTS = default_budget()
+
 # Pydantic models for API
-class ArticleRequest(BaseModel):
-    topic: str
+class GenerationOptions(BaseModel):
     max_iterations: int = 5
+    # "sectioned" plans an outline and writes the sections of the first draft in parallel
+    generate_mode: Literal["single", "sectioned"] = "single"
+    # False forces fresh model responses instead of reusing cached ones
+    use_cache: bool = True
+    # "incremental" rewrites only the sections the evaluator flags instead of the whole article
+    optimize_mode: Literal["full", "incremental"] = "full"
+    # "sharded" scores each rubric dimension in its own, smaller concurrent call
+    evaluate_mode: Literal["single", "sharded"] = "single"
+    # False always generates from scratch, even when a stored article covers a near-identical topic
+    reuse_existing: bool = True
+    # False keeps optimizing through score plateaus until max_iterations
+    early_stopping: bool = STOPPING_DEFAULTS["early_stopping"]
+    # Per-request caps; the run stops before a round that would overrun them (None = unlimited)
+    deadline_seconds: Optional[float] = Field(STOPPING_DEFAULTS["deadline_seconds"], gt=0)
+    max_tokens: Optional[int] = Field(STOPPING_DEFAULTS["max_tokens"], gt=0)
+    max_cost_usd: Optional[float] = Field(STOPPING_DEFAULTS["max_cost_usd"], gt=0)
+    # Model tiers per step: "fixed" uses the configured models, "tiered" starts cheap and escalates (None = ROUTING_POLICY)
+    routing_policy: Optional[Literal["fixed", "tiered"]] = None
+    # Per-step tier overrides on top of the policy, e.g. {"evaluate": "strong", "plateau": null}
+    routing_tiers: Optional[Dict[RoutingStep, Optional[ModelTier]]] = None
+
+class ArticleRequest(GenerationOptions):
+    topic: str
+
+class BatchTopic(BaseModel):
+    topic: str
+    priority: Optional[int] = None
+
+class BatchRequest(GenerationOptions):
+    topics: List[Union[str, BatchTopic]] = Field(..., min_length=1, max_length=MAX_BATCH_TOPICS)
+    # Default priority inside the batch; higher runs first
+    priority: int = 0
+
+class ExportRequest(BaseModel):
+    # Either explicit article ids or every completed article of a batch
+    ids: Optional[List[str]] = Field(None, max_length=MAX_EXPORT_ARTICLES)
+    batch_id: Optional[str] = None
+    formats: List[Literal["markdown", "json"]] = ["markdown"]
 
 class HumanFeedbackRequest(BaseModel):
     feedback: str
@@ -51,246 +129,707 @@ class ArticleResponse(BaseModel):
     human_feedback_requested: bool
     iteration: int
     max_iteration: int
-    article_history: List[str]
+    generate_mode: str = "single"
+    optimize_mode: str = "full"
+    evaluate_mode: str = "single"
+    # Research, depth, writing, SEO and engagement scores of a sharded evaluation
+    dimension_scores: Optional[Dict[str, int]] = None
+    metrics: Optional[dict] = None
+    timings: Optional[dict] = None
+    article_history: Optional[List[str]] = None
+    revision_count: int = 0
     feedback_history: List[str]
     human_feedback_history: List[str]
     created_at: str
     status: str
     needs_human_feedback: bool = False
+    # Id of the stored article on a similar topic the run started from
+    seeded_from: Optional[str] = None
+    # Why optimization stopped: approved, max_iterations, plateau, regression, deadline, token_budget, cost_budget
+    stop_reason: Optional[str] = None
+    # Set when the run failed (status "failed"); POST /articles/{id}/resume continues it
+    error: Optional[str] = None
+    # Revision returned as final_article (the best-scoring one, not necessarily the last)
+    returned_revision: Optional[int] = None
+    score_history: List[int] = []
+    # Routing policy of the run and the model each step used, per revision
+    routing: Optional[dict] = None
+    revision_models: List[dict] = []
+    # When the stored text was last re-scored by `batch_cli.py rescore`
+    rescored_at: Optional[str] = None
 
 class ArticleListResponse(BaseModel):
     articles: List[dict]
+    next_cursor: Optional[str] = None
 
-# In-memory storage for running jobs and pending human feedback
-running_jobs = {}
-pending_human_feedback = {}
+class ArticleSearchResponse(BaseModel):
+    query: str
+    articles: List[dict]
+    next_offset: Optional[int] = None
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    article_id: Optional[str] = None
+    batch_id: Optional[str] = None
+    priority: int = 0
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    # Identical requests sharing this job
+    requesters: int = 1
+    # The article (see ArticleResponse), narrowed by the fields/exclude query parameters
+    result: Optional[Dict[str, Any]] = None
+
+class BatchJobSummary(BaseModel):
+    job_id: str
+    topic: str
+    priority: int
+    status: str
+    article_id: Optional[str] = None
+    score: Optional[int] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    batch_id: str
+    total: int
+    counts: Dict[str, int]
+    progress: float
+    done: bool
+    jobs: List[BatchJobSummary]
+
+class JobListResponse(BaseModel):
+    jobs: List[JobResponse]
+    active: int
+    queued: int
+    max_concurrency: int
+
+# Background workflow runs. Paused runs waiting for human feedback live in the
+# durable checkpointer (keyed by article id), not in process memory.
+jobs = JobManager()
+checkpointer = None
+workflow = None
+
+# Gauges read at scrape time
+JOBS_ACTIVE.set_function(lambda: jobs.active_count)
+JOBS_QUEUED.set_function(lambda: jobs.queued_count)
+LLM_CALLS_WAITING.set_function(provider_pool.waiting)
 
 @app.get("/")
 async def root():
     return {"message": "Article Generation API"}
 
-@app.post("/generate-article", response_model=ArticleResponse)
-async def generate_article(request: ArticleRequest, background_tasks: BackgroundTasks):
-    """Generate an article using the LangGraph workflow"""
+@app.on_event("startup")
+async def start_store():
+    """Prepare article storage (syncs the metadata index with the files on disk)"""
+    await store.startup()
+    if SIMILAR_TOPIC_REUSE:
+        cursor = None
+        while True:
+            summaries, cursor = await store.list_summaries(limit=500, cursor=cursor)
+            for summary in summaries:
+                similarity.add(summary)
+            if cursor is None:
+                break
+
+@app.on_event("startup")
+async def start_workflow():
+    """Compile the workflow against the durable checkpointer"""
+    global checkpointer, workflow
+    checkpointer = await open_checkpointer()
+    workflow = compile_workflow(checkpointer)
+
+@app.on_event("startup")
+async def warm_up_models():
+    """Build the model clients in the background so neither startup nor the first article waits for them"""
+    asyncio.get_running_loop().run_in_executor(None, models.warm_up)
+
+@app.on_event("shutdown")
+async def shutdown_jobs():
+    """Cancel in-flight workflow runs when the server stops"""
+    await jobs.shutdown()
+    store.close()
+    llm_cache.close()
+    await models.aclose()
+    if checkpointer is not None:
+        await checkpointer.conn.close()
+
+def build_article_record(article_id: str, result: dict, needs_human_feedback: bool = False) -> dict:
+    """Turn a final workflow state into the stored article record"""
+    history = compact_history(result.get("article_history"))
+    return {
+        "id": article_id,
+        "topic": result["topic"],
+        "final_article": result["article"],
+        "evaluation": result.get("evaluation", ""),
+        "feedback": result.get("feedback", ""),
+        "score": result.get("score", 0),
+        "human_feedback_requested": result.get("human_feedback_requested", False),
+        "iteration": result["iteration"],
+        "max_iteration": result["max_iteration"],
+        "generate_mode": result.get("generate_mode", "single"),
+        "optimize_mode": result.get("optimize_mode", "full"),
+        "evaluate_mode": result.get("evaluate_mode", "single"),
+        "dimension_scores": result.get("dimension_scores"),
+        "metrics": result.get("metrics", {}),
+        "article_revisions": history,
+        "revision_count": revision_count(history),
+        "feedback_history": result.get("feedback_history", []),
+        "human_feedback_history": result.get("human_feedback_history", []),
+        "created_at": datetime.now().isoformat(),
+        "status": "completed" if result.get("evaluation") == "approved" else "needs_improvement",
+        "needs_human_feedback": needs_human_feedback,
+        "seeded_from": result.get("seeded_from"),
+        "stop_reason": result.get("stop_reason"),
+        "returned_revision": result.get("returned_revision"),
+        "score_history": result.get("score_history", []),
+        "routing": result.get("routing"),
+        "revision_models": result.get("revision_models", [])
+    }
+
+class Projection:
+    """The `fields` and `exclude` query parameters (comma-separated field names) of article endpoints"""
+
+    def __init__(
+        self,
+        fields: Optional[str] = Query(None, description="Only return these fields (comma-separated)"),
+        exclude: Optional[str] = Query(None, description="Leave out these fields (comma-separated)"),
+    ):
+        self.fields = self._split(fields) if fields else None
+        self.exclude = self._split(exclude) if exclude else set()
+
+    @staticmethod
+    def _split(value: str) -> Set[str]:
+        return {name.strip() for name in value.split(",") if name.strip()}
+
+    def wants(self, field: str) -> bool:
+        return (self.fields is None or field in self.fields) and field not in self.exclude
+
+    def apply(self, data: dict) -> dict:
+        if self.fields is None and not self.exclude:
+            return data
+        return {key: value for key, value in data.items() if key == "id" or self.wants(key)}
+
+# No projection: the full representation
+FULL_VIEW = Projection(None, None)
+
+def article_view(record: dict, include_history: bool = False, projection: Projection = FULL_VIEW) -> dict:
+    """API representation of a stored record; full-text history is only rebuilt on request"""
+    article = {key: value for key, value in record.items() if key not in ("article_revisions", "article_history")}
+    # Older records carry the full-text article_history list instead of compact revisions
+    history = record.get("article_revisions") or record.get("article_history")
+    article["revision_count"] = revision_count(history)
+    if include_history or (projection.fields is not None and "article_history" in projection.fields):
+        article["article_history"] = expand_history(history)
+    return projection.apply(article)
+
+def job_response(job: Job, projection: Projection = FULL_VIEW) -> JobResponse:
+    data = job.to_dict()
+    if data["result"] is not None:
+        data["result"] = projection.apply(data["result"])
+    return JobResponse(**data)
+
+async def finish_run(article_id: str, result: dict, timings: Optional[dict] = None) -> dict:
+    """Persist the outcome of a run that either finished or paused for human review"""
+    needs_human_feedback = await is_awaiting_feedback(workflow, article_id)
+    if not needs_human_feedback:
+        # The run reached END, so its checkpoints are no longer needed
+        await checkpointer.adelete_thread(article_id)
+    record_run_end("paused" if needs_human_feedback else "completed", result.get("iteration"))
+    
+    record = build_article_record(article_id, result, needs_human_feedback)
+    record["timings"] = timings
+    await save_article_to_file(record)
+    return article_view(record)
+
+async def run_workflow(job: Job, workflow_input, timings: Optional[dict] = None) -> dict:
+    """Stream a run for a job and persist it with its per-node timing and token breakdown"""
+    recorder = RunRecorder(timings)
+    token = current_run.set(recorder)
     try:
-        # Create initial state
-        initial_state = {
-            "topic": request.topic,
-            "iteration": 1,
-            "max_iteration": request.max_iterations,
-            "human_feedback": "",
-            "human_feedback_history": []
-        }
-        
-        # Run the workflow
-        result = workflow.invoke(initial_state)
-        
-        # Generate unique ID for the article
-        article_id = str(uuid.uuid4())
-        
-        # Check if human feedback is needed
-        needs_human_feedback = (
-            result.get("human_feedback_requested", False) and 
-            result.get("evaluation") != "approved" and
-            result.get("score", 0) < 7
-        )
-        
-        # Create response
-        article_response = ArticleResponse(
-            id=article_id,
-            topic=result["topic"],
-            final_article=result["article"],
-            evaluation=result["evaluation"],
-            feedback=result["feedback"],
-            score=result.get("score", 0),
-            human_feedback_requested=result.get("human_feedback_requested", False),
-            iteration=result["iteration"],
-            max_iteration=result["max_iteration"],
-            article_history=result["article_history"],
-            feedback_history=result["feedback_history"],
-            human_feedback_history=result.get("human_feedback_history", []),
-            created_at=datetime.now().isoformat(),
-            status="completed" if result.get("evaluation") == "approved" else "needs_improvement",
-            needs_human_feedback=needs_human_feedback
-        )
-        
-        # If human feedback is needed, store the current state
-        if needs_human_feedback:
-            pending_human_feedback[article_id] = {
-                "state": result,
-                "topic": request.topic,
-                "max_iterations": request.max_iterations
-            }
-        
-        # Save article to file
-        background_tasks.add_task(save_article_to_file, article_response)
-        
-        return article_response
+        with span("article.run", article_id=job.article_id, kind=job.kind, batch_id=job.batch_id):
+            # Run the workflow without blocking the event loop, streaming progress to subscribers
+            result = await stream_workflow(workflow, workflow_input, job.publish, thread_config(job.article_id))
+    except Exception as e:
+        await save_failed_run(job.article_id, e, recorder.to_dict())
+        raise
+    finally:
+        current_run.reset(token)
+    return await finish_run(job.article_id, result, recorder.to_dict())
+
+async def save_failed_run(article_id: str, error: Exception, timings: dict):
+    """Keep the last checkpointed draft of a failed run; its checkpoint stays so the run can be resumed"""
+    try:
+        values = (await workflow.aget_state(thread_config(article_id))).values
+        if not values.get("article"):
+            return
+        record_run_end("failed", values.get("iteration"))
+        record = build_article_record(article_id, values)
+        record.update({"status": "failed", "error": str(error), "timings": timings})
+        await save_article_to_file(record)
+    except Exception as e:
+        print(f"Error saving failed run: {str(e)}")
+
+async def run_generation_job(job: Job) -> dict:
+    """Run the workflow for a new article and persist the result"""
+    initial_state = {
+        "topic": job.params["topic"],
+        "iteration": 1,
+        "max_iteration": job.params["max_iterations"],
+        "use_cache": job.params.get("use_cache", True),
+        "generate_mode": job.params.get("generate_mode", "single"),
+        "optimize_mode": job.params.get("optimize_mode", "full"),
+        "evaluate_mode": job.params.get("evaluate_mode", "single"),
+        "budget": job.params.get("budget") or STOPPING_DEFAULTS,
+        "routing": job.params.get("routing") or resolve_policy(),
+        "human_feedback": "",
+        "human_feedback_history": []
+    }
+    if job.batch_id:
+        initial_state["batch_id"] = job.batch_id
+        initial_state["priority"] = job.priority
+    seed = await store.get(job.params["seed_article_id"]) if job.params.get("seed_article_id") else None
+    if seed is not None and seed.get("final_article"):
+        # Start from the stored draft: the run's first step retargets it to the new topic
+        initial_state["article"] = seed["final_article"]
+        initial_state["article_history"] = [seed["final_article"]]
+        initial_state["seeded_from"] = seed["id"]
+        initial_state["seeded_topic"] = seed["topic"]
+    return await run_workflow(job, initial_state)
+
+async def run_reuse_job(job: Job) -> dict:
+    """Return a stored article whose topic is a near-duplicate of the requested one"""
+    record = await store.get(job.article_id)
+    if record is None:
+        # Deleted since the lookup; generate after all
+        job.article_id = str(uuid.uuid4())
+        return await run_generation_job(job)
+    return {**article_view(record), "reused_for": {"topic": job.params["topic"], "similarity": job.params["similarity"]}}
+
+async def run_resume_job(job: Job) -> dict:
+    """Continue a failed run from its last checkpoint (the node that failed runs again)"""
+    previous = await store.get(job.article_id)
+    return await run_workflow(job, None, (previous or {}).get("timings"))
+
+async def run_feedback_job(job: Job) -> dict:
+    """Resume a paused run from the human review step with the supplied feedback"""
+    resume = Command(resume=job.params["feedback"])
+    # Keep adding to the breakdown of the run that paused
+    previous = await store.get(job.article_id)
+    return await run_workflow(job, resume, (previous or {}).get("timings"))
+
+def get_job_or_404(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def event_stream_response(job: Job, include_job_event: bool = False) -> StreamingResponse:
+    """Serve a job's progress events as Server-Sent Events"""
+    async def events():
+        if include_job_event:
+            yield {"event": "job", "data": {"job_id": job.id, "article_id": job.article_id}}
+        async for message in job.subscribe(heartbeat=SSE_HEARTBEAT_SECONDS):
+            yield message
+    
+    return StreamingResponse(
+        sse_stream(events()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def find_similar_article(topic: str) -> Optional[tuple]:
+    """The best-scoring stored article whose topic is close enough to reuse, as (summary, similarity)"""
+    matches = similarity.query(topic, limit=1, min_score=REUSE_MIN_SCORE)
+    if not matches or matches[0][1] < SIMILARITY_SEED_THRESHOLD:
+        return None
+    return matches[0]
+
+def request_fingerprint(topic: str, options: GenerationOptions) -> str:
+    """Coalescing key of a generation request: the normalized topic and every generation option"""
+    request = {**options.model_dump(exclude={"topic"}), "topic": " ".join(topic.casefold().split())}
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+def generation_params(topic: str, options: GenerationOptions) -> dict:
+    """Job parameters of a generation run (read by run_generation_job)"""
+    return {"topic": topic, "max_iterations": options.max_iterations,
+            "generate_mode": options.generate_mode, "optimize_mode": options.optimize_mode,
+            "evaluate_mode": options.evaluate_mode, "use_cache": options.use_cache,
+            "budget": {"early_stopping": options.early_stopping, "deadline_seconds": options.deadline_seconds,
+                       "max_tokens": options.max_tokens, "max_cost_usd": options.max_cost_usd},
+            "routing": resolve_policy(options.routing_policy, options.routing_tiers)}
+
+def submit_generation(topic: str, options: GenerationOptions, batch_id: Optional[str] = None, priority: int = 0,
+                      idempotency_key: Optional[str] = None) -> Job:
+    # Identical interactive requests share one run (batch jobs are tracked per batch, so they always run)
+    coalesce_key = None if batch_id else request_fingerprint(topic, options)
+    if coalesce_key is not None:
+        job = jobs.attach(coalesce_key, idempotency_key)
+        if job is not None:
+            JOBS_COALESCED.inc()
+            return job
+    params = generation_params(topic, options)
+    match = find_similar_article(topic) if SIMILAR_TOPIC_REUSE and options.reuse_existing else None
+    if match is not None:
+        summary, score = match
+        params["similarity"] = score
+        if score >= SIMILARITY_RETURN_THRESHOLD and summary.get("status") == "completed":
+            return jobs.submit("reuse", run_reuse_job, params=params, article_id=summary["id"],
+                               batch_id=batch_id, priority=priority, coalesce_key=coalesce_key,
+                               idempotency_key=idempotency_key)
+        params["seed_article_id"] = summary["id"]
+    return jobs.submit(
+        "generate",
+        run_generation_job,
+        params=params,
+        article_id=str(uuid.uuid4()),
+        batch_id=batch_id,
+        priority=priority,
+        coalesce_key=coalesce_key,
+        idempotency_key=idempotency_key
+    )
+
+def batch_view(batch_id: str, batch_jobs: List[Job]) -> BatchResponse:
+    """Per-batch progress: job counts by status and the outcome of each topic"""
+    counts: Dict[str, int] = {}
+    for job in batch_jobs:
+        counts[job.status] = counts.get(job.status, 0) + 1
+    finished = sum(1 for job in batch_jobs if job.done)
+    return BatchResponse(
+        batch_id=batch_id,
+        total=len(batch_jobs),
+        counts=counts,
+        progress=round(finished / len(batch_jobs), 4),
+        done=finished == len(batch_jobs),
+        jobs=[
+            BatchJobSummary(
+                job_id=job.id,
+                topic=job.params["topic"],
+                priority=job.priority,
+                status=job.status,
+                article_id=job.article_id,
+                score=(job.result or {}).get("score"),
+                error=job.error
+            )
+            for job in batch_jobs
+        ]
+    )
+
+def get_batch_or_404(batch_id: str) -> List[Job]:
+    batch_jobs = jobs.batch(batch_id)
+    if not batch_jobs:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch_jobs
+
+@app.post("/generate-article", response_model=JobResponse, status_code=202)
+async def generate_article(request: ArticleRequest, idempotency_key: Optional[str] = Header(None)):
+    """Start generating an article in the background and return the job tracking it (identical requests share a job)"""
+    try:
+        job = submit_generation(request.topic, request, idempotency_key=idempotency_key)
+        return job_response(job)
         
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating article: {str(e)}")
 
+@app.post("/generate-article/stream")
+async def generate_article_stream(request: ArticleRequest, idempotency_key: Optional[str] = Header(None)):
+    """Start generating an article and stream its progress as Server-Sent Events"""
+    try:
+        job = submit_generation(request.topic, request, idempotency_key=idempotency_key)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating article: {str(e)}")
+    return event_stream_response(job, include_job_event=True)
+
+@app.post("/batches", response_model=BatchResponse, status_code=202)
+async def create_batch(request: BatchRequest):
+    """Queue one generation job per topic; batches share the model rate limit fairly with interactive requests"""
+    try:
+        batch_id = str(uuid.uuid4())
+        batch_jobs = []
+        for item in request.topics:
+            if isinstance(item, str):
+                item = BatchTopic(topic=item)
+            priority = request.priority if item.priority is None else item.priority
+            batch_jobs.append(submit_generation(item.topic, request, batch_id=batch_id, priority=priority))
+        return batch_view(batch_id, batch_jobs)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating batch: {str(e)}")
+
+@app.get("/batches/{batch_id}", response_model=BatchResponse)
+async def get_batch(batch_id: str):
+    """Get the progress of a batch and the status of each of its topics"""
+    return batch_view(batch_id, get_batch_or_404(batch_id))
+
+@app.delete("/batches/{batch_id}", response_model=BatchResponse)
+async def cancel_batch(batch_id: str):
+    """Cancel every unfinished job of a batch"""
+    batch_jobs = get_batch_or_404(batch_id)
+    cancelled = [job for job in batch_jobs if jobs.cancel(job.id)]
+    for job in cancelled:
+        await job.wait()
+    return batch_view(batch_id, batch_jobs)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: node and model latency, tokens, cost, iterations, queue depth"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/model-health")
+async def get_model_health():
+    """Circuit breaker state per model, retry/hedge counters, timeouts and recent p95 latency per role"""
+    return resilience.to_dict()
+
+@app.get("/rate-limit")
+async def get_rate_limit():
+    """Model rate-limit budget over all provider endpoints, waiting calls per lane and queued jobs per lane"""
+    return {**provider_pool.rate_limits(), "queued_jobs": jobs.waiting_lanes()}
+
+@app.get("/providers")
+async def get_providers():
+    """Provider endpoints with their load, ejection state, call counts and rate limits"""
+    return provider_pool.to_dict()
+
+@app.get("/jobs", response_model=JobListResponse)
+async def list_jobs(status: Optional[str] = None, projection: Projection = Depends()):
+    """List known jobs, newest first (fields/exclude narrow the article results)"""
+    return JobListResponse(
+        jobs=[job_response(job, projection) for job in jobs.list(status)],
+        active=jobs.active_count,
+        queued=jobs.queued_count,
+        max_concurrency=jobs.max_concurrency
+    )
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, projection: Projection = Depends()):
+    """Get the status (and result, once finished) of a job"""
+    return job_response(get_job_or_404(job_id), projection)
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream node transitions, per-iteration scores and article tokens for a job (SSE)"""
+    return event_stream_response(get_job_or_404(job_id))
+
+@app.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job (a job shared by identical requests keeps running for the others)"""
+    job = get_job_or_404(job_id)
+    shared = job.requesters > 1
+    if not jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    if not shared:
+        await job.wait()
+    return job_response(job)
+
+@app.get("/llm-cache")
+async def get_llm_cache_stats():
+    """Hit/miss counters and size of the model response cache"""
+    return llm_cache.to_dict()
+
+@app.delete("/llm-cache")
+async def clear_llm_cache():
+    """Drop every cached model response"""
+    try:
+        llm_cache.clear()
+        return {"message": "LLM cache cleared"}
+    except Exception as e:
+        print(f"Error clearing LLM cache: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error clearing LLM cache: {str(e)}")
+
 @app.post("/articles/{article_id}/human-feedback")
-async def provide_human_feedback(article_id: str, feedback_request: HumanFeedbackRequest):
+async def provide_human_feedback(article_id: str, feedback_request: HumanFeedbackRequest,
+                                 projection: Projection = Depends()):
     """Provide human feedback and continue the workflow"""
     try:
-        if article_id not in pending_human_feedback:
+        if not await is_awaiting_feedback(workflow, article_id):
             raise HTTPException(status_code=404, detail="Article not found or no human feedback needed")
-        
-        # Get the current state
-        current_state = pending_human_feedback[article_id]["state"]
-        topic = pending_human_feedback[article_id]["topic"]
-        max_iterations = pending_human_feedback[article_id]["max_iterations"]
-        
-        # Add human feedback to the state
-        current_state["human_feedback"] = feedback_request.feedback
-        current_state["human_feedback_history"] = current_state.get("human_feedback_history", []) + [feedback_request.feedback]
+        if any(job.article_id == article_id and not job.done for job in jobs.list()):
+            raise HTTPException(status_code=409, detail="Human feedback is already being processed for this article")
         
         if feedback_request.continue_workflow:
-            # Continue the workflow from the current state
-            result = workflow.invoke(current_state)
-            
-            # Update the article
-            needs_human_feedback = (
-                result.get("human_feedback_requested", False) and 
-                result.get("evaluation") != "approved" and
-                result.get("score", 0) < 7
+            # Resume the paused run as a job so it shares the concurrency limit
+            job = jobs.submit(
+                "human-feedback",
+                run_feedback_job,
+                params={"feedback": feedback_request.feedback},
+                article_id=article_id
             )
+            await job.wait()
+            if job.status != JOB_COMPLETED:
+                raise HTTPException(status_code=500, detail=f"Error processing human feedback: {job.error or job.status}")
             
-            # Update the stored state if more feedback is needed
-            if needs_human_feedback:
-                pending_human_feedback[article_id]["state"] = result
-            else:
-                # Remove from pending feedback if workflow is complete
-                del pending_human_feedback[article_id]
+            return projection.apply(job.result)
+        else:
+            # Just save the human feedback without continuing
+            # Load existing article
+            article_data = await store.get(article_id)
+            if article_data is None:
+                raise HTTPException(status_code=404, detail="Article not found")
             
-            # Update the article file
-            updated_article = ArticleResponse(
-                id=article_id,
-                topic=result["topic"],
-                final_article=result["article"],
-                evaluation=result["evaluation"],
-                feedback=result["feedback"],
-                score=result.get("score", 0),
-                human_feedback_requested=result.get("human_feedback_requested", False),
-                iteration=result["iteration"],
-                max_iteration=result["max_iteration"],
-                article_history=result["article_history"],
-                feedback_history=result["feedback_history"],
-                human_feedback_history=result.get("human_feedback_history", []),
-                created_at=datetime.now().isoformat(),
-                status="completed" if result.get("evaluation") == "approved" else "needs_improvement",
-                needs_human_feedback=needs_human_feedback
-            )
+            # Update with human feedback
+            article_data["human_feedback_history"] = article_data.get("human_feedback_history", []) + [feedback_request.feedback]
+            article_data["needs_human_feedback"] = False
+            article_data["status"] = "human_feedback_provided"
             
             # Save updated article
-            await save_article_to_file(updated_article)
+            await store.save(article_data)
             
-            return updated_article
-        else:
-            # Just save the human feedback without continuing
-            # Load existing article
-            filepath = os.path.join(ARTICLES_DIR, f"{article_id}.json")
-            if os.path.exists(filepath):
-                async with aiofiles.open(filepath, 'r') as f:
-                    content = await f.read()
-                    article_data = json.loads(content)
-                
-                # Update with human feedback
-                article_data["human_feedback_history"] = current_state.get("human_feedback_history", [])
-                article_data["needs_human_feedback"] = False
-                article_data["status"] = "human_feedback_provided"
-                
-                # Save updated article
-                async with aiofiles.open(filepath, 'w') as f:
-                    await f.write(json.dumps(article_data, indent=2))
-                
-                # Remove from pending feedback
-                del pending_human_feedback[article_id]
-                
-                return article_data
+            # The run won't be resumed, so drop its paused state
+            await checkpointer.adelete_thread(article_id)
+            
+            return article_view(article_data, projection=projection)
             
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing human feedback: {str(e)}")
 
+@app.post("/articles/{article_id}/resume", response_model=JobResponse, status_code=202)
+async def resume_article(article_id: str):
+    """Continue a run that failed part-way from its last completed step"""
+    try:
+        snapshot = await workflow.aget_state(thread_config(article_id))
+        if not snapshot.next:
+            raise HTTPException(status_code=404, detail="Article not found or no failed run to resume")
+        if "human_review" in snapshot.next:
+            raise HTTPException(status_code=409, detail="The run is waiting for human feedback")
+        if any(job.article_id == article_id and not job.done for job in jobs.list()):
+            raise HTTPException(status_code=409, detail="The run is already in progress")
+        job = jobs.submit("resume", run_resume_job, article_id=article_id)
+        return job_response(job)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error resuming article: {str(e)}")
+
 @app.get("/articles/{article_id}/needs-feedback")
 async def check_needs_feedback(article_id: str):
     """Check if an article needs human feedback"""
+    snapshot = await workflow.aget_state(thread_config(article_id))
+    needs_feedback = "human_review" in snapshot.next
     return {
-        "needs_feedback": article_id in pending_human_feedback,
-        "current_state": pending_human_feedback.get(article_id, {})
+        "needs_feedback": needs_feedback,
+        "current_state": snapshot.values if needs_feedback else {}
     }
 
 @app.get("/articles", response_model=ArticleListResponse)
-async def list_articles():
-    """List all saved articles"""
+async def list_articles(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    projection: Projection = Depends()
+):
+    """List article summaries from the storage index, newest first, one page at a time"""
     try:
-        articles = []
-        if os.path.exists(ARTICLES_DIR):
-            for filename in os.listdir(ARTICLES_DIR):
-                if filename.endswith('.json'):
-                    try:
-                        filepath = os.path.join(ARTICLES_DIR, filename)
-                        async with aiofiles.open(filepath, 'r') as f:
-                            content = await f.read()
-                            article_data = json.loads(content)
-                                                    # Check if this article needs human feedback
-                        article_id = filename.replace('.json', '')
-                        # Check if score < 7 and not approved, or if it's in pending feedback
-                        needs_feedback = (
-                            (article_data.get('score', 0) < 7 and article_data.get('evaluation') != 'approved') or
-                            article_id in pending_human_feedback
-                        )
-                        article_data["needs_human_feedback"] = needs_feedback
-                        articles.append(article_data)
-                    except Exception as e:
-                        print(f"Error reading article file {filename}: {str(e)}")
-                        continue
-        
-        # Sort by creation date (newest first)
-        articles.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        
-        return ArticleListResponse(articles=articles)
+        articles, next_cursor = await store.list_summaries(
+            limit=limit, cursor=cursor, status=status, min_score=min_score, max_score=max_score
+        )
+        return ArticleListResponse(articles=[projection.apply(article) for article in articles], next_cursor=next_cursor)
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error in list_articles: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error listing articles: {str(e)}")
 
+@app.get("/articles/search", response_model=ArticleSearchResponse)
+async def search_articles(
+    q: str = Query(..., min_length=1, description='Terms, "quoted phrases", prefix* and OR'),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    status: Optional[str] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    projection: Projection = Depends()
+):
+    """Full-text search over topics, article text and feedback, best match first, with highlighted snippets"""
+    try:
+        match = build_match_query(q)
+        articles, next_offset = await store.search(
+            match, limit=limit, offset=offset, status=status, min_score=min_score, max_score=max_score
+        )
+        return ArticleSearchResponse(
+            query=q, articles=[projection.apply(article) for article in articles], next_offset=next_offset
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error in search_articles: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error searching articles: {str(e)}")
+
 @app.get("/articles/{article_id}")
-async def get_article(article_id: str):
-    """Get a specific article by ID"""
+async def get_article(article_id: str, include_history: bool = False, projection: Projection = Depends()):
+    """Get a specific article by ID (pass include_history=true for every revision's full text)"""
     try:
-        filepath = os.path.join(ARTICLES_DIR, f"{article_id}.json")
-        if not os.path.exists(filepath):
+        article_data = await store.get(article_id)
+        if article_data is None:
             raise HTTPException(status_code=404, detail="Article not found")
         
-        async with aiofiles.open(filepath, 'r') as f:
-            content = await f.read()
-            article_data = json.loads(content)
-            # Check if this article needs human feedback
-            article_data["needs_human_feedback"] = article_id in pending_human_feedback
-            return article_data
+        # Check if this article needs human feedback
+        if projection.wants("needs_human_feedback"):
+            article_data["needs_human_feedback"] = await is_awaiting_feedback(workflow, article_id)
+        return article_view(article_data, include_history, projection)
             
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving article: {str(e)}")
 
+@app.get("/articles/{article_id}/revisions")
+async def list_article_revisions(article_id: str):
+    """Get how many revisions an article went through"""
+    article_data = await store.get(article_id)
+    if article_data is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    history = article_data.get("article_revisions") or article_data.get("article_history")
+    return {"article_id": article_id, "revision_count": revision_count(history)}
+
+@app.get("/articles/{article_id}/history/{kind}")
+async def get_article_history(article_id: str, kind: Literal["article", "feedback", "human_feedback"]):
+    """One history list of an article: every revision's full text, evaluator feedback or editor feedback"""
+    article_data = await store.get(article_id)
+    if article_data is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    if kind == "article":
+        entries = expand_history(article_data.get("article_revisions") or article_data.get("article_history"))
+    else:
+        entries = article_data.get(f"{kind}_history", [])
+    return {"article_id": article_id, "kind": kind, "entries": entries}
+
+@app.get("/articles/{article_id}/revisions/{number}")
+async def get_article_revision(article_id: str, number: int):
+    """Reconstruct the full text of one revision (1 = first draft)"""
+    article_data = await store.get(article_id)
+    if article_data is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    history = article_data.get("article_revisions") or article_data.get("article_history")
+    try:
+        content = get_revision(history, number)
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"article_id": article_id, "revision": number, "content": content}
+
 @app.delete("/articles/{article_id}")
 async def delete_article(article_id: str):
     """Delete an article by ID"""
     try:
-        filepath = os.path.join(ARTICLES_DIR, f"{article_id}.json")
-        if not os.path.exists(filepath):
+        if not await store.delete(article_id):
             raise HTTPException(status_code=404, detail="Article not found")
+        markdown_exports.invalidate(article_id)
+        similarity.remove(article_id)
         
-        os.remove(filepath)
-        
-        # Remove from pending feedback if exists
-        if article_id in pending_human_feedback:
-            del pending_human_feedback[article_id]
+        # Remove any paused run for the article
+        await checkpointer.adelete_thread(article_id)
         
         return {"message": "Article deleted successfully"}
         
@@ -300,57 +839,68 @@ async def delete_article(article_id: str):
         raise HTTPException(status_code=500, detail=f"Error deleting article: {str(e)}")
 
 @app.get("/articles/{article_id}/markdown")
-async def get_article_markdown(article_id: str):
-    """Get the article content as markdown file"""
+async def get_article_markdown(article_id: str, if_none_match: Optional[str] = Header(None)):
+    """Get the article content as markdown file (rendered once per article version, supports If-None-Match)"""
     try:
-        filepath = os.path.join(ARTICLES_DIR, f"{article_id}.json")
-        if not os.path.exists(filepath):
+        version = await store.version(article_id)
+        if version is None:
             raise HTTPException(status_code=404, detail="Article not found")
-        
-        async with aiofiles.open(filepath, 'r') as f:
-            content = await f.read()
-            article_data = json.loads(content)
-            
-        # Create markdown content
-        markdown_content = f"""# {article_data['topic']}
-
-{article_data['final_article']}
+        etag = make_etag(article_id, version)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
 
----
-*Generated on: {article_data['created_at']}*
-*Iterations: {article_data['iteration']}/{article_data['max_iteration']}*
-*Status: {article_data['evaluation']}*
-*Quality Score: {article_data.get('score', 'N/A')}/10*
-"""
-        
-        # Add human feedback if available
-        if article_data.get('human_feedback_history'):
-            markdown_content += f"\n## Human Feedback History\n\n"
-            for i, feedback in enumerate(article_data['human_feedback_history'], 1):
-                markdown_content += f"### Iteration {i} Human Feedback\n\n{feedback}\n\n"
-        
-        # Save markdown file
-        markdown_filepath = os.path.join(ARTICLES_DIR, f"{article_id}.md")
-        async with aiofiles.open(markdown_filepath, 'w') as f:
-            await f.write(markdown_content)
+        artifact = markdown_exports.cached(article_id, etag)
+        if artifact is None:
+            article_data = await store.get(article_id)
+            if article_data is None:
+                raise HTTPException(status_code=404, detail="Article not found")
+            artifact = await markdown_exports.artifact(article_id, etag, article_data)
+        path, filename = artifact
         
-        return FileResponse(
-            markdown_filepath,
-            media_type='text/markdown',
-            filename=f"{article_data['topic'].replace(' ', '_')}.md"
-        )
+        return FileResponse(path, media_type='text/markdown', filename=filename, headers=headers)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating markdown: {str(e)}")
 
-async def save_article_to_file(article: ArticleResponse):
-    """Save article to JSON file"""
+async def load_for_export(article_id: str):
+    """An article record with the ETag of its current version, or None if it doesn't exist"""
+    version = await store.version(article_id)
+    if version is None:
+        return None
+    article_data = await store.get(article_id)
+    return (article_data, make_etag(article_id, version)) if article_data is not None else None
+
+@app.post("/articles/export")
+async def export_articles(request: ExportRequest):
+    """Stream a ZIP of many articles (Markdown and/or JSON) without building it in memory"""
+    if request.batch_id is not None:
+        batch_jobs = get_batch_or_404(request.batch_id)
+        article_ids = [job.article_id for job in batch_jobs if job.status == JOB_COMPLETED and job.article_id]
+    elif request.ids:
+        article_ids = list(dict.fromkeys(request.ids))
+    else:
+        raise HTTPException(status_code=400, detail="Provide ids or batch_id")
+    if not request.formats:
+        raise HTTPException(status_code=400, detail="Provide at least one format")
+
+    filename = f"articles-{request.batch_id or datetime.now().strftime('%Y%m%d-%H%M%S')}.zip"
+    return StreamingResponse(
+        stream_zip(article_ids, load_for_export, markdown_exports.read, article_view, request.formats),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+async def save_article_to_file(article: dict):
+    """Save an article record through the configured storage backend"""
     try:
-        filepath = os.path.join(ARTICLES_DIR, f"{article.id}.json")
-        async with aiofiles.open(filepath, 'w') as f:
-            await f.write(json.dumps(article.model_dump(), indent=2))
+        await store.save(article)
+        # The new version gets its own export; drop the artifacts of the old one
+        markdown_exports.invalidate(article["id"])
+        if SIMILAR_TOPIC_REUSE:
+            similarity.add(summarize_article(article))
     except Exception as e:
         print(f"Error saving article: {str(e)}")
 
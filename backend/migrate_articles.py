@@ -0,0 +1,63 @@
+"""Import the JSON article files into the SQLite article store.
+
+Usage (from the backend directory):
+    python migrate_articles.py --source articles --db articles/articles.sqlite3
+
+Re-running is safe: existing articles are updated and only new history
+entries are appended. Afterwards start the API with ARTICLE_STORAGE=sqlite.
+"""
+import argparse
+import json
+import os
+import time
+
+from storage import SQLiteStore
+
+BATCH_SIZE = 200
+
+
+def iter_article_files(source_dir: str):
+    for entry in sorted(os.scandir(source_dir), key=lambda entry: entry.name):
+        if entry.is_file() and entry.name.endswith(".json"):
+            yield entry
+
+
+def migrate(source_dir: str, db_path: str) -> dict:
+    store = SQLiteStore(db_path)
+    imported = skipped = 0
+    batch = []
+    try:
+        for entry in iter_article_files(source_dir):
+            try:
+                with open(entry.path, "r") as f:
+                    article = json.load(f)
+                article.setdefault("id", entry.name[:-len(".json")])
+            except Exception as e:
+                print(f"Skipping {entry.name}: {str(e)}")
+                skipped += 1
+                continue
+            batch.append(article)
+            if len(batch) >= BATCH_SIZE:
+                imported += store.save_many(batch)
+                batch = []
+        if batch:
+            imported += store.save_many(batch)
+    finally:
+        store.close()
+    return {"imported": imported, "skipped": skipped}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import JSON article files into the SQLite article store")
+    parser.add_argument("--source", default="articles", help="Directory containing <id>.json article files")
+    parser.add_argument("--db", default=os.path.join("articles", "articles.sqlite3"), help="SQLite database to write")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    stats = migrate(args.source, args.db)
+    print(f"Imported {stats['imported']} articles ({stats['skipped']} skipped) into {args.db} "
+          f"in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
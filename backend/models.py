@@ -0,0 +1,132 @@
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from providers import Endpoint, provider_pool
+
+# Default chat model for every role; OPENAI_<ROLE>_MODEL overrides a single role
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+# Keep-alive pool shared by all model clients
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "600"))
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Settings per role. The article writers stream so progress can be pushed to
+# clients token by token; stream_usage reports token usage for streamed calls
+# too, which the rate limiter settles against.
+ROLES: Dict[str, Dict[str, Any]] = {
+    "generator": {"temperature": 0.7, "streaming": True, "stream_usage": True},
+    "evaluator": {"temperature": 0.3},
+    "optimizer": {"temperature": 0.6, "streaming": True, "stream_usage": True},
+}
+
+
+def role_model_name(role: str) -> str:
+    return os.getenv(f"OPENAI_{role.upper()}_MODEL", OPENAI_MODEL)
+
+
+class ModelRegistry:
+    """Builds the chat models on first use and shares one HTTP connection pool between them.
+
+    There is one model per role, model name (see routing.py) and provider
+    endpoint (see providers.py).
+    Importing this module doesn't import the OpenAI SDK; the first call to
+    get() does.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[Tuple[str, str, str], Any] = {}
+        self._structured: Dict[Tuple[str, str, str, type], Any] = {}
+        # Models set() for a role, used on every endpoint
+        self._overrides: Dict[str, Any] = {}
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+
+    def _http_options(self) -> Dict[str, Any]:
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "limits": httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+            "timeout": httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=10.0),
+        }
+
+    def _build(self, role: str, model_name: str, endpoint: Endpoint):
+        from langchain_openai import ChatOpenAI
+
+        if self._http_client is None:
+            self._http_client = httpx.Client(**self._http_options())
+            self._http_async_client = httpx.AsyncClient(**self._http_options())
+        # Without an api_key the SDK reads OPENAI_API_KEY
+        key = {"api_key": endpoint.api_key} if endpoint.api_key else {}
+        return ChatOpenAI(
+            model=model_name,
+            base_url=endpoint.base_url,
+            **key,
+            http_client=self._http_client,
+            http_async_client=self._http_async_client,
+            # Retries, timeouts and backoff are handled per call in resilience.py
+            max_retries=0,
+            **ROLES[role],
+        )
+
+    def get(self, role: str, endpoint: Optional[Endpoint] = None, model_name: Optional[str] = None):
+        """The chat model for a role ("generator", "evaluator" or "optimizer").
+
+        `endpoint` defaults to the pool's first one and `model_name` to the
+        role's configured model.
+        """
+        if role in self._overrides:
+            return self._overrides[role]
+        endpoint = endpoint or provider_pool.default
+        model_name = model_name or role_model_name(role)
+        key = (role, model_name, endpoint.name)
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = self._models[key] = self._build(role, model_name, endpoint)
+        return model
+
+    def structured(self, role: str, schema: type, endpoint: Optional[Endpoint] = None, model_name: Optional[str] = None):
+        """The role's model wrapped to return {"raw", "parsed", "parsing_error"} for `schema`"""
+        key = (role, model_name or role_model_name(role), (endpoint or provider_pool.default).name, schema)
+        runnable = self._structured.get(key)
+        if runnable is None:
+            # include_raw keeps the raw message, whose usage metadata is needed for token accounting
+            runnable = self._structured[key] = self.get(role, endpoint, model_name).with_structured_output(schema, include_raw=True)
+        return runnable
+
+    def set(self, role: str, model: Any):
+        """Replace the model for a role on every endpoint (e.g. a fake in local experiments)"""
+        self._overrides[role] = model
+        self._structured = {key: value for key, value in self._structured.items() if key[0] != role}
+
+    def warm_up(self):
+        """Build every role's client (configured model) on every endpoint ahead of the first request"""
+        for endpoint in provider_pool.endpoints:
+            for role in ROLES:
+                self.get(role, endpoint)
+
+    async def aclose(self):
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+        if self._http_client is not None:
+            self._http_client.close()
+        self._http_client = None
+        self._http_async_client = None
+        self._models.clear()
+        self._structured.clear()
+        self._overrides.clear()
+
+
+models = ModelRegistry()
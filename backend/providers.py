@@ -0,0 +1,212 @@
+"""Pool of OpenAI-compatible endpoints (API keys and/or base URLs) that model calls are spread over.
+
+OPENAI_ENDPOINTS configures the pool as a JSON list, for example
+
+    [{"name": "main", "api_key_env": "OPENAI_API_KEY", "weight": 2, "rpm_limit": 500, "tpm_limit": 200000},
+     {"name": "second", "api_key_env": "OPENAI_API_KEY_2", "rpm_limit": 500, "tpm_limit": 200000},
+     {"name": "proxy", "base_url": "https://llm-proxy.internal/v1", "api_key": "sk-...", "rpm_limit": 300}]
+
+Without it the pool is the single endpoint given by OPENAI_API_KEY,
+OPENAI_API_BASE and OPENAI_RPM_LIMIT / OPENAI_TPM_LIMIT.
+
+Every endpoint has its own rate limiter and a circuit breaker that ejects
+it from the pool after repeated errors, or right away on a 429, until it
+has cooled down.
+"""
+import asyncio
+import itertools
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from resilience import CircuitBreaker, CircuitOpenError, is_retryable, retry_after
+from scheduler import INTERACTIVE_LANE, OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT, RateLimiter
+from telemetry import LLM_ENDPOINT_CALLS, LLM_ENDPOINT_EJECTED
+
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE") or None
+# JSON list of endpoints: name, base_url, api_key or api_key_env, weight, rpm_limit, tpm_limit
+OPENAI_ENDPOINTS = os.getenv("OPENAI_ENDPOINTS", "")
+# "least_loaded" (fewest calls in flight per unit of weight) or "round_robin" (smooth weighted)
+PROVIDER_SELECTION = os.getenv("PROVIDER_SELECTION", "least_loaded")
+# Consecutive transient errors that eject an endpoint, and for how long (a 429's Retry-After wins when given)
+ENDPOINT_EJECT_FAILURES = int(os.getenv("ENDPOINT_EJECT_FAILURES", "3"))
+ENDPOINT_EJECT_SECONDS = float(os.getenv("ENDPOINT_EJECT_SECONDS", "30"))
+
+
+class Endpoint:
+    """One API key / base URL with its own rate limits and ejection state"""
+
+    def __init__(self, name: str, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 weight: float = 1.0, rpm_limit: int = 0, tpm_limit: int = 0):
+        if weight <= 0:
+            raise ValueError(f"Endpoint {name}: weight must be positive")
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.weight = weight
+        self.limiter = RateLimiter(rpm_limit, tpm_limit)
+        self.breaker = CircuitBreaker(name, ENDPOINT_EJECT_FAILURES, ENDPOINT_EJECT_SECONDS, gauge=LLM_ENDPOINT_EJECTED)
+        # Calls routed here that haven't finished, including ones waiting for its rate limit
+        self.active = 0
+        self.current_weight = 0.0
+        self.stats = {"calls": 0, "errors": 0, "rate_limited": 0}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "base_url": self.base_url,
+            "weight": self.weight,
+            "active": self.active,
+            "state": "ejected" if self.breaker.state == "open" else self.breaker.state,
+            "retry_in": round(self.breaker.retry_in(), 1),
+            **self.stats,
+            "rate_limit": self.limiter.to_dict(),
+        }
+
+
+def load_endpoints(config: str = OPENAI_ENDPOINTS) -> List[Endpoint]:
+    if not config.strip():
+        return [Endpoint("default", OPENAI_API_BASE, None, 1.0, OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT)]
+    try:
+        entries = json.loads(config)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"OPENAI_ENDPOINTS is not valid JSON: {e}") from e
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("OPENAI_ENDPOINTS must be a non-empty JSON list")
+    endpoints = []
+    for number, entry in enumerate(entries, 1):
+        name = entry.get("name") or f"endpoint-{number}"
+        api_key = entry.get("api_key")
+        if not api_key and entry.get("api_key_env"):
+            api_key = os.getenv(entry["api_key_env"])
+            if not api_key:
+                raise ValueError(f"Endpoint {name}: environment variable {entry['api_key_env']} is not set")
+        endpoints.append(Endpoint(
+            name, entry.get("base_url") or OPENAI_API_BASE, api_key, float(entry.get("weight", 1)),
+            int(entry.get("rpm_limit", 0)), int(entry.get("tpm_limit", 0)),
+        ))
+    names = [endpoint.name for endpoint in endpoints]
+    if len(set(names)) != len(names):
+        raise ValueError("OPENAI_ENDPOINTS: endpoint names must be unique")
+    return endpoints
+
+
+class ProviderPool:
+    """Routes each model call attempt to an endpoint that isn't ejected.
+
+    Retries and hedged duplicates (resilience.py) lease again, so they move
+    to another endpoint when the first one failed or got ejected. With
+    several endpoints, ejection replaces the per-model circuit breaker: a
+    call fails fast only once every endpoint is ejected.
+    """
+
+    def __init__(self, endpoints: Optional[List[Endpoint]] = None, selection: str = PROVIDER_SELECTION):
+        if selection not in ("least_loaded", "round_robin"):
+            raise ValueError(f"Unknown PROVIDER_SELECTION {selection!r}")
+        self.endpoints = endpoints if endpoints is not None else load_endpoints()
+        self.selection = selection
+        self._turn = itertools.count()
+
+    @property
+    def default(self) -> Endpoint:
+        return self.endpoints[0]
+
+    @property
+    def pooled(self) -> bool:
+        """More than one endpoint, so a failing one can be routed around"""
+        return len(self.endpoints) > 1
+
+    def select(self) -> Endpoint:
+        if not self.pooled:
+            # Nowhere else to go: the model's circuit breaker in resilience.py handles outages
+            return self.default
+        candidates = [endpoint for endpoint in self.endpoints if endpoint.breaker.available()]
+        if not candidates:
+            retry_in = min(endpoint.breaker.retry_in() for endpoint in self.endpoints)
+            raise CircuitOpenError(f"All {len(self.endpoints)} provider endpoints are ejected; retry in {retry_in:.1f}s")
+        if self.selection == "round_robin":
+            # Smooth weighted round robin (as in nginx): spreads heavier endpoints out instead of bunching them
+            total = sum(endpoint.weight for endpoint in candidates)
+            for endpoint in candidates:
+                endpoint.current_weight += endpoint.weight
+            chosen = max(candidates, key=lambda endpoint: endpoint.current_weight)
+            chosen.current_weight -= total
+        else:
+            # Rotate the starting point so idle endpoints with equal load take turns
+            offset = next(self._turn) % len(candidates)
+            rotated = candidates[offset:] + candidates[:offset]
+            chosen = min(rotated, key=lambda endpoint: endpoint.active / endpoint.weight)
+        # Claims the probe call of an endpoint coming back from ejection
+        chosen.breaker.before_call()
+        return chosen
+
+    @asynccontextmanager
+    async def lease(self, tokens: int, lane: str = INTERACTIVE_LANE, priority: int = 0) -> AsyncIterator[Endpoint]:
+        """Pick an endpoint, wait for its rate limit and record how the call made there went"""
+        endpoint = self.select()
+        endpoint.active += 1
+        try:
+            await endpoint.limiter.acquire(tokens, lane=lane, priority=priority)
+            yield endpoint
+        except asyncio.CancelledError:
+            if self.pooled:
+                endpoint.breaker.release()
+            raise
+        except Exception as e:
+            self.record_failure(endpoint, e)
+            raise
+        else:
+            endpoint.stats["calls"] += 1
+            if self.pooled:
+                endpoint.breaker.record_success()
+            LLM_ENDPOINT_CALLS.labels(endpoint=endpoint.name, outcome="ok").inc()
+        finally:
+            endpoint.active -= 1
+
+    def record_failure(self, endpoint: Endpoint, error: BaseException):
+        endpoint.stats["calls"] += 1
+        rate_limited = getattr(error, "status_code", None) == 429
+        endpoint.stats["rate_limited" if rate_limited else "errors"] += 1
+        LLM_ENDPOINT_CALLS.labels(endpoint=endpoint.name, outcome="rate_limited" if rate_limited else "error").inc()
+        if not self.pooled:
+            return
+        if not is_retryable(error):
+            # The request was at fault, not the endpoint
+            endpoint.breaker.release()
+        elif rate_limited:
+            endpoint.breaker.record_failure(open_for=retry_after(error) or ENDPOINT_EJECT_SECONDS)
+        else:
+            endpoint.breaker.record_failure()
+
+    def waiting(self) -> int:
+        return sum(sum(endpoint.limiter.to_dict()["waiting"].values()) for endpoint in self.endpoints)
+
+    def rate_limits(self) -> Dict[str, Any]:
+        """The endpoints' rate-limit budgets combined, plus each endpoint's own"""
+        limits = {endpoint.name: endpoint.limiter.to_dict() for endpoint in self.endpoints}
+        waiting: Dict[str, int] = {}
+        for limit in limits.values():
+            for lane, count in limit["waiting"].items():
+                waiting[lane] = waiting.get(lane, 0) + count
+
+        def total(key: str) -> Optional[float]:
+            # A single unlimited endpoint makes the pool unlimited
+            values = [limit[key] for limit in limits.values()]
+            return None if None in values else sum(values)
+
+        return {
+            "enabled": any(limit["enabled"] for limit in limits.values()),
+            "rpm_budget": total("rpm_budget"),
+            "tpm_budget": total("tpm_budget"),
+            "waiting": waiting,
+            **{key: sum(limit[key] for limit in limits.values()) for key in ("granted", "delayed")},
+            "wait_seconds": round(sum(limit["wait_seconds"] for limit in limits.values()), 3),
+            "endpoints": limits,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"selection": self.selection, "endpoints": [endpoint.to_dict() for endpoint in self.endpoints]}
+
+
+provider_pool = ProviderPool()
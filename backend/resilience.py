@@ -0,0 +1,286 @@
+"""Timeouts, retries, hedged requests and circuit breakers for model calls.
+
+Every model call goes through `resilience.call` (see workflow.call_llm):
+
+    circuit breaker (per model) -> attempt on an endpoint of the provider pool
+                                   [-> hedged duplicate after the role's p95]
+                                -> retry with jittered backoff on transient errors
+
+Attempts carry their own per-role timeout, so time spent waiting for the
+shared rate limiter doesn't count against it.
+"""
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from telemetry import LLM_CIRCUIT_OPEN, LLM_HEDGES, LLM_RETRIES
+
+# Seconds a single attempt may take before it is abandoned, per role (LLM_<ROLE>_TIMEOUT_SECONDS overrides)
+DEFAULT_TIMEOUTS = {"generator": 300.0, "optimizer": 300.0, "evaluator": 120.0}
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "0"))
+# Retries after the first attempt for timeouts, connection errors, 408/409/429 and 5xx
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "1"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "30"))
+# Roles whose slow calls get a duplicate request once they run past the role's p95 latency
+LLM_HEDGE_ROLES = {role.strip() for role in os.getenv("LLM_HEDGE_ROLES", "").split(",") if role.strip()}
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+# Successful calls of a role needed before its latency percentile is trusted for hedging
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# Consecutive transient failures of a model that open its circuit, and how long it stays open
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+RETRYABLE_STATUS = {408, 409, 429}
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError"}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while a model's circuit is open"""
+
+
+def role_timeout(role: str) -> float:
+    override = os.getenv(f"LLM_{role.upper()}_TIMEOUT_SECONDS")
+    if override:
+        return float(override)
+    return LLM_TIMEOUT_SECONDS or DEFAULT_TIMEOUTS.get(role, 300.0)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient failures: timeouts, dropped connections, rate limiting and server errors"""
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    # The OpenAI SDK's connection errors carry no status code (matched by name to keep the SDK import lazy)
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait (Retry-After / retry-after-ms headers), if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(retry: int, error: BaseException) -> float:
+    """Full-jitter exponential backoff, or the provider's Retry-After when it is longer"""
+    delay = random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** retry))
+    requested = retry_after(error)
+    if requested is not None:
+        delay = max(delay, min(requested, LLM_RETRY_MAX_SECONDS))
+    return delay
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive transient failures -> half-open probe after a cool-down.
+
+    While open, calls fail immediately with CircuitOpenError instead of
+    piling onto a degraded provider; one probe call is let through after
+    CIRCUIT_RESET_SECONDS and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS, gauge: Any = LLM_CIRCUIT_OPEN):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.gauge = gauge
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.open_seconds = reset_seconds
+        self._probing = False
+        self.stats = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.open_seconds else "open"
+
+    def available(self) -> bool:
+        """Whether before_call() would let a call through"""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._probing)
+
+    def before_call(self):
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        self.stats["rejected"] += 1
+        raise CircuitOpenError(f"Model {self.name} is failing; retry in {self.retry_in():.1f}s")
+
+    def retry_in(self) -> float:
+        """Seconds until the circuit lets a probe through (0 when it isn't open)"""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        self.failures = 0
+        self._probing = False
+        if self.opened_at is not None:
+            self.opened_at = None
+            self.gauge.labels(self.name).set(0)
+
+    def record_failure(self, open_for: Optional[float] = None):
+        """Count a transient failure; `open_for` opens the circuit right away for that many seconds"""
+        self.failures += 1
+        if open_for is not None or self._probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+            if self.opened_at is None:
+                self.stats["opened"] += 1
+            self.opened_at = time.monotonic()
+            self.open_seconds = self.reset_seconds if open_for is None else open_for
+            self.gauge.labels(self.name).set(1)
+        self._probing = False
+
+    def release(self):
+        """End a probe whose outcome says nothing about the provider (e.g. a rejected request)"""
+        self._probing = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, **self.stats}
+
+
+class LatencyWindow:
+    """Latencies of a role's recent successful calls"""
+
+    def __init__(self, size: int = 200):
+        self.samples: deque = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if len(self.samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class Resilience:
+    """Per-model circuit breakers and per-role latency windows shared by every run in the process"""
+
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyWindow] = {}
+        self.stats = {"retries": 0, "hedged": 0, "hedges_won": 0}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        breaker = self.breakers.get(model)
+        if breaker is None:
+            breaker = self.breakers[model] = CircuitBreaker(model)
+        return breaker
+
+    def latency(self, role: str) -> LatencyWindow:
+        window = self.latencies.get(role)
+        if window is None:
+            window = self.latencies[role] = LatencyWindow()
+        return window
+
+    async def call(self, role: str, model: str, attempt: Callable[[bool], Awaitable[Any]], circuit: bool = True) -> Any:
+        """Run `attempt(hedge)` with retries, hedging and the model's circuit breaker.
+
+        `attempt` makes one model call and applies the role's timeout itself;
+        it is called with hedge=True for the duplicate of a slow call.
+        circuit=False skips the breaker, for callers that isolate failures
+        themselves (the provider pool ejects single endpoints).
+        """
+        breaker = self.breaker(model) if circuit else None
+        retry = 0
+        while True:
+            if breaker is not None:
+                breaker.before_call()
+            started = time.monotonic()
+            try:
+                result = await self._hedged(role, attempt)
+            except asyncio.CancelledError:
+                if breaker is not None:
+                    breaker.release()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    if breaker is not None:
+                        breaker.release()
+                    raise
+                if breaker is not None:
+                    breaker.record_failure()
+                if retry >= LLM_MAX_RETRIES:
+                    raise
+                reason = "timeout" if isinstance(e, asyncio.TimeoutError) else str(getattr(e, "status_code", None) or type(e).__name__)
+                LLM_RETRIES.labels(role=role, reason=reason).inc()
+                self.stats["retries"] += 1
+                await asyncio.sleep(backoff_delay(retry, e))
+                retry += 1
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            self.latency(role).add(time.monotonic() - started)
+            return result
+
+    async def _hedged(self, role: str, attempt: Callable[[bool], Awaitable[Any]]) -> Any:
+        delay = self.latency(role).percentile(LLM_HEDGE_PERCENTILE) if role in LLM_HEDGE_ROLES else None
+        if delay is None:
+            return await attempt(False)
+        primary = asyncio.ensure_future(attempt(False))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        # The call is slower than p95 of recent ones: race a duplicate against it
+        self.stats["hedged"] += 1
+        hedge = asyncio.ensure_future(attempt(True))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = "hedge" if task is hedge else "primary"
+                        self.stats["hedges_won"] += winner == "hedge"
+                        LLM_HEDGES.labels(role=role, winner=winner).inc()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "circuits": {model: breaker.to_dict() for model, breaker in self.breakers.items()},
+            "latency_p95": {role: window.percentile(95) for role, window in self.latencies.items()},
+            "timeouts": {role: role_timeout(role) for role in DEFAULT_TIMEOUTS},
+            "hedge_roles": sorted(LLM_HEDGE_ROLES),
+        }
+
+
+resilience = Resilience()
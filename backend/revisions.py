@@ -0,0 +1,119 @@
+"""Compact article revision history.
+
+A history is stored as the latest revision in full plus one reverse delta per
+earlier revision:
+
+    {"latest": "<text of revision n>", "deltas": [d1, ..., d(n-1)]}
+
+deltas[i] rebuilds revision i + 1 from revision i + 2, so appending a revision
+only adds one delta and never touches the older ones. Deltas work on words
+(with their trailing whitespace), which keeps them small even when the
+optimizer rephrases parts of every paragraph, and are JSON serializable:
+
+    ["c", start, end]   copy tokens[start:end] of the newer revision
+    ["i", "text"]       insert this text
+"""
+import difflib
+import re
+from typing import Any, Dict, List, Optional, Union
+
+History = Dict[str, Any]
+Delta = List[list]
+
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def empty_history() -> History:
+    return {"latest": None, "deltas": []}
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text)
+
+
+def make_delta(newer: str, older: str) -> Delta:
+    """Encode `older` as edits against `newer`"""
+    newer_tokens = tokenize(newer)
+    older_tokens = tokenize(older)
+    matcher = difflib.SequenceMatcher(None, newer_tokens, older_tokens, autojunk=False)
+    delta: Delta = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append(["c", i1, i2])
+        elif j2 > j1:
+            delta.append(["i", "".join(older_tokens[j1:j2])])
+    return delta
+
+
+def apply_delta(newer: str, delta: Delta) -> str:
+    """Rebuild the older revision from the newer one"""
+    newer_tokens = tokenize(newer)
+    parts: List[str] = []
+    for op in delta:
+        if op[0] == "c":
+            parts.extend(newer_tokens[op[1]:op[2]])
+        else:
+            parts.append(op[1])
+    return "".join(parts)
+
+
+def append_revision(history: Optional[Union[History, List[str]]], revisions: Union[History, List[str], None]) -> History:
+    """LangGraph reducer: add new full-text revisions to a compact history.
+
+    Accepts a legacy list of full texts on either side, so old records and
+    nodes that return `[text]` keep working.
+    """
+    history = compact_history(history)
+    if isinstance(revisions, dict):
+        # A whole history replaces the current one (e.g. state restored from a record)
+        return compact_history(revisions)
+    for text in revisions or []:
+        if history["latest"] is None:
+            history = {"latest": text, "deltas": []}
+        else:
+            history = {
+                "latest": text,
+                "deltas": history["deltas"] + [make_delta(text, history["latest"])],
+            }
+    return history
+
+
+def compact_history(history: Optional[Union[History, List[str]]]) -> History:
+    """Normalize a legacy list of full texts (or nothing) into the compact form"""
+    if not history:
+        return empty_history()
+    if isinstance(history, dict):
+        return history
+    compact = empty_history()
+    return append_revision(compact, list(history))
+
+
+def revision_count(history: Optional[Union[History, List[str]]]) -> int:
+    history = compact_history(history)
+    if history["latest"] is None:
+        return 0
+    return len(history["deltas"]) + 1
+
+
+def expand_history(history: Optional[Union[History, List[str]]]) -> List[str]:
+    """Reconstruct every revision, oldest first"""
+    history = compact_history(history)
+    if history["latest"] is None:
+        return []
+    revisions = [history["latest"]]
+    for delta in reversed(history["deltas"]):
+        revisions.append(apply_delta(revisions[-1], delta))
+    revisions.reverse()
+    return revisions
+
+
+def get_revision(history: Optional[Union[History, List[str]]], number: int) -> str:
+    """Reconstruct revision `number` (1-based). Raises IndexError if it doesn't exist."""
+    history = compact_history(history)
+    count = revision_count(history)
+    if number < 1 or number > count:
+        raise IndexError(f"Revision {number} does not exist")
+    text = history["latest"]
+    for delta in reversed(history["deltas"][number - 1:]):
+        text = apply_delta(text, delta)
+    return text
@@ -0,0 +1,74 @@
+"""Which model each step of a run uses (the routing policy).
+
+A policy maps the steps of the graph to model tiers:
+
+    outline, generate   first draft (planned outline, single pass or per section)
+    evaluate, optimize  every evaluate/optimize round
+    approve             tier that re-checks a draft the evaluate tier approved;
+                        its verdict replaces the cheaper one
+    plateau             tier evaluate and optimize switch to when scores
+                        plateau, instead of stopping the run
+
+Tiers are "default" (the role's OPENAI_MODEL / OPENAI_<ROLE>_MODEL), "fast"
+(OPENAI_FAST_MODEL) and "strong" (OPENAI_STRONG_MODEL); approve and plateau
+can be None to turn the escalation off.
+"""
+import os
+from typing import Any, Dict, Literal, Optional
+
+from models import role_model_name
+
+RoutingStep = Literal["outline", "generate", "evaluate", "optimize", "approve", "plateau"]
+ModelTier = Literal["default", "fast", "strong"]
+
+OPENAI_FAST_MODEL = os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini")
+OPENAI_STRONG_MODEL = os.getenv("OPENAI_STRONG_MODEL", "gpt-4o")
+# Policy used when a request doesn't name one
+ROUTING_POLICY = os.getenv("ROUTING_POLICY", "fixed")
+
+POLICIES: Dict[str, Dict[str, Optional[str]]] = {
+    # Every step on the role's configured model, as before tiers existed
+    "fixed": {"outline": "default", "generate": "default", "evaluate": "default", "optimize": "default",
+              "approve": None, "plateau": None},
+    # Cheap drafts and rounds; the strong model only confirms approvals and breaks plateaus
+    "tiered": {"outline": "fast", "generate": "fast", "evaluate": "fast", "optimize": "fast",
+               "approve": "strong", "plateau": "strong"},
+}
+
+
+def resolve_policy(name: Optional[str] = None, overrides: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, Any]:
+    """The named policy (default ROUTING_POLICY) with per-step overrides applied"""
+    name = name or ROUTING_POLICY
+    if name not in POLICIES:
+        raise ValueError(f"Unknown routing policy {name!r} (expected one of {', '.join(POLICIES)})")
+    return {"name": name, **POLICIES[name], **(overrides or {})}
+
+
+def tier_model(tier: str, role: str) -> str:
+    if tier == "fast":
+        return OPENAI_FAST_MODEL
+    if tier == "strong":
+        return OPENAI_STRONG_MODEL
+    return role_model_name(role)
+
+
+def model_for(policy: Optional[Dict[str, Any]], step: str, role: str, escalated: bool = False) -> str:
+    """Model name for a step; evaluate and optimize move to the plateau tier once the run escalated"""
+    policy = policy or resolve_policy()
+    tier = policy.get(step) or "default"
+    if escalated and step in ("evaluate", "optimize") and policy.get("plateau"):
+        tier = policy["plateau"]
+    return tier_model(tier, role)
+
+
+def approval_model(policy: Optional[Dict[str, Any]], evaluated_with: str) -> Optional[str]:
+    """Model that has to confirm an approval given by `evaluated_with`, if it's a different one"""
+    tier = (policy or resolve_policy()).get("approve")
+    model = tier_model(tier, "evaluator") if tier else None
+    return model if model != evaluated_with else None
+
+
+def can_escalate(policy: Optional[Dict[str, Any]]) -> bool:
+    """Whether switching to the plateau tier would change the evaluate or optimize model"""
+    return any(model_for(policy, step, role, True) != model_for(policy, step, role)
+               for step, role in (("evaluate", "evaluator"), ("optimize", "optimizer")))
@@ -0,0 +1,172 @@
+"""The evaluator's rubric as separately scored dimensions (evaluate_mode "sharded").
+
+Each dimension is judged by its own, smaller model call that only sees the
+part of the article it needs; the scores are then combined with the
+rubric's weights into a single evaluation.
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from article_metrics import LINK, QUOTED
+from sections import Section, split_sections, unwrap_article
+
+# Approval needs the weighted score of a full evaluation and no weak dimension
+APPROVAL_SCORE = 9
+APPROVAL_MIN_DIMENSION = 8
+
+SOURCES_HEADING = re.compile(r"reference|source|bibliograph|citation|further reading", re.IGNORECASE)
+EVIDENCE = re.compile(r"\d|%|\[\^?\d+\]|https?://")
+
+
+@dataclass
+class Dimension:
+    name: str
+    title: str
+    weight: int
+    checklist: str
+    extract: Callable[[List[Section]], str]
+
+
+def paragraphs(text: str) -> List[str]:
+    return [block.strip() for block in re.split(r"\n\s*\n", text) if block.strip()]
+
+
+def section_body(section: Section) -> List[str]:
+    """Paragraphs of a section without its heading line"""
+    # A heading at the very end of the article has no newline after it
+    return paragraphs(section.text.partition("\n")[2] if section.level else section.text)
+
+
+def outline(sections: List[Section]) -> str:
+    return "\n".join(
+        f"{'#' * section.level} {section.heading} ({section.words} words)" for section in sections if section.level
+    )
+
+
+def title_and_intro(sections: List[Section]) -> str:
+    return sections[0].text.strip() if sections and not sections[0].level else ""
+
+
+def conclusion(sections: List[Section]) -> str:
+    body = [section for section in sections if section.level and not SOURCES_HEADING.search(section.heading)]
+    return body[-1].text.strip() if body else ""
+
+
+def research_extract(sections: List[Section]) -> str:
+    """Paragraphs carrying evidence (figures, links, citations, quotes) plus the references section"""
+    parts = []
+    for section in sections:
+        if section.level and SOURCES_HEADING.search(section.heading):
+            parts.append(section.text.strip())
+            continue
+        evidence = [block for block in section_body(section) if EVIDENCE.search(block) or QUOTED.search(block)]
+        if evidence:
+            parts.append((f"## {section.heading}\n\n" if section.level else "") + "\n\n".join(evidence))
+    return "\n\n".join(parts)
+
+
+def depth_extract(sections: List[Section]) -> str:
+    return "".join(section.text for section in sections).strip()
+
+
+def writing_extract(sections: List[Section]) -> str:
+    """Title and introduction, the opening paragraph of every section and the conclusion"""
+    parts = [title_and_intro(sections)]
+    for section in sections[:-1]:
+        if section.level:
+            body = section_body(section)
+            parts.append(f"{'#' * section.level} {section.heading}\n\n{body[0] if body else ''}")
+    parts.append(conclusion(sections))
+    return "\n\n".join(part for part in parts if part)
+
+
+def seo_extract(sections: List[Section]) -> str:
+    """Title, introduction, heading outline and every link with its anchor text"""
+    text = "".join(section.text for section in sections)
+    links = [match.group(0) for match in LINK.finditer(text)]
+    return "\n\n".join([
+        title_and_intro(sections),
+        "OUTLINE:\n" + outline(sections),
+        "LINKS:\n" + ("\n".join(f"- {link}" for link in links) or "(none)"),
+    ])
+
+
+def engagement_extract(sections: List[Section]) -> str:
+    """Hook, conclusion/call to action, lists and questions put to the reader"""
+    text = "".join(section.text for section in sections)
+    list_items = [line.strip() for line in text.splitlines() if re.match(r"^\s*(?:[-*+]|\d+[.)]|- \[[ x]\])\s+\S", line)]
+    questions = [line.strip() for line in text.splitlines() if line.strip().endswith("?") and not line.startswith("#")]
+    return "\n\n".join(part for part in [
+        "INTRODUCTION:\n" + title_and_intro(sections),
+        "CONCLUSION:\n" + conclusion(sections),
+        "LISTS AND CHECKLISTS:\n" + "\n".join(list_items[:60]) if list_items else "",
+        "QUESTIONS TO THE READER:\n" + "\n".join(questions[:20]) if questions else "",
+    ] if part)
+
+
+# Weights and checklists as documented in the single-call evaluator prompt
+DIMENSIONS: List[Dimension] = [
+    Dimension("research", "Research quality", 25, """- 15+ credible, recent sources (2020-2024)
+- Expert quotes from recognized authorities
+- Original data analysis or proprietary insights
+- Fact-checked statistics and studies
+- Peer-reviewed academic sources""", research_extract),
+    Dimension("depth", "Depth & substance", 25, """- MINIMUM 3,500 words (hard requirement)
+- Unprecedented depth not found elsewhere
+- Unique frameworks or methodologies
+- Comprehensive industry analysis
+- Actionable, implementable insights""", depth_extract),
+    Dimension("writing", "Writing quality", 20, """- Pulitzer-level writing quality
+- Compelling hook that grabs attention
+- Perfect grammar and structure
+- Engaging narrative flow
+- Professional tone throughout""", writing_extract),
+    Dimension("seo", "SEO & discoverability", 15, """- 15-20 strategic keywords naturally integrated
+- Optimized for featured snippets
+- Internal linking strategy
+- Meta description and schema markup
+- Voice search optimization""", seo_extract),
+    Dimension("engagement", "Engagement & virality", 15, """- Highly shareable, discussion-worthy content
+- Emotional connection with readers
+- Clear, compelling value proposition
+- Interactive elements (quizzes, checklists)
+- Strong call-to-action""", engagement_extract),
+]
+
+
+def extracts(article: str) -> Dict[str, str]:
+    """The part of the article each dimension is judged on"""
+    sections = split_sections(unwrap_article(article)[1])
+    return {dimension.name: dimension.extract(sections) for dimension in DIMENSIONS}
+
+
+def aggregate(results: Dict[str, Dict[str, Any]], max_section_feedback: int) -> Dict[str, Any]:
+    """Combine per-dimension {score, feedback, section_feedback} into one evaluation.
+
+    The score is the weighted mean; feedback lists the weakest dimensions
+    first so the optimizer starts with what costs the most points.
+    """
+    total_weight = sum(dimension.weight for dimension in DIMENSIONS)
+    score = round(sum(dimension.weight * results[dimension.name]["score"] for dimension in DIMENSIONS) / total_weight)
+    ranked = sorted(DIMENSIONS, key=lambda dimension: (results[dimension.name]["score"], -dimension.weight))
+    approved = score >= APPROVAL_SCORE and all(result["score"] >= APPROVAL_MIN_DIMENSION for result in results.values())
+
+    feedback = ["Scores per rubric dimension, weakest first:"]
+    for dimension in ranked:
+        result = results[dimension.name]
+        feedback.append(f"\n### {dimension.title} ({result['score']}/10, weight {dimension.weight}%)\n{result['feedback']}")
+    section_feedback: List[Dict[str, str]] = []
+    seen = set()
+    for dimension in ranked:
+        for item in results[dimension.name].get("section_feedback") or []:
+            if item["heading"] not in seen and len(section_feedback) < max_section_feedback:
+                seen.add(item["heading"])
+                section_feedback.append(item)
+    return {
+        "evaluation": "approved" if approved else "needs_improvement",
+        "score": score,
+        "feedback": "\n".join(feedback),
+        "section_feedback": section_feedback,
+        "dimension_scores": {dimension.name: results[dimension.name]["score"] for dimension in DIMENSIONS},
+    }
@@ -0,0 +1,175 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Provider limits shared by every model call in this process (0 = unlimited)
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "0"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "0"))
+# Fraction of the provider limit to use, so bursts from estimation errors stay under it
+RATE_LIMIT_HEADROOM = float(os.getenv("RATE_LIMIT_HEADROOM", "0.9"))
+
+# Lane of requests made by a person waiting on the UI; always served before batch lanes
+INTERACTIVE_LANE = "interactive"
+
+
+class FairQueue:
+    """Waiting items grouped into lanes.
+
+    pop() serves the interactive lane first, then rotates round robin over the
+    other lanes (one lane per batch) so a large batch cannot starve a small one.
+    Inside a lane, higher priority goes first, then FIFO.
+    """
+
+    def __init__(self):
+        self._lanes: "OrderedDict[str, list[tuple[int, int, Any]]]" = OrderedDict()
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(len(heap) for heap in self._lanes.values())
+
+    def push(self, lane: str, priority: int, item: Any):
+        heapq.heappush(self._lanes.setdefault(lane, []), (-priority, next(self._counter), item))
+
+    def pop(self) -> Any:
+        if not self._lanes:
+            raise IndexError("pop from an empty FairQueue")
+        lane = INTERACTIVE_LANE if INTERACTIVE_LANE in self._lanes else next(iter(self._lanes))
+        heap = self._lanes.pop(lane)
+        item = heapq.heappop(heap)[2]
+        if heap:
+            # Re-inserting at the end is what makes the lanes take turns
+            self._lanes[lane] = heap
+        return item
+
+    def remove(self, item: Any) -> bool:
+        for lane, heap in self._lanes.items():
+            for index, entry in enumerate(heap):
+                if entry[2] is item:
+                    heap.pop(index)
+                    heapq.heapify(heap)
+                    if not heap:
+                        del self._lanes[lane]
+                    return True
+        return False
+
+    def lane_sizes(self) -> Dict[str, int]:
+        return {lane: len(heap) for lane, heap in self._lanes.items()}
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute` units per minute, up to `per_minute`"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budget shared by all model calls.
+
+    Callers that can't proceed wait in a FairQueue; a single dispatcher hands
+    out capacity as the buckets refill, so throughput settles just under the
+    limit instead of bursting into 429s.
+    """
+
+    def __init__(self, rpm: int = OPENAI_RPM_LIMIT, tpm: int = OPENAI_TPM_LIMIT, headroom: float = RATE_LIMIT_HEADROOM):
+        self.requests = TokenBucket(rpm * headroom) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm * headroom) if tpm > 0 else None
+        self._waiting = FairQueue()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.stats = {"granted": 0, "delayed": 0, "wait_seconds": 0.0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests is not None or self.tokens is not None
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+    def _take(self, tokens: int):
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+        self.stats["granted"] += 1
+
+    async def acquire(self, tokens: int, lane: str = INTERACTIVE_LANE, priority: int = 0):
+        """Wait until the budget allows a call expected to use `tokens` tokens"""
+        if not self.enabled:
+            return
+        if not len(self._waiting) and self._wait_time(tokens) == 0:
+            self._take(tokens)
+            return
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.push(lane, priority, (future, tokens))
+        self.stats["delayed"] += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        try:
+            await future
+        finally:
+            self.stats["wait_seconds"] += time.monotonic() - started
+
+    def settle(self, estimated: int, actual: Optional[int]):
+        """Correct the token bucket once the real usage of a call is known"""
+        if self.tokens is None or actual is None:
+            return
+        if actual < estimated:
+            self.tokens.give_back(estimated - actual)
+        else:
+            self.tokens.take(actual - estimated)
+
+    async def _dispatch(self):
+        while len(self._waiting):
+            future, tokens = self._waiting.pop()
+            if future.done():
+                continue
+            wait = self._wait_time(tokens)
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = self._wait_time(tokens)
+            if future.done():
+                # The caller gave up while waiting; its capacity goes to the next one
+                continue
+            self._take(tokens)
+            future.set_result(None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "rpm_budget": self.requests.capacity if self.requests is not None else None,
+            "tpm_budget": self.tokens.capacity if self.tokens is not None else None,
+            "waiting": self._waiting.lane_sizes(),
+            **self.stats,
+            "wait_seconds": round(self.stats["wait_seconds"], 3),
+        }
@@ -0,0 +1,159 @@
+"""Full-text search over articles with SQLite FTS5.
+
+Both storage backends keep the same two tables next to their summaries:
+
+    search_docs     article id -> integer docid (stable across updates)
+    article_search  FTS5 table keyed by docid: topic, article body, feedback
+
+Updating or deleting an article touches its own row through the docid, so
+the index is maintained incrementally on every save. Results are ranked with
+BM25, topic matches weighing most.
+"""
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+SEARCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    docid INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS article_search USING fts5(
+    topic, body, feedback,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+# BM25 weights for the topic, body and feedback columns
+COLUMN_WEIGHTS = (10.0, 1.0, 0.5)
+SNIPPET_TOKENS = 24
+SNIPPET_MARKERS = ("<mark>", "</mark>")
+
+QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def build_match_query(query: str) -> str:
+    """Turn a user query into an FTS5 MATCH expression.
+
+    Quoted text becomes a phrase, `term*` a prefix search and a bare `OR`
+    between terms an alternative; every other term must match. Terms are
+    quoted, so punctuation in the query can't produce FTS5 syntax errors.
+    Raises ValueError when the query has no searchable terms.
+    """
+    parts: List[str] = []
+    for phrase, word in QUERY_TOKEN.findall(query):
+        if phrase:
+            if phrase.strip():
+                parts.append('"' + phrase.replace('"', '""') + '"')
+            continue
+        if word == "OR":
+            if parts and parts[-1] != "OR":
+                parts.append("OR")
+            continue
+        prefix = word.endswith("*") and len(word) > 1
+        term = word.rstrip("*").replace('"', '""')
+        if not re.search(r"\w", term):
+            continue
+        parts.append(f'"{term}"' + ("*" if prefix else ""))
+    while parts and parts[-1] == "OR":
+        parts.pop()
+    if not parts:
+        raise ValueError("Search query has no searchable terms")
+    return " ".join(parts)
+
+
+def search_document(article: Dict[str, Any]) -> Tuple[str, str, str]:
+    """The indexed text of an article: (topic, body, feedback)"""
+    feedback = [article.get("feedback") or ""]
+    feedback += [entry for entry in article.get("feedback_history") or [] if entry != article.get("feedback")]
+    feedback += article.get("human_feedback_history") or []
+    return article.get("topic") or "", article.get("final_article") or "", "\n\n".join(filter(None, feedback))
+
+
+def index_article(conn: sqlite3.Connection, article: Dict[str, Any]):
+    """Insert or replace an article's search row (caller commits)"""
+    conn.execute("INSERT OR IGNORE INTO search_docs (id) VALUES (?)", (article["id"],))
+    docid = conn.execute("SELECT docid FROM search_docs WHERE id = ?", (article["id"],)).fetchone()[0]
+    conn.execute("DELETE FROM article_search WHERE rowid = ?", (docid,))
+    conn.execute(
+        "INSERT INTO article_search (rowid, topic, body, feedback) VALUES (?, ?, ?, ?)",
+        (docid, *search_document(article))
+    )
+
+
+def unindex_article(conn: sqlite3.Connection, article_id: str):
+    row = conn.execute("SELECT docid FROM search_docs WHERE id = ?", (article_id,)).fetchone()
+    if row is None:
+        return
+    conn.execute("DELETE FROM article_search WHERE rowid = ?", (row[0],))
+    conn.execute("DELETE FROM search_docs WHERE docid = ?", (row[0],))
+
+
+def indexed_ids(conn: sqlite3.Connection) -> set:
+    return {row[0] for row in conn.execute("SELECT id FROM search_docs")}
+
+
+def search_sql(summary_table: str, summary_columns: List[str], where: str) -> str:
+    """Ranked search joined with a summary table; parameters: MATCH query, filter params, limit, offset"""
+    weights = ", ".join(str(weight) for weight in COLUMN_WEIGHTS)
+    return (
+        f"SELECT search_docs.docid AS docid, {', '.join(summary_columns)}, "
+        f"bm25(article_search, {weights}) AS relevance "
+        f"FROM article_search JOIN search_docs ON search_docs.docid = article_search.rowid "
+        f"JOIN {summary_table} ON {summary_table}.id = search_docs.id "
+        f"WHERE article_search MATCH ? {where} "
+        f"ORDER BY relevance, {summary_table}.created_at DESC, {summary_table}.id DESC LIMIT ? OFFSET ?"
+    )
+
+
+def run_search(conn: sqlite3.Connection, summary_table: str, summary_columns: List[str], query: str,
+               where: str, params: List[Any], limit: int, offset: int) -> List[Dict[str, Any]]:
+    """Rank one page (plus a look-ahead row), then add snippets for just those rows.
+
+    snippet() has to tokenize the matched column, so it's only evaluated for
+    the page instead of for every matching article before sorting.
+    """
+    sql = search_sql(summary_table, summary_columns, where)
+    rows = [dict(row) for row in conn.execute(sql, [query] + params + [limit + 1, offset])]
+    if rows:
+        start, end = SNIPPET_MARKERS
+        placeholders = ", ".join("?" for _ in rows)
+        snippets = dict(conn.execute(
+            f"SELECT rowid, snippet(article_search, -1, ?, ?, '…', {SNIPPET_TOKENS}) FROM article_search "
+            f"WHERE article_search MATCH ? AND rowid IN ({placeholders})",
+            [start, end, query] + [row["docid"] for row in rows]
+        ).fetchall())
+        for row in rows:
+            row["snippet"] = snippets.get(row.pop("docid"), "")
+    return rows
+
+
+def search_filters(status: Optional[str] = None, min_score: Optional[int] = None,
+                   max_score: Optional[int] = None, table: str = "") -> Tuple[str, List[Any]]:
+    """Extra AND clauses for the summary filters shared with the list endpoint"""
+    prefix = f"{table}." if table else ""
+    clauses = []
+    params: List[Any] = []
+    if status:
+        clauses.append(f"{prefix}status = ?")
+        params.append(status)
+    if min_score is not None:
+        clauses.append(f"{prefix}score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        clauses.append(f"{prefix}score <= ?")
+        params.append(max_score)
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+
+def finish_search(rows: List[Dict[str, Any]], limit: int, offset: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """Trim the look-ahead row of a search page and compute the next offset"""
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
+    for row in rows:
+        row["needs_human_feedback"] = bool(row["needs_human_feedback"])
+        # bm25() is lower for better matches; flip it so higher means more relevant
+        row["relevance"] = round(-row["relevance"], 4)
+    return rows, next_offset
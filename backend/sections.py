@@ -0,0 +1,74 @@
+import difflib
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# H2/H3 headings start a new section; H1 (the title) stays in the preamble
+SECTION_HEADING = re.compile(r"^(#{2,3})\s+(.*?)\s*#*\s*$")
+FENCE = re.compile(r"^\s*(```|~~~)")
+# Models often wrap the whole article in a ```markdown fence
+OUTER_FENCE = re.compile(r"^\s*```(?:markdown|md)?\s*\n(.*?)\n```\s*$", re.DOTALL)
+
+
+@dataclass
+class Section:
+    heading: str
+    level: int
+    text: str
+
+    @property
+    def words(self) -> int:
+        return len(self.text.split())
+
+
+def unwrap_article(markdown: str) -> Tuple[str, str, str]:
+    """Split off an outer ```markdown fence, returning (prefix, body, suffix)"""
+    match = OUTER_FENCE.match(markdown)
+    if not match:
+        return "", markdown, ""
+    start, end = match.span(1)
+    return markdown[:start], match.group(1), markdown[end:]
+
+
+def split_sections(markdown: str) -> List[Section]:
+    """Split Markdown into the preamble plus one section per H2/H3 heading.
+
+    Joining the `text` of every section gives back the input exactly.
+    Headings inside fenced code blocks are ignored.
+    """
+    sections: List[Section] = [Section(heading="", level=0, text="")]
+    in_fence = False
+    for line in markdown.splitlines(keepends=True):
+        if FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else SECTION_HEADING.match(line.rstrip("\n"))
+        if match:
+            sections.append(Section(heading=match.group(2), level=len(match.group(1)), text=line))
+        else:
+            sections[-1].text += line
+    if not sections[0].text and len(sections) > 1:
+        sections.pop(0)
+    return sections
+
+
+def join_sections(sections: List[Section]) -> str:
+    return "".join(section.text for section in sections)
+
+
+def normalize_heading(heading: str) -> str:
+    heading = re.sub(r"[*_`#]|\[|\]\(.*?\)", "", heading)
+    heading = re.sub(r"^\s*(\d+[.)]\s*)", "", heading)
+    return re.sub(r"\s+", " ", heading).strip().lower()
+
+
+def find_section(sections: List[Section], heading: str, cutoff: float = 0.75) -> Optional[int]:
+    """Index of the section whose heading best matches `heading`, or None"""
+    wanted = normalize_heading(heading)
+    if not wanted:
+        return None
+    candidates = [normalize_heading(section.heading) for section in sections]
+    for index, candidate in enumerate(candidates):
+        if candidate and candidate == wanted:
+            return index
+    best = difflib.get_close_matches(wanted, candidates, n=1, cutoff=cutoff)
+    return candidates.index(best[0]) if best else None
@@ -0,0 +1,152 @@
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Reuse stored articles for near-duplicate topics (requests can still opt out)
+SIMILAR_TOPIC_REUSE = os.getenv("SIMILAR_TOPIC_REUSE", "true").lower() != "false"
+# Cosine similarity at which the stored article is returned as is
+SIMILARITY_RETURN_THRESHOLD = float(os.getenv("SIMILARITY_RETURN_THRESHOLD", "0.9"))
+# Cosine similarity at which a new run starts from the stored draft (retargeted to the new topic)
+# instead of generating one; lower values seed from articles on different angles of a subject
+SIMILARITY_SEED_THRESHOLD = float(os.getenv("SIMILARITY_SEED_THRESHOLD", "0.85"))
+# Only drafts scored at least this high are reused
+REUSE_MIN_SCORE = int(os.getenv("REUSE_MIN_SCORE", "7"))
+
+WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by for from how in into is it its of on or the to vs what when where which who why with
+your you our we guide complete ultimate introduction
+""".split())
+# Character trigrams catch inflections and compounds ("healthcare" / "health care"); weighted below whole words
+TRIGRAM_WEIGHT = 0.3
+# Terms of the article title, relative to terms of the requested topic
+TITLE_WEIGHT = 0.5
+
+
+def normalize_word(word: str) -> str:
+    # Crude plural folding, enough for topic phrases
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def term_frequencies(text: str, weight: float = 1.0, counts: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Weighted word and character-trigram counts of a short text"""
+    counts = {} if counts is None else counts
+    for word in WORD.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        word = normalize_word(word)
+        counts[f"w:{word}"] = counts.get(f"w:{word}", 0.0) + weight
+        padded = f"#{word}#"
+        for start in range(len(padded) - 2):
+            gram = f"c:{padded[start:start + 3]}"
+            counts[gram] = counts.get(gram, 0.0) + weight * TRIGRAM_WEIGHT
+    return counts
+
+
+def article_title(preview: str) -> str:
+    """The H1 line the writers put at the top of an article, if the preview starts with one"""
+    for line in preview.splitlines():
+        line = line.strip().lstrip("`").strip()
+        if line.startswith("# "):
+            return line[2:]
+        if line and not line.startswith("markdown"):
+            break
+    return ""
+
+
+class SimilarityIndex:
+    """TF-IDF vectors of stored article topics (and titles), compared by cosine similarity.
+
+    Terms get integer ids when an article is added; the sparse matrix (COO
+    arrays) and IDF weights are rebuilt with NumPy on the first query after a
+    change, so a lookup is a handful of vectorized operations over the corpus.
+    """
+
+    def __init__(self):
+        self._vocabulary: Dict[str, int] = {}
+        # article id -> (term ids, term counts, metadata)
+        self._docs: Dict[str, Tuple[np.ndarray, np.ndarray, Dict[str, Any]]] = {}
+        self._dirty = True
+        self._ids: List[str] = []
+        self._rows = np.zeros(0, dtype=np.int32)
+        self._cols = np.zeros(0, dtype=np.int32)
+        self._weights = np.zeros(0, dtype=np.float32)
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._scores = np.zeros(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, summary: Dict[str, Any]):
+        """Index (or re-index) an article from its summary fields"""
+        counts = term_frequencies(summary.get("topic") or "")
+        term_frequencies(article_title(summary.get("preview") or ""), TITLE_WEIGHT, counts)
+        ids = np.fromiter((self._vocabulary.setdefault(term, len(self._vocabulary)) for term in counts),
+                          dtype=np.int32, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        metadata = {key: summary.get(key) for key in ("id", "topic", "score", "status", "evaluation", "created_at")}
+        self._docs[summary["id"]] = (ids, values, metadata)
+        self._dirty = True
+
+    def remove(self, article_id: str):
+        if self._docs.pop(article_id, None) is not None:
+            self._dirty = True
+
+    def _rebuild(self):
+        self._ids = list(self._docs)
+        entries = [self._docs[article_id] for article_id in self._ids]
+        lengths = np.fromiter((len(ids) for ids, _, _ in entries), dtype=np.int64, count=len(entries))
+        self._rows = np.repeat(np.arange(len(entries), dtype=np.int32), lengths)
+        self._cols = np.concatenate([ids for ids, _, _ in entries]) if entries else np.zeros(0, dtype=np.int32)
+        counts = np.concatenate([values for _, values, _ in entries]) if entries else np.zeros(0, dtype=np.float32)
+        # Smoothed IDF, as in scikit-learn
+        document_frequency = np.bincount(self._cols, minlength=len(self._vocabulary))
+        self._idf = (np.log((1 + len(entries)) / (1 + document_frequency)) + 1).astype(np.float32)
+        weights = counts * self._idf[self._cols]
+        norms = np.sqrt(np.bincount(self._rows, weights=weights * weights, minlength=len(entries)))
+        self._weights = (weights / np.maximum(norms[self._rows], 1e-12)).astype(np.float32)
+        self._scores = np.fromiter((metadata.get("score") or 0 for _, _, metadata in entries),
+                                   dtype=np.int32, count=len(entries))
+        self._dirty = False
+
+    def query(self, text: str, limit: int = 5, min_score: Optional[int] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """Most similar stored articles to `text` as (metadata, cosine similarity), best first"""
+        if not self._docs:
+            return []
+        if self._dirty:
+            self._rebuild()
+        counts = term_frequencies(text)
+        if not counts:
+            return []
+        unseen_idf = math.log(1 + len(self._ids)) + 1
+        query_weights = np.zeros(len(self._idf), dtype=np.float32)
+        norm = 0.0
+        for term, count in counts.items():
+            term_id = self._vocabulary.get(term)
+            if term_id is not None and term_id < len(self._idf):
+                weight = count * float(self._idf[term_id])
+                query_weights[term_id] = weight
+            else:
+                # Terms no stored article has still count toward the query's length
+                weight = count * unseen_idf
+            norm += weight * weight
+        if norm == 0:
+            return []
+        query_weights /= math.sqrt(norm)
+
+        contributions = self._weights * query_weights[self._cols]
+        scores = np.bincount(self._rows, weights=contributions, minlength=len(self._ids))
+        if min_score is not None:
+            scores = np.where(self._scores >= min_score, scores, 0.0)
+        candidates = np.flatnonzero(scores > 0)
+        if not len(candidates):
+            return []
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:limit]]
+        return [(self._docs[self._ids[index]][2], round(float(scores[index]), 4)) for index in top]
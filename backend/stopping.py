@@ -0,0 +1,81 @@
+import os
+from typing import Any, Dict, List, Optional
+
+# Stop optimizing once scores stop improving (see plateau_reason)
+EARLY_STOPPING = os.getenv("EARLY_STOPPING", "true").lower() != "false"
+# Evaluations in a row that must fail to beat the best score before the run stops
+PLATEAU_PATIENCE = int(os.getenv("PLATEAU_PATIENCE", "2"))
+# Points a new score has to add over the best so far to count as an improvement
+MIN_SCORE_GAIN = int(os.getenv("MIN_SCORE_GAIN", "1"))
+
+# Default per-request budgets (0 = unlimited); requests can set their own
+RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "0"))
+RUN_MAX_TOKENS = int(os.getenv("RUN_MAX_TOKENS", "0"))
+RUN_MAX_COST_USD = float(os.getenv("RUN_MAX_COST_USD", "0"))
+
+# Why a run stopped optimizing
+STOP_APPROVED = "approved"
+STOP_MAX_ITERATIONS = "max_iterations"
+STOP_PLATEAU = "plateau"
+STOP_REGRESSION = "regression"
+STOP_DEADLINE = "deadline"
+STOP_TOKEN_BUDGET = "token_budget"
+STOP_COST_BUDGET = "cost_budget"
+
+
+def default_budget() -> Dict[str, Any]:
+    return {
+        "early_stopping": EARLY_STOPPING,
+        "deadline_seconds": RUN_DEADLINE_SECONDS or None,
+        "max_tokens": RUN_MAX_TOKENS or None,
+        "max_cost_usd": RUN_MAX_COST_USD or None,
+    }
+
+
+def plateau_reason(scores: List[int], patience: int = PLATEAU_PATIENCE, min_gain: int = MIN_SCORE_GAIN) -> Optional[str]:
+    """STOP_PLATEAU or STOP_REGRESSION when the last `patience` scores didn't beat the best before them"""
+    if patience < 1 or len(scores) <= patience:
+        return None
+    best_before = max(scores[:-patience])
+    recent = scores[-patience:]
+    if max(recent) >= best_before + min_gain:
+        return None
+    return STOP_REGRESSION if recent[-1] < best_before else STOP_PLATEAU
+
+
+def budget_reason(budget: Dict[str, Any], spent: Dict[str, float], totals: Dict[str, float], rounds: int) -> Optional[str]:
+    """The budget another optimize/evaluate round would overrun, if any.
+
+    `spent` is what the current request used so far (seconds, tokens,
+    cost_usd); `totals` is what the article used over all its rounds, so
+    totals / rounds projects the cost of the next round.
+    """
+    limits = (
+        (STOP_DEADLINE, "seconds", budget.get("deadline_seconds")),
+        (STOP_TOKEN_BUDGET, "tokens", budget.get("max_tokens")),
+        (STOP_COST_BUDGET, "cost_usd", budget.get("max_cost_usd")),
+    )
+    for reason, key, limit in limits:
+        if not limit:
+            continue
+        projected = totals.get(key, 0) / rounds if rounds else 0
+        if spent.get(key, 0) + projected > limit:
+            return reason
+    return None
+
+
+def stop_reason(score: int, evaluation: str, iteration: int, max_iteration: int, scores: List[int],
+                budget: Dict[str, Any], spent: Optional[Dict[str, float]] = None,
+                totals: Optional[Dict[str, float]] = None) -> Optional[str]:
+    """Why the run should stop after this evaluation, or None to keep optimizing"""
+    if score >= 9 and evaluation == "approved":
+        return STOP_APPROVED
+    if iteration >= max_iteration:
+        return STOP_MAX_ITERATIONS
+    if budget.get("early_stopping", EARLY_STOPPING):
+        reason = plateau_reason(scores)
+        if reason is not None:
+            return reason
+    if spent is not None and totals is not None:
+        return budget_reason(budget, spent, totals, len(scores))
+    return None
@@ -0,0 +1,385 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiofiles
+
+import encoding
+from article_index import PREVIEW_CHARS, SUMMARY_FIELDS, ArticleIndex, finish_page, needs_review, page_filters
+from revisions import compact_history
+from search_index import SEARCH_SCHEMA, finish_search, index_article, run_search, search_filters, unindex_article
+
+# "file" keeps one JSON file per article, "sqlite" stores everything in one WAL-mode database
+ARTICLE_STORAGE = os.getenv("ARTICLE_STORAGE", "file")
+
+# History lists that are stored as revisions (one row per entry in the SQLite store)
+HISTORY_FIELDS = ("feedback_history", "human_feedback_history")
+# Row kind for the reverse deltas of the compact article history (see revisions.py)
+ARTICLE_DELTA_KIND = "article_delta"
+
+Page = Tuple[List[Dict[str, Any]], Optional[str]]
+SearchPage = Tuple[List[Dict[str, Any]], Optional[int]]
+
+
+class ArticleStore(ABC):
+    """Persistence interface for article records (the dicts served by the API)"""
+
+    async def startup(self):
+        """Prepare the store when the app starts (build indexes, run schema setup)"""
+
+    @abstractmethod
+    async def save(self, article: Dict[str, Any]):
+        """Insert or update an article record"""
+
+    @abstractmethod
+    async def get(self, article_id: str) -> Optional[Dict[str, Any]]:
+        """Load a full article record, or None if it doesn't exist"""
+
+    @abstractmethod
+    async def delete(self, article_id: str) -> bool:
+        """Delete an article. Returns False if it didn't exist."""
+
+    async def version(self, article_id: str) -> Optional[str]:
+        """A token that changes whenever the article is saved, or None if it doesn't exist.
+
+        Stores override this with something cheaper than loading the record.
+        """
+        article = await self.get(article_id)
+        if article is None:
+            return None
+        return hashlib.sha256(json.dumps(article, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @abstractmethod
+    async def list_summaries(self, limit: int = 50, cursor: Optional[str] = None, status: Optional[str] = None,
+                             min_score: Optional[int] = None, max_score: Optional[int] = None) -> Page:
+        """Return one page of article summaries (newest first) and the next cursor"""
+
+    @abstractmethod
+    async def search(self, query: str, limit: int = 20, offset: int = 0, status: Optional[str] = None,
+                     min_score: Optional[int] = None, max_score: Optional[int] = None) -> SearchPage:
+        """Return one page of summaries matching an FTS5 query (best match first), with snippets, and the next offset"""
+
+    def close(self):
+        """Release any resources held by the store"""
+
+
+class JsonFileStore(ArticleStore):
+    """One `<id>.json` file per article plus a SQLite metadata index for listing"""
+
+    def __init__(self, articles_dir: str, index_path: Optional[str] = None):
+        self.articles_dir = articles_dir
+        os.makedirs(articles_dir, exist_ok=True)
+        self.index = ArticleIndex(index_path or os.path.join(articles_dir, "index.sqlite3"))
+
+    def path_for(self, article_id: str) -> str:
+        return os.path.join(self.articles_dir, f"{article_id}.json")
+
+    async def startup(self):
+        await asyncio.to_thread(self.index.rebuild, self.articles_dir)
+
+    async def save(self, article: Dict[str, Any]):
+        filepath = self.path_for(article["id"])
+        # Write to a temporary file first so readers never see a half-written article;
+        # unique per write, so concurrent saves of one article don't share it
+        tmp_path = f"{filepath}.{uuid.uuid4().hex}.tmp"
+        try:
+            async with aiofiles.open(tmp_path, 'wb') as f:
+                await f.write(encoding.dumps(article))
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        stat = os.stat(filepath)
+        await asyncio.to_thread(self.index.upsert, article, stat.st_size, stat.st_mtime)
+
+    async def get(self, article_id: str) -> Optional[Dict[str, Any]]:
+        filepath = self.path_for(article_id)
+        if not os.path.exists(filepath):
+            return None
+        async with aiofiles.open(filepath, 'rb') as f:
+            content = await f.read()
+        return encoding.loads(content)
+
+    async def version(self, article_id: str) -> Optional[str]:
+        try:
+            stat = os.stat(self.path_for(article_id))
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+    async def delete(self, article_id: str) -> bool:
+        filepath = self.path_for(article_id)
+        if not os.path.exists(filepath):
+            return False
+        os.remove(filepath)
+        await asyncio.to_thread(self.index.remove, article_id)
+        return True
+
+    async def list_summaries(self, limit: int = 50, cursor: Optional[str] = None, status: Optional[str] = None,
+                             min_score: Optional[int] = None, max_score: Optional[int] = None) -> Page:
+        return await asyncio.to_thread(
+            self.index.query,
+            limit=limit, cursor=cursor, status=status, min_score=min_score, max_score=max_score
+        )
+
+    async def search(self, query: str, limit: int = 20, offset: int = 0, status: Optional[str] = None,
+                     min_score: Optional[int] = None, max_score: Optional[int] = None) -> SearchPage:
+        return await asyncio.to_thread(
+            self.index.search,
+            query, limit=limit, offset=offset, status=status, min_score=min_score, max_score=max_score
+        )
+
+    def close(self):
+        self.index.close()
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    final_article TEXT NOT NULL DEFAULT '',
+    evaluation TEXT NOT NULL DEFAULT '',
+    feedback TEXT NOT NULL DEFAULT '',
+    score INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT '',
+    iteration INTEGER NOT NULL DEFAULT 0,
+    max_iteration INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT '',
+    updated_at TEXT NOT NULL DEFAULT '',
+    needs_human_feedback INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_articles_created ON articles (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_articles_status ON articles (status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_articles_score ON articles (score, created_at DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS article_revisions (
+    article_id TEXT NOT NULL REFERENCES articles (id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (article_id, kind, seq)
+) WITHOUT ROWID;
+"""
+
+# Columns of the articles table that map 1:1 onto record fields
+ARTICLE_COLUMNS = (
+    "id", "topic", "final_article", "evaluation", "feedback", "score", "status",
+    "iteration", "max_iteration", "created_at", "needs_human_feedback",
+)
+
+
+class SQLiteStore(ArticleStore):
+    """Single-database store (WAL mode) with history kept as append-only revision rows.
+
+    Updating an article only inserts the history entries that are new since
+    the last save instead of rewriting every previous revision.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SQLITE_SCHEMA)
+            self._conn.executescript(SEARCH_SCHEMA)
+            self._conn.commit()
+
+    async def startup(self):
+        await asyncio.to_thread(self.backfill_search)
+
+    async def save(self, article: Dict[str, Any]):
+        await asyncio.to_thread(self.save_many, [article])
+
+    async def get(self, article_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_sync, article_id)
+
+    async def delete(self, article_id: str) -> bool:
+        return await asyncio.to_thread(self.delete_sync, article_id)
+
+    async def version(self, article_id: str) -> Optional[str]:
+        return await asyncio.to_thread(self.version_sync, article_id)
+
+    async def list_summaries(self, limit: int = 50, cursor: Optional[str] = None, status: Optional[str] = None,
+                             min_score: Optional[int] = None, max_score: Optional[int] = None) -> Page:
+        return await asyncio.to_thread(self.list_summaries_sync, limit, cursor, status, min_score, max_score)
+
+    async def search(self, query: str, limit: int = 20, offset: int = 0, status: Optional[str] = None,
+                     min_score: Optional[int] = None, max_score: Optional[int] = None) -> SearchPage:
+        return await asyncio.to_thread(self.search_sync, query, limit, offset, status, min_score, max_score)
+
+    def save_many(self, articles: Iterable[Dict[str, Any]]) -> int:
+        """Upsert several records in one transaction"""
+        count = 0
+        with self._lock, self._conn:
+            for article in articles:
+                self._write_article(article)
+                count += 1
+        return count
+
+    def _write_article(self, article: Dict[str, Any]):
+        now = datetime.now().isoformat()
+        row = {column: article.get(column) for column in ARTICLE_COLUMNS}
+        row["final_article"] = row["final_article"] or ""
+        row["score"] = row["score"] or 0
+        # The record's own flag; summaries apply the list view's heuristic on top (see _flag_for_review)
+        row["needs_human_feedback"] = int(bool(article.get("needs_human_feedback")))
+        row["updated_at"] = now
+        row["size"] = len(row["final_article"])
+        # Article revisions: the deltas become append-only rows, the latest text stays with the record
+        history = compact_history(article.get("article_revisions") or article.get("article_history"))
+        extra = {
+            key: value for key, value in article.items()
+            if key not in ARTICLE_COLUMNS and key not in HISTORY_FIELDS and key != "article_history"
+        }
+        extra["article_revisions"] = {"latest": history["latest"], "deltas": []}
+        row["extra"] = encoding.dumps(extra).decode("utf-8")
+        for key in ("topic", "evaluation", "feedback", "status", "created_at"):
+            row[key] = row[key] or ""
+        for key in ("iteration", "max_iteration"):
+            row[key] = row[key] or 0
+
+        columns = ", ".join(row)
+        placeholders = ", ".join(f":{key}" for key in row)
+        updates = ", ".join(f"{key} = excluded.{key}" for key in row if key != "id")
+        self._conn.execute(
+            f"INSERT INTO articles ({columns}) VALUES ({placeholders}) ON CONFLICT (id) DO UPDATE SET {updates}",
+            row
+        )
+
+        # Full-text rows written before article history was stored as deltas are superseded
+        self._conn.execute(
+            "DELETE FROM article_revisions WHERE article_id = ? AND kind = 'article_history'", (article["id"],)
+        )
+        revisions = {kind: article.get(kind) or [] for kind in HISTORY_FIELDS}
+        revisions[ARTICLE_DELTA_KIND] = [json.dumps(delta) for delta in history["deltas"]]
+        for kind, entries in revisions.items():
+            stored = self._conn.execute(
+                "SELECT COUNT(*) FROM article_revisions WHERE article_id = ? AND kind = ?",
+                (article["id"], kind)
+            ).fetchone()[0]
+            if stored > len(entries):
+                # History was rewritten rather than extended; drop the stale tail
+                self._conn.execute(
+                    "DELETE FROM article_revisions WHERE article_id = ? AND kind = ? AND seq >= ?",
+                    (article["id"], kind, len(entries))
+                )
+                stored = len(entries)
+            self._conn.executemany(
+                "INSERT INTO article_revisions (article_id, kind, seq, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(article["id"], kind, seq, entries[seq], now) for seq in range(stored, len(entries))]
+            )
+        index_article(self._conn, article)
+
+    def get_sync(self, article_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM articles WHERE id = ?", (article_id,)).fetchone()
+            if row is None:
+                return None
+            revisions = self._conn.execute(
+                "SELECT kind, content FROM article_revisions WHERE article_id = ? ORDER BY kind, seq",
+                (article_id,)
+            ).fetchall()
+
+        article = encoding.loads(row["extra"])
+        article.update({column: row[column] for column in ARTICLE_COLUMNS})
+        article["needs_human_feedback"] = bool(row["needs_human_feedback"])
+        entries: Dict[str, List[str]] = {}
+        for revision in revisions:
+            entries.setdefault(revision["kind"], []).append(revision["content"])
+        for kind in HISTORY_FIELDS:
+            article[kind] = entries.get(kind, [])
+        if "article_history" in entries:
+            # Written before article history was stored as deltas
+            article["article_revisions"] = compact_history(entries["article_history"])
+        else:
+            article.setdefault("article_revisions", {"latest": None, "deltas": []})
+            article["article_revisions"]["deltas"] = [json.loads(delta) for delta in entries.get(ARTICLE_DELTA_KIND, [])]
+        return article
+
+    def version_sync(self, article_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT updated_at FROM articles WHERE id = ?", (article_id,)).fetchone()
+        return row["updated_at"] if row is not None else None
+
+    def delete_sync(self, article_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM articles WHERE id = ?", (article_id,))
+            unindex_article(self._conn, article_id)
+        return cursor.rowcount > 0
+
+    def list_summaries_sync(self, limit: int = 50, cursor: Optional[str] = None, status: Optional[str] = None,
+                            min_score: Optional[int] = None, max_score: Optional[int] = None) -> Page:
+        where, params = page_filters(cursor, status, min_score, max_score)
+        fields = [
+            f"substr(final_article, 1, {PREVIEW_CHARS}) AS preview" if field == "preview" else field
+            for field in SUMMARY_FIELDS
+        ]
+        sql = (
+            f"SELECT {', '.join(fields)} FROM articles {where} "
+            "ORDER BY created_at DESC, id DESC LIMIT ?"
+        )
+        with self._lock:
+            rows = [dict(row) for row in self._conn.execute(sql, params + [limit + 1])]
+        return self._flag_for_review(*finish_page(rows, limit))
+
+    def search_sync(self, query: str, limit: int = 20, offset: int = 0, status: Optional[str] = None,
+                    min_score: Optional[int] = None, max_score: Optional[int] = None) -> SearchPage:
+        where, params = search_filters(status, min_score, max_score, table="articles")
+        columns = [
+            f"substr(articles.final_article, 1, {PREVIEW_CHARS}) AS preview" if field == "preview"
+            else f"articles.{field} AS {field}"
+            for field in SUMMARY_FIELDS
+        ]
+        with self._lock:
+            rows = run_search(self._conn, "articles", columns, query, where, params, limit, offset)
+        return self._flag_for_review(*finish_search(rows, limit, offset))
+
+    @staticmethod
+    def _flag_for_review(rows: List[Dict[str, Any]], next_page: Any) -> Tuple[List[Dict[str, Any]], Any]:
+        # The column holds the record's flag; summaries show the list view's (as the JSON store's index does)
+        for row in rows:
+            row["needs_human_feedback"] = needs_review(row)
+        return rows, next_page
+
+    def backfill_search(self) -> int:
+        """Index articles stored before full-text search existed"""
+        with self._lock:
+            missing = [
+                row[0] for row in self._conn.execute(
+                    "SELECT id FROM articles WHERE id NOT IN (SELECT id FROM search_docs)"
+                )
+            ]
+        for article_id in missing:
+            article = self.get_sync(article_id)
+            if article is not None:
+                with self._lock, self._conn:
+                    index_article(self._conn, article)
+        return len(missing)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_store(articles_dir: str) -> ArticleStore:
+    """Build the store selected by the ARTICLE_STORAGE environment variable"""
+    if ARTICLE_STORAGE == "sqlite":
+        return SQLiteStore(os.getenv("ARTICLE_DB_PATH", os.path.join(articles_dir, "articles.sqlite3")))
+    if ARTICLE_STORAGE == "file":
+        return JsonFileStore(articles_dir, os.getenv("ARTICLE_INDEX_PATH"))
+    raise ValueError(f"Unknown ARTICLE_STORAGE: {ARTICLE_STORAGE}")
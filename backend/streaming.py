@@ -0,0 +1,94 @@
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+# Graph nodes whose LLM output is article text worth streaming token by token
+TOKEN_STREAM_NODES = ("generate", "write_section", "optimize")
+
+# Seconds of silence after which the SSE stream sends a keep-alive comment
+SSE_HEARTBEAT_SECONDS = 15.0
+
+Publish = Callable[..., None]
+
+
+def _word_count(text: str) -> int:
+    return len(text.split()) if text else 0
+
+
+def _summarize_update(node: str, update: Dict[str, Any]) -> Dict[str, Any]:
+    """Pick the small, UI-relevant fields out of a node's state update"""
+    summary: Dict[str, Any] = {"node": node}
+    if "article" in update:
+        summary["words"] = _word_count(update["article"])
+    for key in ("iteration", "score", "evaluation", "feedback", "human_feedback_requested", "stop_reason"):
+        if key in update:
+            summary[key] = update[key]
+    return summary
+
+
+async def stream_workflow(workflow, workflow_input: Any, publish: Publish,
+                          config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Run the workflow with astream, publishing progress events, and return the final state.
+
+    workflow_input is either an initial state or a Command resuming a paused run.
+
+    Events sent through publish(event, data, replay=...):
+    - node_start / node_end: graph transitions (generate -> evaluate -> optimize, or
+      outline -> write_section x N -> assemble for sectioned drafts)
+    - evaluation: score, verdict and stop reason (if the run stops there) for every iteration
+    - token: article text from generate/write_section/optimize as it is decoded, with the id of the
+      model call attempt that produced it (not replayed)
+    - discard: a model call attempt failed or lost a hedge race; drop the tokens it streamed, its
+      retry streams the text again (not replayed)
+    - interrupt: the run paused for human review
+    """
+    final_state: Dict[str, Any] = dict(workflow_input) if isinstance(workflow_input, dict) else {}
+    iteration = final_state.get("iteration", 1)
+
+    async for mode, chunk in workflow.astream(workflow_input, config=config, stream_mode=["tasks", "messages", "values", "custom"]):
+        if mode == "values":
+            final_state = chunk
+            iteration = chunk.get("iteration", iteration)
+        elif mode == "tasks":
+            if "result" not in chunk:
+                publish("node_start", {"node": chunk["name"], "iteration": iteration})
+                continue
+            if chunk.get("interrupts"):
+                publish("interrupt", {"node": chunk["name"], "iteration": iteration})
+                continue
+            if chunk.get("error"):
+                publish("node_error", {"node": chunk["name"], "iteration": iteration, "error": str(chunk["error"])})
+                continue
+            update = dict(chunk.get("result") or [])
+            summary = _summarize_update(chunk["name"], update)
+            summary.setdefault("iteration", iteration)
+            publish("node_end", summary)
+            if chunk["name"] == "evaluate":
+                publish("evaluation", {
+                    "iteration": iteration,
+                    "score": update.get("score"),
+                    "evaluation": update.get("evaluation"),
+                    "words": (update.get("metrics") or {}).get("words"),
+                    "stop_reason": update.get("stop_reason"),
+                })
+        elif mode == "messages":
+            message, metadata = chunk
+            node = metadata.get("langgraph_node")
+            if node in TOKEN_STREAM_NODES and message.content:
+                publish("token", {"node": node, "iteration": iteration, "text": message.content,
+                                  "attempt": metadata.get("llm_attempt")}, replay=False)
+        elif mode == "custom" and isinstance(chunk, dict) and chunk.get("event") == "discard":
+            publish("discard", {"iteration": iteration, "attempt": chunk["attempt"]}, replay=False)
+
+    return final_state
+
+
+def format_sse(message: Dict[str, Any]) -> str:
+    """Encode a job event as a Server-Sent Events frame"""
+    if message["event"] == "ping":
+        return ": ping\n\n"
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+async def sse_stream(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    async for message in events:
+        yield format_sse(message)
@@ -0,0 +1,180 @@
+import contextvars
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+try:
+    from opentelemetry import trace
+    tracer = trace.get_tracer("article-workflow")
+except ImportError:  # OpenTelemetry is optional; spans are skipped without it
+    tracer = None
+
+# USD per million tokens (prompt, completion). MODEL_PRICES (JSON) overrides or adds models.
+MODEL_PRICES: Dict[str, tuple] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+MODEL_PRICES.update({name: tuple(prices) for name, prices in json.loads(os.getenv("MODEL_PRICES", "{}")).items()})
+
+DURATION_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 90, 120, 180, 300, 600)
+
+NODE_DURATION = Histogram(
+    "article_node_duration_seconds", "Time spent in a workflow node", ["node"], buckets=DURATION_BUCKETS)
+LLM_DURATION = Histogram(
+    "article_llm_call_duration_seconds", "Latency of model calls (cache hits excluded)", ["role", "model"],
+    buckets=DURATION_BUCKETS)
+LLM_CALLS = Counter(
+    "article_llm_calls_total", "Model calls by outcome (ok, error, timeout, cache_hit)", ["role", "model", "outcome"])
+LLM_TOKENS = Counter(
+    "article_llm_tokens_total", "Tokens used by model calls", ["role", "model", "type"])
+LLM_COST = Counter(
+    "article_llm_cost_usd_total", "Estimated spend on model calls in USD", ["role", "model"])
+LLM_RETRIES = Counter(
+    "article_llm_retries_total", "Model calls retried after a transient error", ["role", "reason"])
+LLM_HEDGES = Counter(
+    "article_llm_hedges_total", "Duplicate requests raced against slow model calls, by which one won", ["role", "winner"])
+LLM_CIRCUIT_OPEN = Gauge(
+    "article_llm_circuit_open", "1 while a model's circuit breaker is open", ["model"])
+LLM_ENDPOINT_CALLS = Counter(
+    "article_llm_endpoint_calls_total", "Model calls per provider endpoint by outcome (ok, error, rate_limited)", ["endpoint", "outcome"])
+LLM_ENDPOINT_EJECTED = Gauge(
+    "article_llm_endpoint_ejected", "1 while a provider endpoint is ejected from the pool", ["endpoint"])
+RUN_ITERATIONS = Histogram(
+    "article_run_iterations", "Evaluate/optimize iterations per finished run", buckets=(1, 2, 3, 4, 5, 6, 7, 8, 10, 15))
+RUNS = Counter(
+    "article_runs_total", "Workflow runs that reached an end state", ["outcome"])
+JOBS_ACTIVE = Gauge("article_jobs_active", "Workflow jobs currently running")
+JOBS_QUEUED = Gauge("article_jobs_queued", "Workflow jobs waiting for a slot")
+JOBS_COALESCED = Counter(
+    "article_jobs_coalesced_total", "Generation requests served by an existing job (identical in-flight request or repeated Idempotency-Key)")
+LLM_CALLS_WAITING = Gauge("article_llm_calls_waiting", "Model calls waiting for rate-limit budget")
+
+# Breakdown of the run the current task belongs to (set by the job runner)
+current_run: contextvars.ContextVar[Optional["RunRecorder"]] = contextvars.ContextVar("current_run", default=None)
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class RunRecorder:
+    """Per-article timing and token totals, stored with the article record"""
+
+    def __init__(self, previous: Optional[Dict[str, Any]] = None):
+        previous = previous or {}
+        self.started = time.monotonic()
+        self.elapsed_before = previous.get("total_seconds", 0.0)
+        self.nodes: Dict[str, Dict[str, float]] = {
+            name: dict(values) for name, values in (previous.get("nodes") or {}).items()
+        }
+        self.llm: Dict[str, Dict[str, float]] = {
+            role: dict(values) for role, values in (previous.get("llm") or {}).items()
+        }
+        # Usage of this request alone, for per-request budgets
+        self.request_tokens = 0
+        self.request_cost = 0.0
+
+    def add_node(self, node: str, seconds: float):
+        entry = self.nodes.setdefault(node, {"calls": 0, "seconds": 0.0})
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+
+    def add_llm_call(self, role: str, seconds: float, prompt_tokens: int, completion_tokens: int,
+                     cost: float, cached: bool = False):
+        entry = self.llm.setdefault(role, {
+            "calls": 0, "cached": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+        })
+        entry["calls"] += 1
+        entry["cached"] += int(cached)
+        entry["seconds"] += seconds
+        entry["prompt_tokens"] += prompt_tokens
+        entry["completion_tokens"] += completion_tokens
+        entry["cost_usd"] += cost
+        self.request_tokens += prompt_tokens + completion_tokens
+        self.request_cost += cost
+
+    def spent(self) -> Dict[str, float]:
+        """Seconds, tokens and cost of this request (a resumed run starts from zero)"""
+        return {"seconds": time.monotonic() - self.started, "tokens": self.request_tokens, "cost_usd": self.request_cost}
+
+    def totals(self) -> Dict[str, float]:
+        """Seconds, tokens and cost of the article over every request of the run"""
+        tokens = sum(values["prompt_tokens"] + values["completion_tokens"] for values in self.llm.values())
+        return {"seconds": self.elapsed_before + time.monotonic() - self.started, "tokens": tokens,
+                "cost_usd": sum(values["cost_usd"] for values in self.llm.values())}
+
+    def to_dict(self) -> Dict[str, Any]:
+        def rounded(values: Dict[str, float]) -> Dict[str, float]:
+            return {key: round(value, 6) if isinstance(value, float) else value for key, value in values.items()}
+
+        return {
+            "total_seconds": round(self.elapsed_before + time.monotonic() - self.started, 3),
+            "nodes": {name: rounded(values) for name, values in self.nodes.items()},
+            "llm": {role: rounded(values) for role, values in self.llm.items()},
+            "prompt_tokens": sum(values["prompt_tokens"] for values in self.llm.values()),
+            "completion_tokens": sum(values["completion_tokens"] for values in self.llm.values()),
+            "cost_usd": round(sum(values["cost_usd"] for values in self.llm.values()), 6),
+        }
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """OpenTelemetry span when the SDK is installed, otherwise nothing"""
+    if tracer is None:
+        yield
+        return
+    with tracer.start_as_current_span(name, attributes={key: value for key, value in attributes.items() if value is not None}):
+        yield
+
+
+def instrument_node(name: str):
+    """Decorator for async graph nodes: duration histogram, run breakdown and a span"""
+    def decorator(node):
+        @functools.wraps(node)
+        async def wrapper(state):
+            started = time.monotonic()
+            try:
+                with span(f"node.{name}", node=name):
+                    return await node(state)
+            finally:
+                seconds = time.monotonic() - started
+                NODE_DURATION.labels(node=name).observe(seconds)
+                recorder = current_run.get()
+                if recorder is not None:
+                    recorder.add_node(name, seconds)
+        return wrapper
+    return decorator
+
+
+def record_llm_call(role: str, model: str, seconds: float, usage: Optional[Dict[str, Any]], outcome: str = "ok"):
+    """Count one model call in the Prometheus metrics and the current run's breakdown"""
+    LLM_CALLS.labels(role=role, model=model, outcome=outcome).inc()
+    prompt_tokens = (usage or {}).get("input_tokens", 0)
+    completion_tokens = (usage or {}).get("output_tokens", 0)
+    cost = call_cost(model, prompt_tokens, completion_tokens)
+    if outcome != "cache_hit":
+        LLM_DURATION.labels(role=role, model=model).observe(seconds)
+        LLM_TOKENS.labels(role=role, model=model, type="prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(role=role, model=model, type="completion").inc(completion_tokens)
+        LLM_COST.labels(role=role, model=model).inc(cost)
+    recorder = current_run.get()
+    if recorder is not None:
+        if outcome == "cache_hit":
+            recorder.add_llm_call(role, seconds, 0, 0, 0.0, cached=True)
+        else:
+            recorder.add_llm_call(role, seconds, prompt_tokens, completion_tokens, cost)
+
+
+def record_run_end(outcome: str, iterations: Optional[int]):
+    RUNS.labels(outcome=outcome).inc()
+    if outcome == "completed" and iterations:
+        RUN_ITERATIONS.observe(iterations)
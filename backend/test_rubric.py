@@ -0,0 +1,9 @@
+from rubric import DIMENSIONS, extracts
+
+
+def test_extracts_article_ending_in_bare_heading():
+    # Truncated model output often stops right after a heading
+    parts = extracts("# T\n\nintro\n\n## A\n\ntext 2024\n\n## Conclusion")
+    assert set(parts) == {dimension.name for dimension in DIMENSIONS}
+    assert "text 2024" in parts["research"]
+    assert "## Conclusion" in parts["writing"]
@@ -1,29 +1,161 @@
 from langgraph.graph import StateGraph, START, END
-from typing import TypedDict, Literal, Annotated
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
+from langgraph.config import get_stream_writer
+from langgraph.types import interrupt, Send
+from typing import TypedDict, Literal, Annotated, List, Optional
+from langchain_core.messages import AIMessage, SystemMessage, HumanMessage
 import operator
 from pydantic import BaseModel, Field
-from dotenv import load_dotenv
 import os
-
-# Load environment variables
-load_dotenv()
-
-# Initialize LLMs - Using faster models for quicker generation
-generator_llm = ChatOpenAI(model='gpt-4o-mini', temperature=0.7)
-evaluator_llm = ChatOpenAI(model='gpt-4o-mini', temperature=0.3)
-optimizer_llm = ChatOpenAI(model='gpt-4o-mini', temperature=0.6)
+import asyncio
+import time
+import uuid
+from revisions import append_revision, get_revision, revision_count
+from sections import split_sections, join_sections, find_section, unwrap_article
+from llm_cache import LLMCache, cache_key, model_identity
+from scheduler import INTERACTIVE_LANE
+from models import models
+from providers import provider_pool
+from resilience import resilience, role_timeout
+from telemetry import current_run, instrument_node, record_llm_call, span
+from article_metrics import PRE_EVALUATION_GATE, compute_metrics, format_metrics, gate_failures, gate_feedback, gate_score
+from stopping import STOP_APPROVED, STOP_PLATEAU, STOP_REGRESSION, default_budget, stop_reason
+from rubric import DIMENSIONS, aggregate, extracts
+from routing import approval_model, can_escalate, model_for
+
+# LLMs come from the lazy model registry in models.py (roles: generator, evaluator, optimizer).
+# The environment is loaded by the entry point (main.py) before this module is imported.
+
+# Sectioned generation: how many section writers run at once (per run)
+SECTION_WRITER_CONCURRENCY = int(os.getenv("SECTION_WRITER_CONCURRENCY", "6"))
+# Length the sectioned draft aims for, split across the outline's sections
+TARGET_ARTICLE_WORDS = 3500
+
+# Incremental optimization: how many sections are rewritten per round and how many at once
+MAX_SECTION_REWRITES = int(os.getenv("MAX_SECTION_REWRITES", "5"))
+SECTION_REWRITE_CONCURRENCY = int(os.getenv("SECTION_REWRITE_CONCURRENCY", "4"))
 
 # Pydantic model for structured evaluation
+class SectionFeedback(BaseModel):
+    heading: str = Field(..., description="Exact text of the H2/H3 heading of the section, without the leading #.")
+    feedback: str = Field(..., description="Specific changes this section needs.")
+
 class ArticleEvaluation(BaseModel):
     evaluation: Literal["approved", "needs_improvement", "needs_human_review"] = Field(..., description="Final evaluation result.")
     feedback: str = Field(..., description="Detailed, specific feedback for the medium.com article.")
     score: int = Field(..., description="Quality score from 1-10, where 10 is publication-ready.")
     human_feedback_requested: bool = Field(..., description="Whether human feedback is needed.")
-
-# Structured evaluator
-structured_evaluator_llm = evaluator_llm.with_structured_output(ArticleEvaluation)
+    section_feedback: List[SectionFeedback] = Field(default_factory=list, description="Sections that need the most work, weakest first. Leave empty unless asked for.")
+
+class DimensionEvaluation(BaseModel):
+    score: int = Field(..., description="Score for this rubric dimension only, 1-10.")
+    feedback: str = Field(..., description="Specific criticism and fixes for this dimension only.")
+    section_feedback: List[SectionFeedback] = Field(default_factory=list, description="Sections that need the most work on this dimension, weakest first. Leave empty unless asked for.")
+
+class OutlineSection(BaseModel):
+    heading: str = Field(..., description="H2 heading of the section, without the leading ##.")
+    brief: str = Field(..., description="What the section covers: key points, data, examples and expert angles.")
+
+class ArticleOutline(BaseModel):
+    title: str = Field(..., description="Compelling article title.")
+    sections: List[OutlineSection] = Field(..., description="8-10 major sections in reading order, from the hook to the conclusion.")
+
+# Response cache for the model calls below, keyed on model settings + prompt
+llm_cache = LLMCache()
+# Rough output sizes used to reserve token budget before a call (articles vs structured verdicts)
+ESTIMATED_OUTPUT_TOKENS = 4000
+ESTIMATED_STRUCTURED_OUTPUT_TOKENS = 800
+
+def estimate_tokens(messages, schema=None):
+    prompt_tokens = sum(len(message.content) for message in messages) // 4
+    return prompt_tokens + (ESTIMATED_STRUCTURED_OUTPUT_TOKENS if schema else ESTIMATED_OUTPUT_TOKENS)
+
+def discard_streamed(attempt_id):
+    """Tell stream subscribers to drop the tokens a failed or abandoned model call attempt streamed"""
+    try:
+        write = get_stream_writer()
+    except RuntimeError:
+        # Called outside a graph run (e.g. batch_cli.py rescore): nothing was streamed
+        return
+    write({'event': 'discard', 'attempt': attempt_id})
+
+def run_options(state):
+    """Per-run settings that every model call needs (copied into Send payloads)"""
+    return {key: state[key] for key in ('use_cache', 'batch_id', 'priority', 'routing') if key in state}
+
+async def call_llm(role, messages, state, schema=None, model=None):
+    """Call a model on an endpoint of the provider pool, within that endpoint's rate limit, and record its usage.
+
+    Waiting calls are served in the run's scheduling lane. Each attempt is
+    bounded by the role's timeout and leases its own endpoint, so retries
+    and hedges (see resilience.py) land on whichever endpoint is least
+    loaded and not ejected at that moment.
+    """
+    model_name = model_identity(models.get(role, model_name=model))['model']
+    estimated = estimate_tokens(messages, schema)
+    timeout = role_timeout(role)
+
+    async def attempt(hedge):
+        async with provider_pool.lease(estimated, lane=state.get('batch_id') or INTERACTIVE_LANE,
+                                       priority=state.get('priority', 0)) as endpoint:
+            llm = models.structured(role, schema, endpoint, model) if schema else models.get(role, endpoint, model)
+            started = time.monotonic()
+            # A hedged duplicate doesn't stream its tokens, so clients don't see the text twice; streamed
+            # tokens carry the attempt id, so a retry can tell clients to drop what the failed attempt sent
+            attempt_id = uuid.uuid4().hex
+            config = {'callbacks': []} if hedge else {'metadata': {'llm_attempt': attempt_id}}
+            try:
+                with span(f"llm.{role}", role=role, model=model_name, endpoint=endpoint.name, hedge=hedge or None):
+                    response = await asyncio.wait_for(llm.ainvoke(messages, config=config), timeout)
+            except asyncio.CancelledError:
+                # Lost a hedge race (or the run was cancelled)
+                if not hedge:
+                    discard_streamed(attempt_id)
+                raise
+            except Exception as e:
+                record_llm_call(role, model_name, time.monotonic() - started, None,
+                                outcome='timeout' if isinstance(e, asyncio.TimeoutError) else 'error')
+                if not hedge:
+                    discard_streamed(attempt_id)
+                raise
+            raw = response
+            if isinstance(response, dict) and 'parsed' in response:
+                # Structured output with include_raw: the raw message carries the token usage
+                raw = response['raw']
+                if response.get('parsing_error'):
+                    record_llm_call(role, model_name, time.monotonic() - started, getattr(raw, 'usage_metadata', None), outcome='error')
+                    raise response['parsing_error']
+                response = response['parsed']
+            usage = getattr(raw, 'usage_metadata', None)
+            record_llm_call(role, model_name, time.monotonic() - started, usage)
+            endpoint.limiter.settle(estimated, usage.get('total_tokens') if usage else None)
+            return response
+
+    # With several endpoints the pool ejects failing ones instead of opening the model's circuit
+    return await resilience.call(role, model_name, attempt, circuit=not provider_pool.pooled)
+
+async def invoke_llm(role, messages, state, schema=None, model_name=None):
+    """Call a role's model through the response cache.
+
+    With a `schema` the model returns an instance of that Pydantic model
+    (structured output) instead of a message. `model_name` picks another
+    model than the role's configured one (see routing.py).
+    """
+    model = models.get(role, model_name=model_name)
+    if not llm_cache.enabled:
+        return await call_llm(role, messages, state, schema, model_name)
+    key = cache_key(model, messages, schema)
+    if state.get('use_cache', True):
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            record_llm_call(role, model_identity(model)['model'], 0.0, None, outcome='cache_hit')
+            return schema.model_validate_json(cached) if schema else AIMessage(content=cached)
+    else:
+        llm_cache.stats['bypassed'] += 1
+    response = await call_llm(role, messages, state, schema, model_name)
+    value = response.model_dump_json() if schema else response.content
+    if value:
+        await llm_cache.put(key, value)
+    return response
 
 # State definition
 class articleState(TypedDict):
@@ -36,11 +168,48 @@ class articleState(TypedDict):
     human_feedback_requested: bool
     iteration: int
     max_iteration: int
-    article_history: Annotated[list[str], operator.add]
+    # False skips cache lookups for this run (fresh responses still refresh the cache)
+    use_cache: bool
+    # Scheduling lane (batch runs share one) and priority inside it, for the rate limiter
+    batch_id: str
+    priority: int
+    # "single" writes the first draft in one call, "sectioned" plans an outline and writes sections in parallel
+    generate_mode: Literal["single", "sectioned"]
+    # Id and topic of the stored article on a similar topic whose text this run starts from (see similarity.py)
+    seeded_from: str
+    seeded_topic: str
+    outline: dict
+    draft_sections: Annotated[list[dict], operator.add]
+    # "full" rewrites the whole article each round, "incremental" only the sections the evaluator targets
+    optimize_mode: Literal["full", "incremental"]
+    # "single" scores the whole rubric in one call, "sharded" scores each rubric dimension in its own concurrent call
+    evaluate_mode: Literal["single", "sharded"]
+    # Per-dimension scores of the last sharded evaluation (see rubric.py); None when the gate decided the round
+    dimension_scores: Optional[dict]
+    section_feedback: list[dict]
+    # Mechanical measurements of the current draft (see article_metrics.py)
+    metrics: dict
+    # Compact history (latest text + reverse deltas); nodes still append [full_text]
+    article_history: Annotated[dict, append_revision]
     feedback_history: Annotated[list[str], operator.add]
     human_feedback_history: Annotated[list[str], operator.add]
-
-def generate_article(state: articleState):
+    # Early stopping and per-request deadline/token/cost caps (see stopping.py)
+    budget: dict
+    score_history: Annotated[list[int], operator.add]
+    # Best evaluated revision so far: score, revision number, evaluation, feedback
+    best: dict
+    # Set by evaluate when the run should stop optimizing (None = keep going)
+    stop_reason: str
+    # Revision number of the article the run ended with
+    returned_revision: int
+    # Model tier per step and escalation tiers (see routing.py)
+    routing: dict
+    # Set once scores plateaued and evaluate/optimize moved to the routing's plateau tier
+    escalated: bool
+    # Which model each step used, per revision: {revision, step, model[, score]}
+    revision_models: Annotated[list[dict], operator.add]
+
+async def generate_article(state: articleState):
     """Generate initial article with rigorous requirements"""
     messages = [
         SystemMessage(content="""You are a Pulitzer Prize-winning investigative journalist and top 0.1% Medium.com writer with 15+ years of experience. You specialize in creating deeply researched, groundbreaking articles that consistently go viral and receive 10K+ claps.
@@ -123,11 +292,144 @@ ONLY output the article in Markdown format - no explanations or commentary.
 """)
     ]
     
-    response = generator_llm.invoke(messages).content
-    return {'article': response, 'article_history': [response]}
+    model = model_for(state.get('routing'), 'generate', 'generator')
+    response = (await invoke_llm('generator', messages, state, model_name=model)).content
+    return {'article': response, 'article_history': [response],
+            'revision_models': [{'revision': 1, 'step': 'generate', 'model': model}]}
+
+def route_generation(state: articleState):
+    """Pick the first-draft strategy requested for this run"""
+    # A run seeded with a stored article on a similar topic skips drafting
+    if state.get('article'):
+        return 'seeded'
+    return 'sectioned' if state.get('generate_mode') == 'sectioned' else 'single'
+
+async def plan_outline(state: articleState):
+    """Plan the title and sections so they can be written in parallel"""
+    messages = [
+        SystemMessage(content="""You are a top 0.1% Medium.com writer and editor. You plan deeply researched long-form articles that are written section by section by a team of expert writers."""),
+        HumanMessage(content=f"""
+Plan a MASTERPIECE Medium.com article on: "{state['topic']}"
+
+The article must be at least 3,500 words across 8-10 major sections. Start with a section that hooks the reader (statistic, story, or bold claim) and end with a powerful conclusion. Cover research and recent data (2020-2024), expert insights, case studies, contrarian viewpoints, actionable frameworks and interactive elements (quizzes, checklists) between them.
+
+Each section is written independently, so make the briefs specific enough that sections don't overlap.
+""")
+    ]
+    model = model_for(state.get('routing'), 'outline', 'generator')
+    outline = await invoke_llm('generator', messages, state, schema=ArticleOutline, model_name=model)
+    return {'outline': outline.model_dump(), 'revision_models': [{'revision': 1, 'step': 'outline', 'model': model}]}
+
+def fan_out_sections(state: articleState):
+    """Send every outline section to its own writer; fall back to a single draft without an outline"""
+    sections = (state.get('outline') or {}).get('sections') or []
+    if not sections:
+        return 'generate'
+    return [
+        Send('write_section', {
+            'topic': state['topic'],
+            'outline': state['outline'],
+            'index': index,
+            **run_options(state),
+        })
+        for index in range(len(sections))
+    ]
+
+async def write_section(payload: dict):
+    """Write one section of the outlined article"""
+    outline = payload['outline']
+    section = outline['sections'][payload['index']]
+    target_words = max(TARGET_ARTICLE_WORDS // len(outline['sections']), 300)
+    table_of_contents = "\n".join(f"{number}. {item['heading']}" for number, item in enumerate(outline['sections'], 1))
+    messages = [
+        SystemMessage(content="""You are a Pulitzer Prize-winning investigative journalist and top 0.1% Medium.com writer. You are writing ONE section of a long-form article; other writers are writing the other sections at the same time.
+
+You write for an audience of sophisticated professionals who demand substance over style."""),
+        HumanMessage(content=f"""
+Article: "{outline['title']}" (topic: "{payload['topic']}")
+
+Table of contents:
+{table_of_contents}
+
+Write section {payload['index'] + 1}: "{section['heading']}"
+Brief: {section['brief']}
+
+## REQUIREMENTS:
+- About {target_words} words
+- Recent statistics, studies and data (2020-2024) with credible sources
+- Expert quotes and industry insights, case studies and real-world examples
+- Actionable frameworks, checklists or step-by-step guides where they fit
+- Use H3 subheadings, bullet points and emphasis for easy scanning
+- Stay within this section's brief; don't repeat what other sections cover
+- Start with exactly this heading line: ## {section['heading']}
 
-def evaluate_article(state: articleState):
+ONLY output the section in Markdown format - no explanations or commentary.
+""")
+    ]
+    model = model_for(payload.get('routing'), 'generate', 'generator')
+    text = (await invoke_llm('generator', messages, payload, model_name=model)).content
+    text = unwrap_article(text.strip())[1].strip()
+    if not text.startswith('#'):
+        text = f"## {section['heading']}\n\n{text}"
+    return {'draft_sections': [{'index': payload['index'], 'text': text}]}
+
+def assemble_article(state: articleState):
+    """Stitch the parallel sections into one article, in outline order"""
+    outline = state['outline']
+    written = {}
+    for item in state.get('draft_sections') or []:
+        written[item['index']] = item['text']
+    table_of_contents = "\n".join(f"{number}. {item['heading']}" for number, item in enumerate(outline['sections'], 1))
+    parts = [f"# {outline['title']}", f"## Table of Contents\n\n{table_of_contents}"]
+    parts += [written[index] for index in sorted(written)]
+    article = "\n\n".join(parts) + "\n"
+    return {'article': article, 'article_history': [article],
+            'revision_models': [{'revision': 1, 'step': 'generate', 'model': model_for(state.get('routing'), 'generate', 'generator')}]}
+
+SECTION_FEEDBACK_INSTRUCTIONS = f"""
+- section_feedback: up to {MAX_SECTION_REWRITES} H2/H3 sections that need the most work, weakest first. Copy each heading exactly as it appears in the article and give specific changes for that section only. Put article-wide issues in feedback.
+"""
+
+DIMENSION_SECTION_FEEDBACK_INSTRUCTIONS = """
+- section_feedback: up to 2 H2/H3 sections that are weakest on this dimension. Copy each heading exactly as it appears in the article and give specific changes for that section only.
+"""
+
+def gate_section_feedback(article: str, failures: dict):
+    """Point incremental rewrites at the thinnest sections when a draft fails the gate"""
+    sections = [section for section in split_sections(unwrap_article(article)[1]) if section.level == 2]
+    sections.sort(key=lambda section: section.words)
+    instructions = " ".join(failures.values())
+    return [
+        {'heading': section.heading, 'feedback': f"This section is one of the thinnest. Expand it with depth, data, cited sources and expert quotes. {instructions}"}
+        for section in sections[:MAX_SECTION_REWRITES]
+    ]
+
+async def score_article(state: articleState, model_name=None):
     """Evaluate with EXTREMELY strict standards - most articles should score 5-6"""
+    incremental = state.get('optimize_mode') == 'incremental'
+    metrics = compute_metrics(state['article'])
+
+    # Drafts that miss a hard, countable requirement go back to the optimizer without an LLM call
+    failures = gate_failures(metrics) if PRE_EVALUATION_GATE else {}
+    if failures:
+        feedback = gate_feedback(failures)
+        score = gate_score(failures)
+        return {
+            'evaluation': 'needs_improvement',
+            'feedback': feedback,
+            'score': score,
+            'human_feedback_requested': score < 7,
+            'feedback_history': [feedback],
+            'section_feedback': gate_section_feedback(state['article'], failures) if incremental else [],
+            'metrics': metrics,
+            # No dimension was scored; don't leave the previous round's scores next to the gate's
+            'dimension_scores': None,
+            'gated': True,
+        }
+
+    if state.get('evaluate_mode') == 'sharded':
+        return {**await score_dimensions(state, metrics, incremental, model_name), 'metrics': metrics}
+
     messages = [
         SystemMessage(content="""You are the MOST DEMANDING senior editor at Medium.com with 25+ years of experience. You have ZERO tolerance for mediocrity and only approve articles that are truly exceptional.
 
@@ -139,8 +441,13 @@ CRITICAL: You must be EXTREMELY critical. Most articles should score 5-6/10, not
         HumanMessage(content=f"""
 EVALUATE THIS ARTICLE WITH BRUTAL HONESTY AND EXTREME STRICTNESS:
 
+Requested Topic: "{state['topic']}"
+
 Article: "{state['article']}"
 
+## TOPIC FIT IS MANDATORY:
+The article must squarely cover the requested topic - its subject, angle and audience. An article written for a different topic (even a closely related one) scores 4 or below and is NEVER approved, however good it is otherwise.
+
 ## MANDATORY REQUIREMENTS (MISSING ANY = AUTOMATIC 5 OR BELOW):
 
 ### 1. RESEARCH QUALITY (25% of score) - MUST HAVE:
@@ -207,15 +514,18 @@ ONLY request human review when:
 
 BE BRUTALLY HONEST. Most articles should score 5-6/10. Only truly exceptional articles get 7+.
 
+## MEASURED METRICS (counted automatically - use these numbers, don't re-count):
+{format_metrics(metrics)}
+
 ### Respond in this exact format:
 - evaluation: "approved", "needs_improvement", or "needs_human_review"
 - score: [1-10] (be extremely strict - most should be 5-6)
 - feedback: Brutally honest analysis with specific, harsh criticism and improvement recommendations.
 - human_feedback_requested: true/false (set to true ONLY if score < 7 and human review is needed)
-""")
+""" + (SECTION_FEEDBACK_INSTRUCTIONS if incremental else ""))
     ]
 
-    response = structured_evaluator_llm.invoke(messages)
+    response = await invoke_llm('evaluator', messages, state, schema=ArticleEvaluation, model_name=model_name)
     
     # Automatically request human feedback for scores < 7
     human_feedback_needed = response.score < 7
@@ -225,15 +535,115 @@ BE BRUTALLY HONEST. Most articles should score 5-6/10. Only truly exceptional ar
         'feedback': response.feedback, 
         'score': response.score,
         'human_feedback_requested': human_feedback_needed,
-        'feedback_history': [response.feedback]
+        'feedback_history': [response.feedback],
+        'section_feedback': [item.model_dump() for item in response.section_feedback] if incremental else [],
+        'metrics': metrics,
     }
 
-def optimize_article(state: articleState):
-    """Optimize with surgical precision, incorporating human feedback"""
-    # Combine AI feedback with human feedback if available
-    combined_feedback = state['feedback']
-    if state.get('human_feedback'):
-        combined_feedback = f"""
+async def score_dimension(state: articleState, dimension, extract: str, metrics: dict, incremental: bool, model_name=None):
+    """Score one rubric dimension from the part of the article it is judged on"""
+    messages = [
+        SystemMessage(content=f"""You are the MOST DEMANDING senior editor at Medium.com with 25+ years of experience. You are judging ONE dimension of an article: {dimension.title.upper()}. Ignore every other quality of the article.
+
+Most articles score 5-6/10 on any dimension. Only truly exceptional work gets 7+, and 9-10 is extremely rare."""),
+        HumanMessage(content=f"""
+SCORE THE {dimension.title.upper()} OF THIS ARTICLE ON "{state['topic']}".
+
+TOPIC FIT IS MANDATORY: if the article is written for a different topic, angle or audience than "{state['topic']}", score 4 or below.
+
+## MUST HAVE:
+{dimension.checklist}
+
+## MEASURED METRICS OF THE WHOLE ARTICLE (counted automatically - use these numbers, don't re-count):
+{format_metrics(metrics)}
+
+## RELEVANT EXTRACT OF THE ARTICLE:
+{extract or "(nothing in the article is relevant to this dimension)"}
+
+### Respond with:
+- score: [1-10] for {dimension.title.lower()} only (be extremely strict - most should be 5-6)
+- feedback: Brutally honest, specific criticism and concrete fixes for this dimension only
+""" + (DIMENSION_SECTION_FEEDBACK_INSTRUCTIONS if incremental else ""))
+    ]
+    response = await invoke_llm('evaluator', messages, state, schema=DimensionEvaluation, model_name=model_name)
+    return {
+        'score': max(1, min(10, response.score)),
+        'feedback': response.feedback,
+        'section_feedback': [item.model_dump() for item in response.section_feedback] if incremental else [],
+    }
+
+async def score_dimensions(state: articleState, metrics: dict, incremental: bool, model_name=None):
+    """Score every rubric dimension concurrently and combine them with the rubric weights"""
+    parts = extracts(state['article'])
+    scores = await asyncio.gather(*[
+        score_dimension(state, dimension, parts[dimension.name], metrics, incremental, model_name) for dimension in DIMENSIONS
+    ])
+    result = aggregate({dimension.name: score for dimension, score in zip(DIMENSIONS, scores)}, MAX_SECTION_REWRITES)
+    return {
+        **result,
+        'human_feedback_requested': result['score'] < 7,
+        'feedback_history': [result['feedback']],
+        'section_feedback': result['section_feedback'] if incremental else [],
+    }
+
+async def evaluate_article(state: articleState):
+    """Score the draft, remember the best revision and decide whether another round is worth it"""
+    routing = state.get('routing')
+    revision = revision_count(state.get('article_history'))
+    model = model_for(routing, 'evaluate', 'evaluator', state.get('escalated', False))
+    update = await score_article(state, model)
+    gated = update.pop('gated', False)
+    revision_models = [] if gated else [{'revision': revision, 'step': 'evaluate', 'model': model, 'score': update['score']}]
+    # A cheaper evaluator's approval only counts once the routing's approval model confirms it
+    confirm_with = approval_model(routing, model) if update['evaluation'] == 'approved' else None
+    if confirm_with is not None:
+        update = await score_article(state, confirm_with)
+        update.pop('gated', False)
+        revision_models.append({'revision': revision, 'step': 'approve', 'model': confirm_with, 'score': update['score']})
+    scores = state.get('score_history', []) + [update['score']]
+    best = state.get('best')
+    if not best or update['score'] >= best['score']:
+        best = {
+            'score': update['score'],
+            'revision': revision,
+            'evaluation': update['evaluation'],
+            'feedback': update['feedback'],
+        }
+    recorder = current_run.get()
+    reason = stop_reason(
+        update['score'], update['evaluation'], state['iteration'], state['max_iteration'], scores,
+        state.get('budget') or default_budget(),
+        recorder.spent() if recorder is not None else None,
+        recorder.totals() if recorder is not None else None,
+    )
+    escalated = state.get('escalated', False)
+    if reason in (STOP_PLATEAU, STOP_REGRESSION) and not escalated and can_escalate(routing):
+        # Give the stronger plateau tier a chance before giving up on the run
+        escalated, reason = True, None
+    return {**update, 'score_history': [update['score']], 'best': best, 'stop_reason': reason,
+            'escalated': escalated, 'revision_models': revision_models}
+
+def finalize_article(state: articleState):
+    """End the run with the best-scoring revision rather than a later rewrite that scored lower"""
+    latest = revision_count(state.get('article_history'))
+    best = state.get('best')
+    if not best or best['revision'] == latest or best['score'] <= state['score']:
+        return {'returned_revision': latest}
+    article = get_revision(state['article_history'], best['revision'])
+    return {
+        'article': article,
+        'score': best['score'],
+        'evaluation': best['evaluation'],
+        'feedback': best['feedback'],
+        'metrics': compute_metrics(article),
+        'returned_revision': best['revision'],
+    }
+
+def combine_feedback(state: articleState):
+    """Combine AI feedback with human feedback if available"""
+    if not state.get('human_feedback'):
+        return state['feedback']
+    return f"""
 AI FEEDBACK:
 {state['feedback']}
 
@@ -242,7 +652,94 @@ HUMAN FEEDBACK:
 
 Please address BOTH the AI feedback and human feedback in your optimization.
 """
-    
+
+async def rewrite_section(state: articleState, section, section_feedback: str, combined_feedback: str, semaphore, model_name=None):
+    """Rewrite a single section, keeping its heading so it can be stitched back in place"""
+    heading_line = section.text.splitlines()[0]
+    messages = [
+        SystemMessage(content="""You are the most elite content editor in the industry. You are revising ONE section of a long Medium.com article; the rest of the article stays as it is, so the section must keep fitting in."""),
+        HumanMessage(content=f"""
+REWRITE THIS SECTION OF THE ARTICLE:
+
+Article Topic: "{state['topic']}"
+Current Score: {state['score']}/10
+Target Score: 9-10/10
+
+Feedback for this section: {section_feedback}
+
+Overall feedback (for context; only act on what concerns this section): {combined_feedback}
+
+Current Section:
+{section.text}
+
+## SPECIFIC INSTRUCTIONS:
+- Address EVERY point in the section feedback
+- Deepen research, examples and actionable detail where the feedback asks for it
+- Keep the section's role in the article and don't repeat other sections
+- Prioritize human feedback when provided
+- Start with exactly this heading line: {heading_line}
+- Do not add new H2/H3 headings for other parts of the article
+
+ONLY output the rewritten section in Markdown format - no explanations or commentary.
+""")
+    ]
+    async with semaphore:
+        text = (await invoke_llm('optimizer', messages, state, model_name=model_name)).content
+    text = unwrap_article(text.strip())[1].strip()
+    if not text.lstrip().startswith('#'):
+        text = f"{heading_line}\n\n{text}"
+    # Keep the blank lines that separated this section from the next one
+    trailing = section.text[len(section.text.rstrip()):]
+    return text + (trailing or "\n")
+
+async def optimize_sections(state: articleState, combined_feedback: str, model_name=None):
+    """Rewrite only the sections the evaluator targeted. Returns None if none could be matched."""
+    prefix, body, suffix = unwrap_article(state['article'])
+    sections = split_sections(body)
+    targets = {}
+    for item in state.get('section_feedback') or []:
+        index = find_section(sections, item.get('heading', ''))
+        if index is None or not sections[index].heading:
+            continue
+        # Several notes on the same section are merged into one rewrite
+        targets[index] = f"{targets[index]}\n{item['feedback']}" if index in targets else item['feedback']
+        if len(targets) >= MAX_SECTION_REWRITES:
+            break
+    if not targets:
+        return None
+
+    semaphore = asyncio.Semaphore(SECTION_REWRITE_CONCURRENCY)
+    indexes = list(targets)
+    rewritten = await asyncio.gather(*[
+        rewrite_section(state, sections[index], targets[index], combined_feedback, semaphore, model_name)
+        for index in indexes
+    ])
+    for index, text in zip(indexes, rewritten):
+        sections[index].text = text
+    return prefix + join_sections(sections) + suffix
+
+def retarget_feedback(state: articleState):
+    """Instruction for the first round of a seeded run: the stored draft was written for another topic"""
+    return f"""RETARGET THIS ARTICLE TO "{state['topic']}".
+
+It was written for "{state.get('seeded_topic', 'a similar topic')}". Rework the title, introduction, every section and the conclusion so the article squarely covers the requested topic - its subject, angle and audience. Keep the research, sources and structure that still fit; replace or drop everything that doesn't."""
+
+async def optimize_article(state: articleState):
+    """Optimize with surgical precision, incorporating human feedback"""
+    model = model_for(state.get('routing'), 'optimize', 'optimizer', state.get('escalated', False))
+    # A seeded run is optimized before its first evaluation: retarget the stored draft instead
+    retarget = bool(state.get('seeded_from')) and state.get('score') is None
+    combined_feedback = retarget_feedback(state) if retarget else combine_feedback(state)
+    revision_models = [{'revision': revision_count(state.get('article_history')) + 1,
+                        'step': 'retarget' if retarget else 'optimize', 'model': model}]
+
+    if state.get('optimize_mode') == 'incremental' and not retarget:
+        # Falls back to a full rewrite when the evaluator didn't target any known section
+        response = await optimize_sections(state, combined_feedback, model)
+        if response is not None:
+            return {'article': response, 'iteration': state['iteration'] + 1, 'article_history': [response],
+                    'revision_models': revision_models}
+
     messages = [
         SystemMessage(content="""You are the most elite content editor in the industry, known for transforming good articles into viral masterpieces. You have a 95% success rate of turning rejected articles into approved ones.
 
@@ -258,7 +755,7 @@ You work with surgical precision, addressing every weakness while amplifying eve
         HumanMessage(content=f"""
 TRANSFORM THIS ARTICLE INTO A VIRAL MASTERPIECE:
 
-Current Score: {state['score']}/10
+Current Score: {'not yet scored for this topic' if retarget else f"{state['score']}/10"}
 Target Score: 9-10/10
 
 Combined Feedback: {combined_feedback}
@@ -323,38 +820,69 @@ ONLY output the fully optimized article in Markdown format - no explanations or
 """)
     ]
 
-    response = optimizer_llm.invoke(messages).content
-    iteration = state['iteration'] + 1
-    return {'article': response, 'iteration': iteration, 'article_history': [response]}
+    response = (await invoke_llm('optimizer', messages, state, model_name=model)).content
+    # The retargeted draft stands in for a generated first draft, so it doesn't use up an iteration
+    iteration = state['iteration'] if retarget else state['iteration'] + 1
+    return {'article': response, 'iteration': iteration, 'article_history': [response], 'revision_models': revision_models}
+
+def request_human_review(state: articleState):
+    """Pause the run until an editor supplies feedback, then hand it to the optimizer"""
+    # interrupt() suspends the graph here; the checkpointer keeps the state until
+    # the run is resumed with Command(resume=<feedback>) on the same thread id
+    feedback = interrupt({
+        'score': state['score'],
+        'feedback': state['feedback'],
+        'iteration': state['iteration'],
+    })
+    return {'human_feedback': feedback, 'human_feedback_history': [feedback]}
 
 def route_evaluation(state: articleState):
-    """Route based on strict evaluation criteria and human review needs"""
-    # Only request human feedback if score is less than 7 AND human feedback is requested
-    if state.get('human_feedback_requested', False) and state.get('score', 0) < 7:
-        return 'needs_human_review'
-    
-    # Only approve if score is 9-10 AND we haven't reached max iterations
-    if (state['score'] >= 9 and state['evaluation'] == 'approved') or state['iteration'] >= state['max_iteration']:
-        return 'approved'
-    else:
+    """Route on the stop decision made in evaluate (approval, iterations, plateau or budget)"""
+    reason = state.get('stop_reason')
+    if reason is None:
         return 'needs_improvement'
+    
+    # Stopped without approval: only request human feedback if score is less than 7 AND human feedback is requested
+    if reason != STOP_APPROVED and state.get('human_feedback_requested', False) and state.get('score', 0) < 7:
+        return 'needs_human_review'
+    return 'stop'
 
 # Build the workflow graph
 graph = StateGraph(articleState)
 
-graph.add_node('generate', generate_article)
-graph.add_node('evaluate', evaluate_article)
-graph.add_node('optimize', optimize_article)
-
-graph.add_edge(START, 'generate')
+graph.add_node('generate', instrument_node('generate')(generate_article))
+graph.add_node('outline', instrument_node('outline')(plan_outline))
+graph.add_node('write_section', instrument_node('write_section')(write_section))
+graph.add_node('assemble', assemble_article)
+graph.add_node('evaluate', instrument_node('evaluate')(evaluate_article))
+graph.add_node('optimize', instrument_node('optimize')(optimize_article))
+graph.add_node('human_review', request_human_review)
+graph.add_node('finalize', finalize_article)
+
+graph.add_conditional_edges(START, route_generation, {
+    'single': 'generate',
+    'sectioned': 'outline',
+    'seeded': 'optimize'
+})
 graph.add_edge('generate', 'evaluate')
+# Sectioned path: outline -> one write_section per section (in parallel) -> assemble
+graph.add_conditional_edges('outline', fan_out_sections, ['write_section', 'generate'])
+graph.add_edge('write_section', 'assemble')
+graph.add_edge('assemble', 'evaluate')
 
 graph.add_conditional_edges('evaluate', route_evaluation, {
-    'approved': END, 
+    'stop': 'finalize',
     'needs_improvement': 'optimize',
-    'needs_human_review': 'optimize'  # For now, route to optimize, but we'll handle human feedback in the API
+    'needs_human_review': 'human_review'
 })
+graph.add_edge('finalize', END)
+graph.add_edge('human_review', 'optimize')
 graph.add_edge('optimize', 'evaluate')
 
-# Compile the workflow
-workflow = graph.compile() 
\ No newline at end of file
+def compile_workflow(checkpointer=None):
+    """Compile the graph. Pass a checkpointer to make runs durable and resumable by thread id."""
+    # max_concurrency caps how many section writers of one run call the model at once
+    return graph.compile(checkpointer=checkpointer).with_config(max_concurrency=SECTION_WRITER_CONCURRENCY)
+
+# Compile the workflow (nodes are async, so run it with workflow.ainvoke)
+workflow = compile_workflow() 
\ No newline at end of file
@@ -14,16 +14,19 @@ function App() {
   const [activeTab, setActiveTab] = useState('generate');
   const [feedbackModalOpen, setFeedbackModalOpen] = useState(false);
   const [articleNeedingFeedback, setArticleNeedingFeedback] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
 
   useEffect(() => {
     fetchArticles();
   }, []);
 
-  const fetchArticles = async () => {
+  // The list endpoint returns summaries one page at a time
+  const fetchArticles = async (cursor = null) => {
     try {
       setLoading(true);
-      const response = await axios.get('/articles');
-      setArticles(response.data.articles);
+      const response = await axios.get('/articles', { params: cursor ? { cursor } : {} });
+      setArticles(cursor ? [...articles, ...response.data.articles] : response.data.articles);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error fetching articles:', error);
     } finally {
@@ -74,11 +77,49 @@ function App() {
     }
   };
 
-  const handleProvideFeedback = (article) => {
-    setArticleNeedingFeedback(article);
+  // Summaries don't carry the article body, so load the full record before viewing
+  const handleSelectArticle = async (article) => {
+    try {
+      const response = await axios.get(`/articles/${article.id}`);
+      setSelectedArticle(response.data);
+      setActiveTab('view');
+    } catch (error) {
+      console.error('Error loading article:', error);
+    }
+  };
+
+  const handleProvideFeedback = async (article) => {
+    let fullArticle = article;
+    if (article.final_article === undefined) {
+      try {
+        const response = await axios.get(`/articles/${article.id}`);
+        fullArticle = response.data;
+      } catch (error) {
+        console.error('Error loading article:', error);
+        return;
+      }
+    }
+    setArticleNeedingFeedback(fullArticle);
     setFeedbackModalOpen(true);
   };
 
+
+  // Continue a run that failed part-way (e.g. the model provider was down) from its last completed step
+  const handleResumeArticle = async (article) => {
+    try {
+      const response = await axios.post(`/articles/${article.id}/resume`);
+      let job = response.data;
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        job = (await axios.get(`/jobs/${job.job_id}`)).data;
+      }
+      const updated = await axios.get(`/articles/${article.id}`);
+      handleFeedbackSubmitted(updated.data);
+    } catch (error) {
+      console.error('Error resuming article:', error);
+    }
+  };
+
   const handleFeedbackSubmitted = (updatedArticle) => {
     // Update the articles list with the new article data
     setArticles(articles.map(article => 
@@ -158,10 +199,9 @@ function App() {
           <ArticleList
             articles={articles}
             loading={loading}
-            onSelectArticle={(article) => {
-              setSelectedArticle(article);
-              setActiveTab('view');
-            }}
+            hasMore={Boolean(nextCursor)}
+            onLoadMore={() => fetchArticles(nextCursor)}
+            onSelectArticle={handleSelectArticle}
             onDeleteArticle={handleDeleteArticle}
             onDownloadMarkdown={handleDownloadMarkdown}
             onProvideFeedback={handleProvideFeedback}
@@ -174,6 +214,7 @@ function App() {
             onBack={() => setActiveTab('articles')}
             onDownloadMarkdown={handleDownloadMarkdown}
             onProvideFeedback={handleProvideFeedback}
+            onResume={handleResumeArticle}
           />
         )}
       </main>
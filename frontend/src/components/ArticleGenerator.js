@@ -1,13 +1,91 @@
-import React, { useState } from 'react';
+import React, { useState, useRef } from 'react';
 import axios from 'axios';
 import { Sparkles, AlertCircle, CheckCircle } from 'lucide-react';
 
+const POLL_INTERVAL_MS = 3000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 const ArticleGenerator = ({ onArticleGenerated }) => {
   const [topic, setTopic] = useState('');
   const [maxIterations, setMaxIterations] = useState(5);
+  const [generateMode, setGenerateMode] = useState('single');
+  const [optimizeMode, setOptimizeMode] = useState('full');
+  const [evaluateMode, setEvaluateMode] = useState('single');
+  const [routingPolicy, setRoutingPolicy] = useState('fixed');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [success, setSuccess] = useState('');
+  const [jobId, setJobId] = useState(null);
+  const [progress, setProgress] = useState(null);
+  const eventSourceRef = useRef(null);
+
+  // Follow live progress (node transitions, scores, streamed words) for a job
+  const followProgress = (id) => {
+    const source = new EventSource(`/jobs/${id}/events`);
+    eventSourceRef.current = source;
+    let streamedWords = 0;
+    // Words per model call attempt, so a failed attempt's words can be taken back when it is retried
+    let attemptWords = {};
+
+    source.addEventListener('node_start', (e) => {
+      const data = JSON.parse(e.data);
+      streamedWords = 0;
+      attemptWords = {};
+      setProgress((prev) => ({ ...prev, node: data.node, iteration: data.iteration, words: 0 }));
+    });
+    source.addEventListener('token', (e) => {
+      const data = JSON.parse(e.data);
+      const words = data.text.split(/\s+/).filter(Boolean).length;
+      streamedWords += words;
+      attemptWords[data.attempt] = (attemptWords[data.attempt] || 0) + words;
+      setProgress((prev) => ({ ...prev, words: streamedWords }));
+    });
+    source.addEventListener('discard', (e) => {
+      const data = JSON.parse(e.data);
+      streamedWords -= attemptWords[data.attempt] || 0;
+      delete attemptWords[data.attempt];
+      setProgress((prev) => ({ ...prev, words: streamedWords }));
+    });
+    source.addEventListener('evaluation', (e) => {
+      const data = JSON.parse(e.data);
+      setProgress((prev) => ({ ...prev, score: data.score }));
+    });
+    source.addEventListener('done', () => source.close());
+    source.onerror = () => source.close();
+  };
+
+  const stopProgress = () => {
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close();
+      eventSourceRef.current = null;
+    }
+    setProgress(null);
+  };
+
+  // Poll the background job until the workflow run finishes
+  const waitForJob = async (id) => {
+    while (true) {
+      const response = await axios.get(`/jobs/${id}`);
+      const job = response.data;
+      if (job.status === 'completed') {
+        return job.result;
+      }
+      if (job.status === 'failed' || job.status === 'cancelled') {
+        throw new Error(job.status === 'cancelled' ? 'Generation was cancelled' : job.error);
+      }
+      await sleep(POLL_INTERVAL_MS);
+    }
+  };
+
+  const handleCancel = async () => {
+    if (!jobId) return;
+    try {
+      await axios.delete(`/jobs/${jobId}`);
+    } catch (error) {
+      console.error('Error cancelling job:', error);
+    }
+  };
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -24,11 +102,22 @@ const ArticleGenerator = ({ onArticleGenerated }) => {
     try {
       const response = await axios.post('/generate-article', {
         topic: topic.trim(),
-        max_iterations: maxIterations
+        max_iterations: maxIterations,
+        generate_mode: generateMode,
+        optimize_mode: optimizeMode,
+        evaluate_mode: evaluateMode,
+        routing_policy: routingPolicy
       });
+      setJobId(response.data.job_id);
+      setProgress({ node: 'queued' });
+      followProgress(response.data.job_id);
 
-      setSuccess('Article generated successfully!');
-      onArticleGenerated(response.data);
+      const article = await waitForJob(response.data.job_id);
+
+      setSuccess(article.reused_for
+        ? 'Found an existing article on this topic'
+        : 'Article generated successfully!');
+      onArticleGenerated(article);
       
       // Reset form
       setTopic('');
@@ -36,9 +125,11 @@ const ArticleGenerator = ({ onArticleGenerated }) => {
       
     } catch (error) {
       console.error('Error generating article:', error);
-      setError(error.response?.data?.detail || 'Failed to generate article. Please try again.');
+      setError(error.response?.data?.detail || error.message || 'Failed to generate article. Please try again.');
     } finally {
       setLoading(false);
+      setJobId(null);
+      stopProgress();
     }
   };
 
@@ -94,6 +185,90 @@ const ArticleGenerator = ({ onArticleGenerated }) => {
             </p>
           </div>
 
+          {/* Draft Mode */}
+          <div>
+            <label htmlFor="generateMode" className="block text-sm font-medium text-gray-700 mb-2">
+              Draft Mode
+            </label>
+            <select
+              id="generateMode"
+              value={generateMode}
+              onChange={(e) => setGenerateMode(e.target.value)}
+              className="w-full px-4 py-3 border border-gray-300 rounded-md shadow-sm focus:ring-2 focus:ring-primary-500 focus:border-primary-500"
+              disabled={loading}
+            >
+              <option value="single">Single pass</option>
+              <option value="sectioned">Outline, then write sections in parallel</option>
+            </select>
+          </div>
+
+          {/* Optimization Mode */}
+          <div>
+            <label htmlFor="optimizeMode" className="block text-sm font-medium text-gray-700 mb-2">
+              Optimization Mode
+            </label>
+            <select
+              id="optimizeMode"
+              value={optimizeMode}
+              onChange={(e) => setOptimizeMode(e.target.value)}
+              className="w-full px-4 py-3 border border-gray-300 rounded-md shadow-sm focus:ring-2 focus:ring-primary-500 focus:border-primary-500"
+              disabled={loading}
+            >
+              <option value="full">Full rewrite</option>
+              <option value="incremental">Incremental (rewrite weak sections only)</option>
+            </select>
+            <p className="mt-1 text-sm text-gray-500">
+              Incremental mode is much faster on long articles
+            </p>
+          </div>
+
+          {/* Evaluation Mode */}
+          <div>
+            <label htmlFor="evaluateMode" className="block text-sm font-medium text-gray-700 mb-2">
+              Evaluation Mode
+            </label>
+            <select
+              id="evaluateMode"
+              value={evaluateMode}
+              onChange={(e) => setEvaluateMode(e.target.value)}
+              className="w-full px-4 py-3 border border-gray-300 rounded-md shadow-sm focus:ring-2 focus:ring-primary-500 focus:border-primary-500"
+              disabled={loading}
+            >
+              <option value="single">Single review</option>
+              <option value="sharded">Score each rubric dimension in parallel</option>
+            </select>
+          </div>
+
+          {/* Model Routing */}
+          <div>
+            <label htmlFor="routingPolicy" className="block text-sm font-medium text-gray-700 mb-2">
+              Model Routing
+            </label>
+            <select
+              id="routingPolicy"
+              value={routingPolicy}
+              onChange={(e) => setRoutingPolicy(e.target.value)}
+              className="w-full px-4 py-3 border border-gray-300 rounded-md shadow-sm focus:ring-2 focus:ring-primary-500 focus:border-primary-500"
+              disabled={loading}
+            >
+              <option value="fixed">Configured model for every step</option>
+              <option value="tiered">Fast model first, strong model for approvals and plateaus</option>
+            </select>
+            <p className="mt-1 text-sm text-gray-500">
+              Tiered routing lowers cost and latency per article
+            </p>
+          </div>
+
+          {/* Live Progress */}
+          {loading && progress && (
+            <div className="p-4 bg-blue-50 border border-blue-200 rounded-md text-sm text-blue-800">
+              <span className="font-medium capitalize">{progress.node}</span>
+              {progress.iteration && <span> &middot; iteration {progress.iteration}</span>}
+              {progress.words > 0 && <span> &middot; {progress.words} words written</span>}
+              {progress.score && <span> &middot; last score {progress.score}/10</span>}
+            </div>
+          )}
+
           {/* Error/Success Messages */}
           {error && (
             <div className="flex items-center p-4 bg-red-50 border border-red-200 rounded-md">
@@ -127,6 +302,16 @@ const ArticleGenerator = ({ onArticleGenerated }) => {
               </>
             )}
           </button>
+
+          {loading && jobId && (
+            <button
+              type="button"
+              onClick={handleCancel}
+              className="w-full px-6 py-3 border border-gray-300 text-base font-medium rounded-md text-gray-700 bg-white hover:bg-gray-50 transition-colors"
+            >
+              Cancel
+            </button>
+          )}
         </form>
 
         {/* Info Section */}
@@ -1,12 +1,52 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
 import { Eye, Download, Trash2, Clock, CheckCircle, AlertCircle, FileText, Star, MessageSquare } from 'lucide-react';
 
-const ArticleList = ({ articles, loading, onSelectArticle, onDeleteArticle, onDownloadMarkdown, onProvideFeedback }) => {
+const ArticleList = ({ articles, loading, hasMore, onLoadMore, onSelectArticle, onDeleteArticle, onDownloadMarkdown, onProvideFeedback }) => {
   const [searchTerm, setSearchTerm] = useState('');
+  // Server-side full-text search results; null while the search box is empty
+  const [searchResults, setSearchResults] = useState(null);
+  const [searchNextOffset, setSearchNextOffset] = useState(null);
+  const [searching, setSearching] = useState(false);
 
-  const filteredArticles = articles.filter(article =>
-    article.topic.toLowerCase().includes(searchTerm.toLowerCase())
-  );
+  const runSearch = async (query, offset = 0) => {
+    setSearching(true);
+    try {
+      const response = await axios.get('/articles/search', { params: { q: query, limit: 20, offset } });
+      setSearchResults((previous) => offset ? [...(previous || []), ...response.data.articles] : response.data.articles);
+      setSearchNextOffset(response.data.next_offset);
+    } catch (error) {
+      console.error('Error searching articles:', error);
+      setSearchResults([]);
+      setSearchNextOffset(null);
+    } finally {
+      setSearching(false);
+    }
+  };
+
+  // Debounce typing so each pause sends one query
+  useEffect(() => {
+    const query = searchTerm.trim();
+    if (!query) {
+      setSearchResults(null);
+      setSearchNextOffset(null);
+      return undefined;
+    }
+    const timer = setTimeout(() => runSearch(query), 250);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  const filteredArticles = searchResults ?? articles;
+
+  // Snippets mark matches with <mark>...</mark>; render those as highlights without injecting HTML
+  const renderSnippet = (snippet) =>
+    snippet.split(/(<mark>.*?<\/mark>)/g).map((part, index) =>
+      part.startsWith('<mark>') ? (
+        <mark key={index} className="bg-yellow-100">{part.slice(6, -7)}</mark>
+      ) : (
+        <React.Fragment key={index}>{part}</React.Fragment>
+      )
+    );
 
   const formatDate = (dateString) => {
     return new Date(dateString).toLocaleDateString('en-US', {
@@ -134,7 +174,9 @@ const ArticleList = ({ articles, loading, onSelectArticle, onDeleteArticle, onDo
                     </div>
 
                     <p className="text-gray-600 text-sm line-clamp-2">
-                      {article.final_article.substring(0, 200)}...
+                      {article.snippet
+                        ? renderSnippet(article.snippet)
+                        : `${(article.preview ?? article.final_article ?? '').substring(0, 200)}...`}
                     </p>
                   </div>
 
@@ -178,6 +220,18 @@ const ArticleList = ({ articles, loading, onSelectArticle, onDeleteArticle, onDo
             ))
           )}
         </div>
+
+        {(searchResults ? searchNextOffset != null : hasMore) && (
+          <div className="px-6 py-4 border-t text-center">
+            <button
+              onClick={searchResults ? () => runSearch(searchTerm.trim(), searchNextOffset) : onLoadMore}
+              disabled={loading || searching}
+              className="px-4 py-2 text-sm font-medium text-primary-600 hover:text-primary-700 hover:bg-primary-50 rounded-md transition-colors disabled:opacity-50"
+            >
+              {loading || searching ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -1,9 +1,24 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import ReactMarkdown from 'react-markdown';
+import axios from 'axios';
 import { ArrowLeft, Download, CheckCircle, AlertCircle, Clock, RefreshCw, Star, MessageSquare } from 'lucide-react';
 
-const ArticleViewer = ({ article, onBack, onDownloadMarkdown, onProvideFeedback }) => {
+const ArticleViewer = ({ article, onBack, onDownloadMarkdown, onProvideFeedback, onResume }) => {
   const [activeTab, setActiveTab] = useState('article');
+  const [resuming, setResuming] = useState(false);
+  const [articleHistory, setArticleHistory] = useState(article.article_history || null);
+
+  // Revision history is left out of article responses; load it when the tab is opened
+  useEffect(() => {
+    setArticleHistory(article.article_history || null);
+  }, [article]);
+
+  useEffect(() => {
+    if (activeTab !== 'history' || articleHistory) return;
+    axios.get(`/articles/${article.id}/history/article`)
+      .then((response) => setArticleHistory(response.data.entries || []))
+      .catch((error) => console.error('Error loading article history:', error));
+  }, [activeTab, article.id, articleHistory]);
 
   const formatDate = (dateString) => {
     return new Date(dateString).toLocaleDateString('en-US', {
@@ -100,6 +115,25 @@ const ArticleViewer = ({ article, onBack, onDownloadMarkdown, onProvideFeedback
                 </button>
               )}
               
+              {article.status === 'failed' && onResume && (
+                <button
+                  onClick={async () => {
+                    setResuming(true);
+                    try {
+                      await onResume(article);
+                    } finally {
+                      setResuming(false);
+                    }
+                  }}
+                  disabled={resuming}
+                  title={article.error || undefined}
+                  className="flex items-center px-3 py-1 bg-red-100 text-red-800 rounded-full text-sm font-medium hover:bg-red-200 transition-colors disabled:opacity-50"
+                >
+                  <RefreshCw className={`h-4 w-4 mr-1 ${resuming ? 'animate-spin' : ''}`} />
+                  {resuming ? 'Resuming...' : 'Run failed - Resume'}
+                </button>
+              )}
+              
               <button
                 onClick={() => onDownloadMarkdown(article.id, article.topic)}
                 className="flex items-center px-4 py-2 bg-primary-600 text-white rounded-md hover:bg-primary-700 transition-colors"
@@ -241,11 +275,14 @@ const ArticleViewer = ({ article, onBack, onDownloadMarkdown, onProvideFeedback
           <div className="p-8">
             <h3 className="text-lg font-semibold text-gray-900 mb-4">Article Evolution</h3>
             <div className="space-y-6">
-              {article.article_history && article.article_history.map((version, index) => (
+              {!articleHistory && (
+                <p className="text-gray-500">Loading history...</p>
+              )}
+              {articleHistory && articleHistory.map((version, index) => (
                 <div key={index} className="border rounded-lg">
                   <div className="px-4 py-3 bg-gray-50 border-b">
                     <h4 className="font-medium text-gray-900">
-                      Version {index + 1} {index === article.article_history.length - 1 && '(Final)'}
+                      Version {index + 1} {index === articleHistory.length - 1 && '(Final)'}
                     </h4>
                   </div>
                   <div className="p-4">